@@ -121,6 +121,35 @@ class Action(Protocol, metaclass=abc.ABCMeta):
         """
         return ""
 
+    def close(self) -> None:
+        """Release what the action acquired in its constructor
+
+        This is called when a configured action is no longer used, e.g.
+        because it was removed from the configuration and the latter
+        was reloaded.  Actions that register callbacks with the event
+        handler or schedule timers must undo that here.
+        """
+
+
+class AsyncAction(Action):
+    """Base class for actions that can run as a coroutine.
+
+    Actions that spend most of their time waiting for I/O (e.g. network
+    requests) should derive from this class and implement `call_async`
+    in addition to `__call__`. When the event handler runs in asyncio
+    mode, it awaits `call_async` on its event loop instead of blocking
+    a worker thread with `__call__`.
+    """
+
+    @abc.abstractmethod
+    async def call_async(
+        self, event_id: str, extra: Mapping[str, Any]
+    ) -> None:
+        """Execute the action as a coroutine.
+
+        Takes the same arguments as `__call__`.
+        """
+
 
 class CallbackAction(Action):
     """An action that executes a callback.
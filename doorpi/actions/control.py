@@ -45,7 +45,9 @@ class WaitEventAction(Action):
 
         self.__flag = threading.Event()
         self.__cb = doorpi.actions.CallbackAction(self.__flag.set)
-        doorpi.INSTANCE.event_handler.actions[eventname].insert(0, self.__cb)
+        doorpi.INSTANCE.event_handler.register_action(
+            eventname, self.__cb, prepend=True
+        )
 
     def __call__(self, event_id: str, extra: Mapping[str, Any]) -> None:
         self.__flag.clear()
@@ -60,6 +62,11 @@ class WaitEventAction(Action):
         if (self.__action == "continue") ^ event_occured:
             raise doorpi.event.AbortEventExecution()
 
+    def close(self) -> None:
+        doorpi.INSTANCE.event_handler.unregister_action(
+            self.__eventname, self.__cb
+        )
+
     def __str__(self) -> str:
         otheraction = "continue" if self.__action == "abort" else "abort"
         return "Wait for {}, then {} (otherwise {})".format(
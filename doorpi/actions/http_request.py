@@ -1,18 +1,27 @@
 """Actions that perform requests to third party servers: http_request"""
+import asyncio
+import contextvars
 import logging
 import urllib.parse
 from typing import Any, Mapping
 
 import requests
 
-from . import Action
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None  # type: ignore
+
+from doorpi.event import trace
+
+from . import AsyncAction
 
 LOGGER = logging.getLogger(__name__)
 
 ALLOWED_SCHEMES = {"http", "https"}
 
 
-class HTTPRequestAction(Action):
+class HTTPRequestAction(AsyncAction):
     """Performs a GET request to the given URL."""
 
     def __init__(self, *args: str) -> None:
@@ -27,11 +36,37 @@ class HTTPRequestAction(Action):
 
     def __call__(self, event_id: str, extra: Mapping[str, Any]) -> None:
         try:
-            resp = requests.get(self.__url, timeout=2)
+            with trace.span("http", f"GET {self.__url}"):
+                resp = requests.get(self.__url, timeout=2)
             LOGGER.info("Request '%s': Server response: %d %s", self.__url, resp.status_code, resp.reason)
         except requests.exceptions.Timeout:
             LOGGER.warning("Request '%s': Server request timed out", self.__url)
-        
+
+    async def call_async(
+        self, event_id: str, extra: Mapping[str, Any]
+    ) -> None:
+        if aiohttp is None:
+            await asyncio.get_running_loop().run_in_executor(
+                None, contextvars.copy_context().run, self, event_id, extra
+            )
+            return
+        try:
+            with trace.span("http", f"GET {self.__url}"):
+                async with aiohttp.ClientSession(
+                    timeout=aiohttp.ClientTimeout(total=2)
+                ) as session:
+                    async with session.get(self.__url) as resp:
+                        LOGGER.info(
+                            "Request '%s': Server response: %d %s",
+                            self.__url,
+                            resp.status,
+                            resp.reason,
+                        )
+        except asyncio.TimeoutError:
+            LOGGER.warning(
+                "Request '%s': Server request timed out", self.__url
+            )
+
     def __str__(self) -> str:
         return f"HTTP Request to {self.__url}"
 
@@ -96,6 +96,12 @@ class TriggeredOutAction(OutAction):
         self._running = False
         LOGGER.info ("OUT: finished out loops")
 
+    def close(self) -> None:
+        eh = doorpi.INSTANCE.event_handler
+        eh.unregister_action(f"StopOut_{self._pin}", self.interrupt)
+        if self._intpin:
+            eh.unregister_action(f"OnKeyDown_{self._intpin}", self.interrupt)
+
     def interrupt(self, event_id: str, extra: Mapping[str, Any]) -> None:
         """Aborts the wait time, so that the pin will be reset immediately."""
         del event_id, extra
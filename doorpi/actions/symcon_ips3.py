@@ -1,4 +1,6 @@
 """Actions that interact with the Symcon IPS v3: symcon_ips3"""
+import asyncio
+import contextvars
 import enum
 import json
 import logging
@@ -6,9 +8,15 @@ from typing import Any, Dict, Mapping, TypedDict
 
 import requests
 
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None  # type: ignore
+
 import doorpi
+from doorpi.event import trace
 
-from . import Action
+from . import Action, AsyncAction
 
 LOGGER = logging.getLogger(__name__)
 TRUE_VALUES = {"true", "yes", "on", "1"}
@@ -45,20 +53,48 @@ class IPSConnector:
             password=dcfg["password"],
         )
 
-    def _do_request(self, method: str, *prm: Any) -> Dict[str, Any]:
-        payload = json.dumps(
+    @staticmethod
+    def _payload(method: str, *prm: Any) -> bytes:
+        return json.dumps(
             {"method": method, "params": prm, "jsonrpc": "2.0", "id": 0}
         ).encode("utf-8")
 
-        response = requests.post(
-            self.config["webservice_url"],
-            data=payload,
-            headers={"Content-Type": "application/json"},
-            auth=(self.config["username"], self.config["password"]),
-        )
+    def _do_request(self, method: str, *prm: Any) -> Dict[str, Any]:
+        with trace.span("http", f"IPS {method}"):
+            response = requests.post(
+                self.config["webservice_url"],
+                data=self._payload(method, *prm),
+                headers={"Content-Type": "application/json"},
+                auth=(self.config["username"], self.config["password"]),
+            )
 
         return json.loads(response.content.decode("utf-8"))
 
+    async def _do_request_async(
+        self, method: str, *prm: Any
+    ) -> Dict[str, Any]:
+        if aiohttp is None:
+            return await asyncio.get_running_loop().run_in_executor(
+                None,
+                contextvars.copy_context().run,
+                self._do_request,
+                method,
+                *prm,
+            )
+
+        config = self.config
+        with trace.span("http", f"IPS {method}"):
+            async with aiohttp.ClientSession(
+                auth=aiohttp.BasicAuth(config["username"], config["password"])
+            ) as session:
+                async with session.post(
+                    config["webservice_url"],
+                    data=self._payload(method, *prm),
+                    headers={"Content-Type": "application/json"},
+                ) as response:
+                    content = await response.read()
+        return json.loads(content.decode("utf-8"))
+
     def variable_exists(self, key: int) -> bool:
         """Checks whether a variable exists."""
         return self._do_request("IPS_VariableExists", key)["result"]
@@ -68,33 +104,55 @@ class IPSConnector:
         if not self.variable_exists(key):
             raise KeyError(f"Variable {key} does not exist")
         response = self._do_request("IPS_GetVariable", key)
+        return self._parse_type(key, response)
+
+    async def variable_type_async(self, key: int) -> IPSVariableType:
+        """Returns the type of the named variable (coroutine version)."""
+        exists = await self._do_request_async("IPS_VariableExists", key)
+        if not exists["result"]:
+            raise KeyError(f"Variable {key} does not exist")
+        response = await self._do_request_async("IPS_GetVariable", key)
+        return self._parse_type(key, response)
+
+    @staticmethod
+    def _parse_type(key: int, response: Dict[str, Any]) -> IPSVariableType:
         vartype = response["result"]["VariableValue"]["ValueType"]
         if vartype is None:
             raise RuntimeError(f"Couldn't determine type of variable {key}")
         return IPSVariableType(int(vartype))
 
-    def set_value(self, key: int, value: Any) -> None:
-        """Sets variable ``key`` to ``value``."""
-        vartype = self.variable_type(key)
+    @staticmethod
+    def _convert(vartype: IPSVariableType, value: Any) -> Any:
         if vartype is IPSVariableType.BOOLEAN:
-            value = value.lower().strip() in TRUE_VALUES
-        elif vartype is IPSVariableType.INTEGER:
-            value = int(value)
-        elif vartype is IPSVariableType.FLOAT:
-            value = float(value)
-        elif vartype is IPSVariableType.STRING:
-            value = str(value)
-        else:
-            raise RuntimeError(f"Unknown variable type {vartype}")
+            return value.lower().strip() in TRUE_VALUES
+        if vartype is IPSVariableType.INTEGER:
+            return int(value)
+        if vartype is IPSVariableType.FLOAT:
+            return float(value)
+        if vartype is IPSVariableType.STRING:
+            return str(value)
+        raise RuntimeError(f"Unknown variable type {vartype}")
 
+    def set_value(self, key: int, value: Any) -> None:
+        """Sets variable ``key`` to ``value``."""
+        value = self._convert(self.variable_type(key), value)
         self._do_request("SetValue", key, value)
 
+    async def set_value_async(self, key: int, value: Any) -> None:
+        """Sets variable ``key`` to ``value`` (coroutine version)."""
+        value = self._convert(await self.variable_type_async(key), value)
+        await self._do_request_async("SetValue", key, value)
+
     def get_value(self, key: int) -> Any:
         """Retrieves a variable from the IPS."""
         return self._do_request("GetValue", key)["result"]
 
+    async def get_value_async(self, key: int) -> Any:
+        """Retrieves a variable from the IPS (coroutine version)."""
+        return (await self._do_request_async("GetValue", key))["result"]
 
-class IPSSetValueAction(IPSConnector, Action):
+
+class IPSSetValueAction(IPSConnector, AsyncAction):
     """Sets a variable in the IPS."""
 
     def __init__(self, key: str, value: str) -> None:
@@ -105,6 +163,13 @@ class IPSSetValueAction(IPSConnector, Action):
     def __call__(self, event_id: str, extra: Mapping[str, Any]) -> None:
         self.set_value(self.__key, doorpi.INSTANCE.parse_string(self.__value))
 
+    async def call_async(
+        self, event_id: str, extra: Mapping[str, Any]
+    ) -> None:
+        await self.set_value_async(
+            self.__key, doorpi.INSTANCE.parse_string(self.__value)
+        )
+
     def __str__(self) -> str:
         return f"Set IPS variable {self.__key} to {self.__value}"
 
@@ -112,7 +177,7 @@ class IPSSetValueAction(IPSConnector, Action):
         return f"symcon_ips3:set,{self.__key},{self.__value}"
 
 
-class IPSCallFromVariableAction(IPSConnector, Action):
+class IPSCallFromVariableAction(IPSConnector, AsyncAction):
     """Calls the number that is stored in the IPS."""
 
     def __init__(self, key: str) -> None:
@@ -123,8 +188,20 @@ class IPSCallFromVariableAction(IPSConnector, Action):
         vartype = self.variable_type(self.__key)
         if vartype is not IPSVariableType.STRING:
             raise ValueError(f"Variable {self.__key} is not a string")
-        uri = self.get_value(self.__key)
+        self.__call(event_id, self.get_value(self.__key))
+
+    async def call_async(
+        self, event_id: str, extra: Mapping[str, Any]
+    ) -> None:
+        vartype = await self.variable_type_async(self.__key)
+        if vartype is not IPSVariableType.STRING:
+            raise ValueError(f"Variable {self.__key} is not a string")
+        uri = await self.get_value_async(self.__key)
+        await asyncio.get_running_loop().run_in_executor(
+            None, contextvars.copy_context().run, self.__call, event_id, uri
+        )
 
+    def __call(self, event_id: str, uri: str) -> None:
         LOGGER.info(
             "[%s] Got phone number %s from variable %s",
             event_id,
@@ -1,14 +1,25 @@
 """The internal tick action."""
 import datetime
+import math
+import time
 from typing import Any, Mapping
 
 import doorpi
+from doorpi.event import Lane
 
 from . import Action, CallbackAction
 
 
 class TickAction(Action):
-    """The internal tick action."""
+    """The internal tick action.
+
+    Once instantiated, the action schedules itself on the event
+    handler's timer wheel at every full second. Of the time events that
+    are due, only those with registered actions are fired. They are
+    fired synchronously in the realtime lane, so that realtime actions
+    run directly on the main loop, while all other actions are handed
+    to their lane's worker pool.
+    """
 
     def __init__(self, last_tick: str) -> None:
         super().__init__()
@@ -18,10 +29,11 @@ class TickAction(Action):
         if __name__ in eh.sources:
             raise RuntimeError("Attempt to instantiate multiple TickActions")
         eh.register_source(__name__)
-        eh.register_action(
-            "OnShutdown",
-            CallbackAction(eh.unregister_source, __name__, force=True),
+        self.__timer = eh.timers.schedule_every(
+            1.0, self, "", {}, start=math.floor(time.time()) + 1
         )
+        self.__on_shutdown = CallbackAction(self.close)
+        eh.register_action("OnShutdown", self.__on_shutdown)
 
         for i in ("Second", "Minute", "Hour", "Day", "Week", "Month", "Year"):
             eh.register_event(f"OnTime{i}", __name__)
@@ -35,6 +47,12 @@ class TickAction(Action):
         for j in range(24):
             eh.register_event(f"OnTimeHour{j:02}", __name__)
 
+    def close(self) -> None:
+        eh = doorpi.INSTANCE.event_handler
+        self.__timer.cancel()
+        eh.unregister_action("OnShutdown", self.__on_shutdown)
+        eh.unregister_source(__name__, force=True)
+
     def __call__(self, event_id: str, extra: Mapping[str, Any]) -> None:
         now = datetime.datetime.now()
 
@@ -53,16 +71,21 @@ class TickAction(Action):
 
         self.__last_tick = now
 
-    @staticmethod
-    def _fire_event(event: str, num: int) -> None:
-        eh = doorpi.INSTANCE.event_handler
-        eh(f"OnTime{event}", __name__)
-        eh(f"OnTime{event}{('Even', 'Odd')[num % 2]}", __name__)
+    @classmethod
+    def _fire_event(cls, event: str, num: int) -> None:
+        cls._fire(f"OnTime{event}")
+        cls._fire(f"OnTime{event}{('Even', 'Odd')[num % 2]}")
 
     @classmethod
     def _fire_event_numbered(cls, event: str, num: int) -> None:
         cls._fire_event(event, num)
-        doorpi.INSTANCE.event_handler(f"OnTime{event}{num:02}", __name__)
+        cls._fire(f"OnTime{event}{num:02}")
+
+    @staticmethod
+    def _fire(event: str) -> None:
+        eh = doorpi.INSTANCE.event_handler
+        if eh.is_subscribed(event, __name__):
+            eh.fire_event_sync(event, __name__, lane=Lane.REALTIME)
 
     def __str__(self) -> str:
         return "Perform regular housekeeping tasks"
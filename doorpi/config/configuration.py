@@ -2,56 +2,168 @@ from __future__ import annotations
 
 import collections.abc
 import contextlib
+import contextvars
+import functools
+import hashlib
+import inspect
 import pathlib
 import itertools
 import logging
 import enum
 import os
+import pickle
 import re
-import dpath.util
+import sys
+import tempfile
+import threading
 from importlib import resources
 from typing import (
     Any,
+    Callable,
     ContextManager,
     Dict,
+    FrozenSet,
+    Hashable,
+    Iterable,
     Iterator,
     List,
     Mapping,
     MutableMapping,
+    Optional,
+    Pattern,
     Sequence,
+    Set,
     TextIO,
     Tuple,
+    TypeVar,
     Union,
 )
 
 import toml
 
+import doorpi.metadata
+
 from . import defs as _defs
 from . import types
 
 logger = logging.getLogger(__name__)
 
+_T = TypeVar("_T")
+
 flagkeys = frozenset({"_default", "_type"})
+# Keys of a key definition that are not part of its keypath
+defkeys = frozenset(
+    {
+        "_default",
+        "_type",
+        "_description",
+        "_enumcls",
+        "_min",
+        "_max",
+        "_membertype",
+    }
+)
 
 
 class Configuration:
-    """The main configuration object"""
+    """The main configuration object
+
+    The values are published as immutable `ConfigSnapshot` objects.
+    Writers never modify a published snapshot: Setting or deleting a
+    key copies only the tables along its path, shares all other tables
+    with the previous version, and replaces the current snapshot in a
+    single assignment.  Readers therefore never see a partially applied
+    change, and need no lock.
+
+    Reading a key reads it from the current snapshot, unless a snapshot
+    was pinned for the current context with `pinned`.  Code that reads
+    several related keys, like an event's actions or a web request,
+    should pin a snapshot, so that all reads see the same version.
+
+    Resolved values are cached in the snapshot, so that repeated reads
+    of a key cost a single dict lookup.  The cache holds each value
+    under the key as it was requested (a dotted string or a tuple of
+    segments).  Setting or deleting a key carries over the cache to the
+    new snapshot, except for the entries of that key; loading a file or
+    attaching definitions starts with an empty cache.
+
+    The catalogue of keypaths (see `keypaths`) is kept up to date in the
+    same way: Definition paths are indexed when definitions are
+    attached, value paths are tracked as values are set and deleted,
+    and the ordered list is only rebuilt when a path was added or
+    removed.
+    """
 
     def __init__(self) -> None:
         self.__values: Dict[str, Any] = {}
         self.__defs: Dict[str, Any] = {}
+        self.__snapshot = ConfigSnapshot(self, self.__values, 0, {})
+        self.__pinned: contextvars.ContextVar[
+            Optional[ConfigSnapshot]
+        ] = contextvars.ContextVar("doorpi_config_snapshot", default=None)
+        # Serializes writers; readers use the published snapshot
+        self.__write_lock = threading.RLock()
+        self.__defpaths: FrozenSet[str] = frozenset()
+        self.__definitions: Dict[str, Any] = {}
+        self.__valuepaths: Optional[Set[str]] = set()
+        self.__keypaths: Optional[List[str]] = None
 
     def load_builtin_definitions(self) -> None:
-        """Load the built-in key definitions from the ``defs`` directory"""
-        for fname in resources.contents(_defs):
-            if fname.endswith(".toml") and resources.is_resource(_defs, fname):
-                logger.debug("Loading defs from %s", fname)
-                with resources.open_text(_defs, fname) as file:
-                    self.attach_defs(toml.load(file))
+        """Load the built-in key definitions from the ``defs`` directory
+
+        Parsing the definitions takes a noticeable part of the startup
+        time on slow devices.  Therefore, the result is cached in
+        DoorPi's cache directory, together with the DoorPi and Python
+        versions and a hash of the definition files.  The cache is only
+        used by configurations without other definitions attached, and
+        is rebuilt if any of these changed.
+        """
+        sources = [
+            (fname, resources.read_binary(_defs, fname))
+            for fname in sorted(resources.contents(_defs))
+            if fname.endswith(".toml") and resources.is_resource(_defs, fname)
+        ]
+        if self.__defs:
+            cachekey = None
+        else:
+            cachekey = _defs_cachekey(sources)
+            defs = _read_defs_cache(cachekey)
+            if defs is not None:
+                logger.debug("Loaded cached defs")
+                self.__defs = defs
+                self.__defs_changed()
+                return
+
+        for fname, data in sources:
+            logger.debug("Loading defs from %s", fname)
+            self.attach_defs(toml.loads(data.decode("utf-8")))
+        if cachekey is not None:
+            _write_defs_cache(cachekey, self.__defs)
 
     def load(self, path: Union[str, os.PathLike, TextIO]) -> None:
-        """Replace configuration by loading from the given TOML file"""
-        self.__values = {}
+        """Replace configuration by loading from the given TOML file
+
+        The file is parsed and validated completely before it replaces
+        the current values, so that readers never see a partially loaded
+        configuration, and an invalid file leaves it unchanged.
+
+        Raises:
+            KeyError: The file contains a key that is not defined
+            TypeError, ValueError: The file contains an invalid value
+        """
+        self.restore(self.parse(path))
+
+    def parse(self, path: Union[str, os.PathLike, TextIO]) -> ConfigSnapshot:
+        """Parse and validate the given TOML file without applying it
+
+        The returned snapshot is not published; it can be read (e.g.
+        with `pinned`) and made current with `restore`.
+
+        Raises:
+            KeyError: The file contains a key that is not defined
+            TypeError, ValueError: The file contains an invalid value
+        """
+        values: Dict[str, Any] = {}
         subconf = list(toml.load(path).items())
         while subconf:
             key, val = subconf.pop()
@@ -61,7 +173,9 @@ class Configuration:
                     for subkey, subval in val.items()
                 )
             else:
-                self[key] = val
+                keypath = _splitkey(key)
+                _store(values, keypath, self.__cast(keypath, val))
+        return ConfigSnapshot(self, values, self.__snapshot.version, {})
 
     def save(self, path: Union[str, os.PathLike, TextIO]) -> None:
         """Save the configuration into the given TOML file"""
@@ -72,7 +186,9 @@ class Configuration:
         else:
             ctx = contextlib.nullcontext(path)
         with ctx as file:
-            toml.dump(self.__values, file, encoder=CustomTomlEncoder())
+            toml.dump(
+                self.__snapshot.values, file, encoder=CustomTomlEncoder()
+            )
 
     def attach_defs(self, defs: Mapping[str, Any]) -> None:
         """Attach a dictionary of key definitions to this configuration"""
@@ -118,7 +234,16 @@ class Configuration:
                             keypath + (key,), target.setdefault(key, {}), val
                         )
 
-        update_defs((), self.__defs, defs.get("config", {}))
+        with self.__write_lock:
+            update_defs((), self.__defs, defs.get("config", {}))
+            self.__defs_changed()
+
+    def __defs_changed(self) -> None:
+        with self.__write_lock:
+            self.__definitions = dict(_definitions(self.__defs))
+            self.__defpaths = frozenset(self.__definitions)
+            self.__keypaths = None
+            self.__publish(self.__values)
 
     def keydef(self, key: Union[str, Sequence[str]]) -> Tuple[Dict, List]:
         """Get the definition of key ``path``"""
@@ -129,46 +254,99 @@ class Configuration:
         return source, wildsegments
 
     @property
-    def keypaths(self):
-        """ returns the combined keypaths (definitions and values) available """
-
-        __combined = list(set(_keypaths(self.__defs) + _keypaths(self.__values)))
-        __combined.sort()
-        # separate wildcard entries (to sort em correctly)
-        __wildcards = list(filter(lambda item: "*" in item, __combined))
-        __combined = list(filter(lambda item: item not in __wildcards, __combined))
-
-        for wc in __wildcards:
-            __wc = wc.split(".")
-            for pos, item in enumerate(__combined):
-                __item = item.split(".")
-                if __wc[0] != __item[0]:
-                    continue
-                if keymatch(wc, item):
-                    __combined.insert(pos, wc)
-                    break
-
-        # readd unused
-        for wc in __wildcards:
-            if wc not in __combined:
-                __combined.append(wc)
-
-        return __combined
-
-    def get_definition(self, keypath):
-        if not dpath.util.search(self.__defs, keypath, separator="."):
-            segment = {"_type": "", "_description": "", "_default": ""}
-        else:
-            keypath = _splitkey(keypath)
-            segment = self.__defs
-            for key in keypath:
-                segment = segment[key]
-        return segment
+    def keypaths(self) -> List[str]:
+        """The combined keypaths (definitions and values) available
+
+        Keypaths are sorted, except that wildcard keypaths precede the
+        first keypath they match (see `keymatch`).  Wildcard keypaths
+        that match nothing are appended at the end.
+        """
+        if self.__valuepaths is None:
+            self.__valuepaths = set(_keypaths(self.__values))
+        if self.__keypaths is None:
+            self.__keypaths = _order_keypaths(
+                self.__defpaths | self.__valuepaths
+            )
+        return list(self.__keypaths)
+
+    def get_definition(self, keypath: str) -> Any:
+        """Get the definition of the (possibly wildcard) ``keypath``
+
+        Returns:
+            The definition table, or a table with empty ``_type``,
+            ``_description`` and ``_default`` if there is none.
+        """
+        try:
+            return self.__definitions[keypath]
+        except KeyError:
+            return {"_type": "", "_description": "", "_default": ""}
+
+    def snapshot(self) -> ConfigSnapshot:
+        """The snapshot pinned for the current context, or the latest"""
+        return self.__pinned.get() or self.__snapshot
+
+    @contextlib.contextmanager
+    def pinned(
+        self, snapshot: Optional[ConfigSnapshot] = None
+    ) -> Iterator[ConfigSnapshot]:
+        """Read ``snapshot`` (default: the latest) within the ``with`` block
+
+        This applies to all reads in the current thread or task, and in
+        contexts copied from it (e.g. with `contextvars.copy_context`).
+        """
+        if snapshot is None:
+            snapshot = self.__snapshot
+        token = self.__pinned.set(snapshot)
+        try:
+            yield snapshot
+        finally:
+            self.__pinned.reset(token)
+
+    def restore(self, snapshot: ConfigSnapshot) -> None:
+        """Make the values of ``snapshot`` current
+
+        This publishes a new snapshot with the same values, e.g. of an
+        earlier snapshot or of one returned by `parse`.
+        """
+        with self.__write_lock:
+            self.__valuepaths = None
+            self.__keypaths = None
+            self.__publish(dict(snapshot.values))
+
+    def bind(self, func: Callable[..., _T]) -> Callable[..., _T]:
+        """Bind ``func`` to the snapshot of the current context
+
+        The returned callable reads the same snapshot as the caller of
+        `bind`, even when it is called in another thread.
+        """
+        snapshot = self.snapshot()
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kw: Any) -> Any:
+                with self.pinned(snapshot):
+                    return await func(*args, **kw)
+
+            return async_wrapper  # type: ignore
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kw: Any) -> _T:
+            with self.pinned(snapshot):
+                return func(*args, **kw)
+
+        return wrapper
 
     def __getitem__(self, key: Union[str, Sequence[str]]) -> Any:
+        return (self.__pinned.get() or self.__snapshot)[key]
+
+    def _resolve(
+        self, values: Mapping[str, Any], key: Union[str, Sequence[str]]
+    ) -> Any:
+        """Look up ``key`` in ``values``, falling back to its default"""
         keypath = _splitkey(key)
         keydef, _ = self.keydef(keypath)
-        value = self.__values
+        value = values
         try:
             for segment in keypath:
                 value = value[segment]
@@ -183,26 +361,29 @@ class Configuration:
 
     def __setitem__(self, key: Union[str, Sequence[str]], value: Any) -> None:
         keypath = _splitkey(key)
+        value = self.__cast(keypath, value)
+        with self.__write_lock:
+            values, old = _assoc(self.__values, keypath, value)
+            self.__track(keypath, old, value)
+            self.__publish(values, keypath)
+
+    def __cast(self, keypath: Sequence[str], value: Any) -> Any:
+        """Validate ``value`` for ``keypath`` and convert it for storage"""
         keydef, _ = self.keydef(keypath)
-        value = keydef["_type"].insertcast(value)
-        namespace = self.__values
-        for i in range(len(keypath) - 1):
-            namespace = namespace.setdefault(keypath[i], {})
-        namespace[keypath[-1]] = value
+        return keydef["_type"].insertcast(value)
 
     def __delitem__(self, key: Union[str, Sequence[str]]) -> None:
         keypath = _splitkey(key)
         keydef, _ = self.keydef(keypath)
-        if "_default" in keydef:
-            namespace = self.__values
+        if "_default" not in keydef:
+            raise KeyError(f"Cannot delete required key {key}")
+        with self.__write_lock:
             try:
-                for i in range(len(keypath) - 1):
-                    namespace = namespace[keypath[i]]
-                del namespace[keypath[-1]]
+                values, old = _dissoc(self.__values, keypath)
             except KeyError:
-                pass
-        else:
-            raise KeyError(f"Cannot delete required key {key}")
+                return
+            self.__track(keypath, old, None)
+            self.__publish(values, keypath)
 
     def view(self, key: Union[str, Sequence[str]]) -> ConfigView:
         """Return a view on the specified config section"""
@@ -210,15 +391,65 @@ class Configuration:
 
     def iter(self, key: Union[str, Sequence[str]]) -> Iterator[str]:
         """Iterate over the value subkeys in ``key``"""
+        return self.snapshot().iter(key)
+
+    def _iter(
+        self, values: Mapping[str, Any], key: Union[str, Sequence[str]]
+    ) -> Iterator[str]:
+        """Iterate over the subkeys in ``key`` of ``values``"""
         keypath = _splitkey(key)
         keydef, _ = self._keydef(keypath)
-        section = self.__values
+        section = values
         for segment in keypath:
             section = section.get(segment, {})
         if flagkeys & keydef.keys():
             raise KeyError(f"Cannot iterate over value key: {key}")
         return iter(section)
 
+    def __track(self, keypath: Sequence[str], old: Any, new: Any) -> None:
+        """Update the value paths after the value at ``keypath`` changed
+
+        Args:
+            old: The previous value, None if there was none
+            new: The new value, None if it was deleted
+        """
+        if self.__valuepaths is None:
+            return
+        if isinstance(old, dict) or isinstance(new, dict):
+            # A whole subtree changed; collect its paths when needed
+            self.__valuepaths = None
+            self.__keypaths = None
+            return
+        path = ".".join(keypath)
+        if new is None and old is not None:
+            self.__valuepaths.discard(path)
+            self.__keypaths = None
+        elif old is None and path not in self.__valuepaths:
+            self.__valuepaths.add(path)
+            self.__keypaths = None
+
+    def __publish(
+        self, values: Dict[str, Any], keypath: Sequence[str] = ()
+    ) -> None:
+        """Publish ``values`` as the next snapshot
+
+        Args:
+            keypath: The key that changed; the cached values of all
+                other keys are carried over.  If empty, nothing is.
+
+        Must be called with the write lock held.
+        """
+        old = self.__snapshot
+        cache: Dict[Hashable, Any] = {}
+        if keypath:
+            cache = old.cache_copy()
+            cache.pop(tuple(keypath), None)
+            cache.pop(".".join(keypath), None)
+        self.__values = values
+        self.__snapshot = ConfigSnapshot(
+            self, values, old.version + 1, cache
+        )
+
     def _keydef(self, path: Sequence[str]) -> Tuple[Dict, List]:
         source = self.__defs
         wildsegments = []
@@ -252,10 +483,89 @@ class Configuration:
         keydef["_type"] = type_(keypath, keydef)
 
 
+class ConfigSnapshot:
+    """An immutable version of the configuration values
+
+    Snapshots are created by the `Configuration` whenever its values
+    change.  Reads resolve defaults and types like the configuration
+    itself.  The values are never modified after publishing, therefore
+    everything derived from them can be cached for the lifetime of the
+    snapshot (see `derive`).
+
+    Key definitions are not part of the snapshot; they are expected to
+    be attached during startup only.
+    """
+
+    def __init__(
+        self,
+        config: Configuration,
+        values: Mapping[str, Any],
+        version: int,
+        cache: Dict[Hashable, Any],
+    ) -> None:
+        self.__config = config
+        self.__values = values
+        self.__version = version
+        self.__cache = cache
+        self.__derived: Dict[Hashable, Any] = {}
+
+    @property
+    def version(self) -> int:
+        """A number that increases with each published snapshot"""
+        return self.__version
+
+    @property
+    def values(self) -> Mapping[str, Any]:
+        """The nested tables of explicitly set values (do not modify)"""
+        return self.__values
+
+    def __getitem__(self, key: Union[str, Sequence[str]]) -> Any:
+        cachekey = key if isinstance(key, (str, tuple)) else tuple(key)
+        try:
+            return self.__cache[cachekey]
+        except KeyError:
+            pass
+        value = self.__config._resolve(self.__values, key)
+        self.__cache[cachekey] = value
+        return value
+
+    def view(self, key: Union[str, Sequence[str]]) -> ConfigView:
+        """Return a read-only view on the specified config section"""
+        return ConfigView(self, tuple(_splitkey(key)))
+
+    def iter(self, key: Union[str, Sequence[str]]) -> Iterator[str]:
+        """Iterate over the value subkeys in ``key``"""
+        return self.__config._iter(self.__values, key)
+
+    def derive(
+        self, name: Hashable, factory: Callable[[ConfigSnapshot], _T]
+    ) -> _T:
+        """Return ``factory(self)``, computed once per snapshot
+
+        Args:
+            name: Identifies the derived value; use the same name for
+                the same factory.
+        """
+        try:
+            return self.__derived[name]
+        except KeyError:
+            pass
+        value = self.__derived[name] = factory(self)
+        return value
+
+    def cache_copy(self) -> Dict[Hashable, Any]:
+        """A copy of the resolved values cached so far"""
+        return dict(self.__cache)
+
+
 class ConfigView(collections.abc.Mapping):
     """A view into a subsection of the Configuration"""
 
-    def __init__(self, source: Configuration, path: Tuple[str, ...]) -> None:
+    def __init__(
+        self,
+        source: Union[Configuration, ConfigSnapshot],
+        path: Tuple[str, ...],
+    ) -> None:
         assert isinstance(path, tuple)
         self.__source = source
         self.__path = path
@@ -267,6 +577,8 @@ class ConfigView(collections.abc.Mapping):
         return self.__source.iter(self.__path)
 
     def __setitem__(self, key: Union[str, Sequence[str]], value: Any) -> None:
+        if isinstance(self.__source, ConfigSnapshot):
+            raise TypeError("Cannot modify a configuration snapshot")
         self.__source[
             tuple(itertools.chain(self.__path, _splitkey(key)))
         ] = value
@@ -284,6 +596,62 @@ class ConfigView(collections.abc.Mapping):
         )
 
 
+def _defs_cachepath() -> pathlib.Path:
+    return doorpi.metadata.cache_dir("configcache") / "builtin_defs.pickle"
+
+
+def _defs_cachekey(sources: Sequence[Tuple[str, bytes]]) -> Tuple[str, ...]:
+    digest = hashlib.sha256()
+    for fname, data in sources:
+        digest.update(fname.encode("utf-8") + b"\0")
+        digest.update(hashlib.sha256(data).digest())
+    return (
+        doorpi.metadata.distribution.metadata["Version"],
+        sys.version.split()[0],
+        digest.hexdigest(),
+    )
+
+
+def _read_defs_cache(cachekey: Tuple[str, ...]) -> Optional[Dict[str, Any]]:
+    """Load cached definitions, if the cache matches ``cachekey``
+
+    The key is stored as a separate pickle in front of the definitions,
+    so that a stale cache is detected without unpickling them.
+    """
+    try:
+        with open(_defs_cachepath(), "rb") as file:
+            if pickle.load(file) != cachekey:
+                logger.debug("Cached defs are outdated")
+                return None
+            defs = pickle.load(file)
+    except FileNotFoundError:
+        return None
+    except Exception:  # pylint: disable=broad-except
+        # e.g. truncated file, or an enum class that was moved
+        logger.debug("Cannot load cached defs", exc_info=True)
+        return None
+    return defs if isinstance(defs, dict) else None
+
+
+def _write_defs_cache(cachekey: Tuple[str, ...], defs: Dict[str, Any]) -> None:
+    path = _defs_cachepath()
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmpname = tempfile.mkstemp(dir=path.parent, prefix=path.name)
+    except OSError as err:
+        logger.debug("Cannot cache defs: %s", err)
+        return
+    try:
+        with os.fdopen(fd, "wb") as file:
+            pickle.dump(cachekey, file, pickle.HIGHEST_PROTOCOL)
+            pickle.dump(defs, file, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmpname, path)
+    except Exception:  # pylint: disable=broad-except
+        logger.debug("Cannot cache defs", exc_info=True)
+        with contextlib.suppress(OSError):
+            os.unlink(tmpname)
+
+
 def _splitkey(key: Union[str, Sequence[str]]) -> List[str]:
     """ Takes in a keypath and returns a splitted list"""
     if isinstance(key, str):
@@ -293,32 +661,135 @@ def _splitkey(key: Union[str, Sequence[str]]) -> List[str]:
     return key
 
 
-def _keypaths(d):
-    """ Takes in a config dict and returns the keypaths"""
-    def iterdict(d, path):
-        paths = []
-        for k, v in d.items():
-            if isinstance(v, dict):
-                paths += iterdict(v, path + [k])
-            else:
-                _path = path[:]
-                if k not in ("_default", "_type", "_description", "_enumcls", "_min", "_max", "_membertype",):
-                    _path.append(k)
-                _path = '.'.join(_path)
-                if _path not in paths:
-                    paths.append(_path)
-        return paths
-
-    return iterdict(d, [])
-
+def _store(values: Dict[str, Any], keypath: Sequence[str], value: Any) -> None:
+    """Store ``value`` at ``keypath`` in ``values``, in place"""
+    namespace = values
+    for segment in keypath[:-1]:
+        namespace = namespace.setdefault(segment, {})
+    namespace[keypath[-1]] = value
+
+
+def _assoc(
+    values: Mapping[str, Any], keypath: Sequence[str], value: Any
+) -> Tuple[Dict[str, Any], Any]:
+    """Return a copy of ``values`` with ``value`` stored at ``keypath``
+
+    Only the tables along ``keypath`` are copied; all others are shared
+    with ``values``.
+
+    Returns:
+        The new values and the previous value (None if there was none).
+    """
+    result = dict(values)
+    namespace = result
+    for segment in keypath[:-1]:
+        child = namespace.get(segment)
+        child = dict(child) if isinstance(child, dict) else {}
+        namespace[segment] = child
+        namespace = child
+    old = namespace.get(keypath[-1])
+    namespace[keypath[-1]] = value
+    return result, old
+
+
+def _dissoc(
+    values: Mapping[str, Any], keypath: Sequence[str]
+) -> Tuple[Dict[str, Any], Any]:
+    """Return a copy of ``values`` without the value at ``keypath``
+
+    Like `_assoc`, only the tables along ``keypath`` are copied.
+
+    Returns:
+        The new values and the removed value.
+
+    Raises:
+        KeyError: There is no value at ``keypath``
+    """
+    if len(keypath) == 1:
+        result = dict(values)
+        return result, result.pop(keypath[0])
+    child = values[keypath[0]]
+    if not isinstance(child, dict):
+        raise KeyError(keypath[1])
+    child, old = _dissoc(child, keypath[1:])
+    return {**values, keypath[0]: child}, old
+
+
+def _keypaths(
+    d: Mapping[str, Any], path: Tuple[str, ...] = ()
+) -> Iterator[str]:
+    """Yield the keypaths in a values or definitions dict"""
+    for k, v in d.items():
+        if isinstance(v, dict):
+            yield from _keypaths(v, path + (k,))
+        elif k in defkeys:
+            yield ".".join(path)
+        else:
+            yield ".".join(path + (k,))
+
+
+def _definitions(
+    defs: Mapping[str, Any], path: Tuple[str, ...] = ()
+) -> Iterator[Tuple[str, Any]]:
+    """Yield the keypaths in a definitions dict with their entries"""
+    for k, v in defs.items():
+        if isinstance(v, dict):
+            yield from _definitions(v, path + (k,))
+        elif k in defkeys:
+            yield ".".join(path), defs
+        else:
+            yield ".".join(path + (k,)), v
+
+
+def _order_keypaths(keypaths: Iterable[str]) -> List[str]:
+    """Sort keypaths as described in `Configuration.keypaths`"""
+    concrete = []
+    wildcards = []
+    for keypath in sorted(keypaths):
+        (wildcards if "*" in keypath else concrete).append(keypath)
+
+    # Wildcards can only match keypaths with the same first segment
+    sections: Dict[str, List[str]] = {}
+    for keypath in concrete:
+        sections.setdefault(keypath.split(".")[0], []).append(keypath)
+    unused = []
+    for wildcard in wildcards:
+        section = sections.get(wildcard.split(".")[0], [])
+        regex = _keyregex(wildcard)
+        for pos, keypath in enumerate(section):
+            if regex.match(keypath):
+                section.insert(pos, wildcard)
+                break
+        else:
+            unused.append(wildcard)
+
+    # Put the wildcards in front of the keypath they were inserted before
+    preceding: Dict[str, List[str]] = {}
+    for section in sections.values():
+        pending = []
+        for keypath in section:
+            if "*" in keypath:
+                pending.append(keypath)
+            elif pending:
+                preceding[keypath], pending = pending, []
+    ordered = []
+    for keypath in concrete:
+        ordered.extend(preceding.get(keypath, ()))
+        ordered.append(keypath)
+    ordered.extend(unused)
+    return ordered
+
+
+@functools.lru_cache(maxsize=None)
+def _keyregex(pat: str) -> Pattern[str]:
+    return re.compile(pat.replace("*", r"\w*"))
 
 
 def keymatch(pat, against):
     """ Matches a wildcard keypath against a defined one
     i.e. keyboard.*.input.* against keyboard.<some_name>.input.<some_pin> """
 
-    regex = re.sub(re.compile(r'\*', re.I), r'\\w*', pat)
-    return re.match(regex, against) is not None
+    return _keyregex(pat).match(against) is not None
 
 class CustomTomlEncoder(toml.TomlEncoder):
     def __init__(self):
@@ -11,12 +11,22 @@ from psutil import pid_exists
 import pathlib
 import signal
 import sys
+import threading
 import time
-from typing import TYPE_CHECKING, Any, Mapping, Optional, Sequence, List
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
 
 import doorpi
 import doorpi.actions.snapshot
 import doorpi.config
+import doorpi.event
 import doorpi.event.handler
 import doorpi.keyboard
 import doorpi.metadata
@@ -31,6 +41,13 @@ DEADLY_SIGNALS_ABORT = 2
 if __name__ == "__main__":
     raise Exception("use main.py to start DoorPi")
 
+# The parsed configuration (None to keep the current one) and the
+# configured actions of a reload, ready to be applied
+_PreparedReload = Tuple[
+    Optional[doorpi.config.ConfigSnapshot],
+    doorpi.event.handler.PreparedActions,
+]
+
 
 class DoorPi:
     """The main DoorPi class that ties everything together."""
@@ -45,8 +62,12 @@ class DoorPi:
     _base_path: Optional[pathlib.Path]
     __deadlysignals: int
     __last_tick: float
+    __pending_reload: Optional[Tuple[_PreparedReload, threading.Event]]
     __prepared: bool
+    __reload_lock: threading.Lock
+    __reload_requested: bool
     __shutdown: bool
+    __ticker: Optional[doorpi.actions.Action]
 
     @property
     def extra_info(self) -> Mapping[str, Any]:
@@ -120,6 +141,9 @@ class DoorPi:
 
         self.__deadlysignals = 0
         self.__prepared = False
+        self.__pending_reload = None
+        self.__reload_lock = threading.Lock()
+        self.__reload_requested = False
         self.__shutdown = False
 
         self.__last_tick = time.time()
@@ -149,14 +173,126 @@ class DoorPi:
         if self.__deadlysignals >= DEADLY_SIGNALS_ABORT:
             raise Exception("Force-exiting due to signal")
 
+    def signal_reload(self, signum: int, stackframe: Any) -> None:
+        """Handles HUP by reloading the configuration in the background."""
+        del stackframe
+        LOGGER.info(
+            "Caught signal %s, reloading configuration",
+            signal.Signals(signum).name,  # pylint: disable=no-member
+        )
+        self.__reload_requested = True
+
+    def reload(self, source: str = "file") -> List[str]:
+        """Reload the configuration and apply the changed actions
+
+        The configuration is validated completely and the changed
+        actions are instantiated before either replaces the running
+        one.  If a changed action cannot be instantiated, neither the
+        configuration nor any action is changed.
+
+        ``OnConfigReload`` is fired afterwards.  Only its realtime
+        actions, which are reserved for DoorPi's own modules, run before
+        this method returns; configured actions are deferred to the
+        event workers.
+
+        Args:
+            source: ``file`` to re-read the configuration file, or
+                ``memory`` to apply the current in-memory values (e.g.
+                after changing them through the web interface)
+
+        Returns:
+            The events whose configured actions changed.
+
+        Raises:
+            KeyError: The configuration file contains an unknown key
+            TypeError, ValueError: The source is unknown, or the
+                configuration contains an invalid value or action
+            OSError: The configuration file cannot be read
+        """
+        with self.__reload_lock:
+            return self.__apply_reload(self.__prepare_reload(source))
+
+    def __reload_in_background(self) -> None:
+        """Prepare a reload from file and let the main loop apply it
+
+        Parsing the file and instantiating actions takes a while, so
+        only putting the result into effect happens on the tick.
+        """
+        with self.__reload_lock:
+            try:
+                prepared = self.__prepare_reload("file")
+            except (KeyError, OSError, TypeError, ValueError):
+                LOGGER.exception("Cannot reload configuration")
+                return
+            applied = threading.Event()
+            self.__pending_reload = (prepared, applied)
+            # Keep other reloads out until this one was applied
+            while not applied.wait(1.0) and not self.__shutdown:
+                pass
+
+    def __apply_pending_reload(self) -> None:
+        """Apply a reload prepared by `__reload_in_background`"""
+        pending, self.__pending_reload = self.__pending_reload, None
+        if pending is None:
+            return
+        prepared, applied = pending
+        try:
+            self.__apply_reload(prepared)
+        except ValueError:
+            LOGGER.exception("Cannot reload configuration")
+        finally:
+            applied.set()
+
+    def __prepare_reload(self, source: str) -> _PreparedReload:
+        if source not in ("file", "memory"):
+            raise ValueError(f"Unknown configuration source {source!r}")
+        LOGGER.info("Reloading configuration from %s", source)
+        self.dpsd.reloading()
+        try:
+            snapshot = (
+                self.config.parse(self.configfile)
+                if source == "file"
+                else None
+            )
+            # Actions read the new configuration while they are
+            # instantiated
+            with self.config.pinned(snapshot):
+                actions = self.event_handler.prepare_actions(self.config)
+        except BaseException:
+            self.dpsd.ready()
+            raise
+        return snapshot, actions
+
+    def __apply_reload(self, prepared: _PreparedReload) -> List[str]:
+        snapshot, actions = prepared
+        try:
+            changed = self.event_handler.apply_actions(actions)
+            if snapshot is not None:
+                self.config.restore(snapshot)
+        finally:
+            self.dpsd.ready()
+
+        LOGGER.info(
+            "Configuration reloaded, changed actions for %d event(s)%s",
+            len(changed),
+            f": {', '.join(changed)}" if changed else "",
+        )
+        self.event_handler.fire_event_sync(
+            "OnConfigReload",
+            __name__,
+            extra={"changed_events": changed},
+            lane=doorpi.event.Lane.REALTIME,
+        )
+        return changed
+
     def prepare(self) -> None:
         self.dpsd = doorpi.status.systemd.DoorPiSD()
 
-        # setup signal handlers for HUP, INT, TERM
+        # setup signal handlers for INT, TERM and HUP
         handler = self.signal_shutdown
-        signal.signal(signal.SIGHUP, handler)
         signal.signal(signal.SIGINT, handler)
         signal.signal(signal.SIGTERM, handler)
+        signal.signal(signal.SIGHUP, self.signal_reload)
 
         self.event_handler = doorpi.event.handler.EventHandler()
 
@@ -170,15 +306,18 @@ class DoorPi:
             "AfterShutdown",
             "OnTimeTick",
             "OnTimeRapidTick",
+            "OnConfigReload",
         ):
             self.event_handler.register_event(event, __name__)
 
         # register base actions
-        self.event_handler.register_action(
-            "OnTimeTick", f"time_tick:{self.__last_tick}"
+        self.__ticker = doorpi.actions.from_string(
+            f"time_tick:{self.__last_tick}"
         )
         self.event_handler.register_action(
-            "OnTimeSecondOdd", doorpi.actions.CallbackAction(self.check_parent_process)
+            "OnTimeSecondOdd",
+            doorpi.actions.CallbackAction(self.check_parent_process),
+            lane=doorpi.event.Lane.REALTIME,
         )
 
         # init videoserver (and start transcoding to get registered by sipphone)
@@ -225,10 +364,11 @@ class DoorPi:
         waiting_between_checks = 0.5
 
         while timeout > 0 and not self.event_handler.idle:
+            stats = self.event_handler.executor_stats
             LOGGER.debug(
                 "Waiting %s seconds for %d events to finish",
                 timeout,
-                len(self.event_handler.threads),
+                stats["busy"] + stats["queued"],
             )
             LOGGER.trace(
                 "Still existing event threads: %s", self.event_handler.threads
@@ -245,6 +385,8 @@ class DoorPi:
                 self.event_handler.sources[1:],
             )
 
+        self.event_handler.destroy()
+
         # unregister modules
         self.sipphone = self.keyboard = self.webserver = self.videoserver = None  # type: ignore
         self.__prepared = False
@@ -267,6 +409,7 @@ class DoorPi:
         self.event_handler.register_action(
             "OnTimeSecondOdd",
             doorpi.actions.CallbackAction(self.dpsd.watchdog),
+            lane=doorpi.event.Lane.REALTIME,
         )
 
         tickrate = 0.05  # seconds between OnTimeRapidTick events
@@ -274,13 +417,20 @@ class DoorPi:
         last = time.time()
         next_slowtick = 0.0
 
+        # Only realtime actions run inline on the tick, so that
+        # configured actions cannot delay SIP processing
         while not self.__shutdown:
-            self.event_handler.fire_event_sync("OnTimeRapidTick", __name__)
+            self.event_handler.fire_event_sync(
+                "OnTimeRapidTick", __name__, lane=doorpi.event.Lane.REALTIME
+            )
+            self.event_handler.timers.advance()
             next_slowtick -= 1
 
             if next_slowtick <= 0:
                 self.__last_tick = time.time()
-                self.event_handler.fire_event_sync("OnTimeTick", __name__)
+                self.event_handler.fire_event_sync(
+                    "OnTimeTick", __name__, lane=doorpi.event.Lane.REALTIME
+                )
                 next_slowtick = tickrate_slow
 
             now = time.time()
@@ -297,11 +447,11 @@ class DoorPi:
                     )
                     LOGGER.warning(
                         "registered actions for OnTimeRapidTick: %s",
-                        self.event_handler.actions["OnTimeRapidTick"],
+                        self.event_handler.actions.get("OnTimeRapidTick", ()),
                     )
                     LOGGER.warning(
                         "registered actions for OnTimeTick: %s",
-                        self.event_handler.actions["OnTimeTick"],
+                        self.event_handler.actions.get("OnTimeTick", ()),
                     )
                 last += skipped_ticks * tickrate
                 next_slowtick -= skipped_ticks
@@ -309,6 +459,15 @@ class DoorPi:
             last += tickrate
             time.sleep(last - now)
 
+            if self.__reload_requested:
+                self.__reload_requested = False
+                threading.Thread(
+                    target=self.__reload_in_background,
+                    name="DoorPi Reload",
+                    daemon=True,
+                ).start()
+            self.__apply_pending_reload()
+
             if not self.startup_events_fired:
                 # those are sent asynch
                 self.event_handler.fire_event("AfterStartup", __name__)
@@ -1,4 +1,5 @@
 """The event-action system"""
+import enum
 
 
 class AbortEventExecution(Exception):
@@ -8,3 +9,21 @@ class SkipEventExecution(Exception):
     """Skipping executing of next action"""
     def __init__(self, steps):
         self.steps = steps
+
+
+class Lane(enum.IntEnum):
+    """Priority lanes that actions are executed in
+
+    When an event fires, its actions are split up by lane and each lane
+    executes its share of the actions in registration order.  Lanes
+    with a higher priority than the firing context run inline, lanes
+    with a lower priority are deferred to a worker pool, so that slow
+    actions cannot delay time-critical ones.
+    """
+
+    REALTIME = 0
+    "Internal housekeeping that must run with guaranteed latency"
+    NORMAL = 1
+    "Regular actions, including all actions from the configuration"
+    BACKGROUND = 2
+    "Maintenance tasks that may be delayed arbitrarily"
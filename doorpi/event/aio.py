@@ -0,0 +1,155 @@
+"""An asyncio event loop that executes asynchronously fired events"""
+import asyncio
+import concurrent.futures
+import contextvars
+import functools
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List
+
+LOGGER = logging.getLogger(__name__)
+
+
+class AsyncioExecutor:
+    """Runs coroutines on a dedicated asyncio event loop
+
+    This is the counterpart to `OrderedExecutor` for coroutines: Jobs
+    that share a key are executed strictly in submission order, while
+    all other jobs are multiplexed on the loop.  Blocking callables
+    can be offloaded to a thread pool with `run_blocking`.
+    """
+
+    def __init__(self, max_tasks: int, workers: int, *, name: str) -> None:
+        if max_tasks < 1:
+            raise ValueError("Task limit must be positive")
+
+        self.__max_tasks = max_tasks
+        self.__workers = workers
+        self.__lock = threading.Lock()
+        self.__keylocks: Dict[Hashable, asyncio.Lock] = {}
+        self.__active = True
+        self.__tasks = 0
+        self.__busy = 0
+        self.__executed = 0
+        self.__rejected = 0
+
+        self.__blocking = concurrent.futures.ThreadPoolExecutor(
+            workers, thread_name_prefix=f"{name} Blocking"
+        )
+        self.__loop = asyncio.new_event_loop()
+        self.__loop.set_default_executor(self.__blocking)
+        self.__thread = threading.Thread(
+            target=self.__run, name=f"{name} Loop", daemon=True
+        )
+        self.__thread.start()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The event loop that jobs are executed on"""
+        return self.__loop
+
+    @property
+    def threads(self) -> List[threading.Thread]:
+        """The thread running the event loop"""
+        return [self.__thread]
+
+    @property
+    def idle(self) -> bool:
+        """Whether no job is currently queued or executing"""
+        with self.__lock:
+            return not self.__tasks
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Number of waiting and running jobs"""
+        with self.__lock:
+            return {
+                "workers": self.__workers,
+                "busy": self.__busy,
+                "queued": self.__tasks - self.__busy,
+                "queue_size": self.__max_tasks,
+                "executed": self.__executed,
+                "rejected": self.__rejected,
+            }
+
+    def submit(
+        self,
+        key: Hashable,
+        func: Callable[..., Awaitable[Any]],
+        *args: Any,
+        **kw: Any,
+    ) -> bool:
+        """Schedule the coroutine ``func(*args, **kw)`` on the loop
+
+        Returns:
+            False if the executor is shut down or the maximum number of
+            pending jobs is reached, in which case the job was
+            discarded; True otherwise.
+        """
+        with self.__lock:
+            if not self.__active:
+                return False
+            if self.__tasks >= self.__max_tasks:
+                self.__rejected += 1
+                return False
+            self.__tasks += 1
+        asyncio.run_coroutine_threadsafe(
+            self.__job(key, func, args, kw), self.__loop
+        )
+        return True
+
+    async def run_blocking(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking callable in the thread pool and await it
+
+        The callable runs in a copy of the calling task's context.
+        """
+        return await self.__loop.run_in_executor(
+            self.__blocking,
+            functools.partial(contextvars.copy_context().run, func, *args),
+        )
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Stop accepting jobs and wait for pending ones to finish"""
+        with self.__lock:
+            if not self.__active:
+                return
+            self.__active = False
+        deadline = time.monotonic() + timeout
+        while not self.idle and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self.__loop.call_soon_threadsafe(self.__loop.stop)
+        if self.__thread is not threading.current_thread():
+            self.__thread.join(max(0.0, deadline - time.monotonic()))
+        self.__blocking.shutdown(wait=False)
+
+    def __run(self) -> None:
+        asyncio.set_event_loop(self.__loop)
+        try:
+            self.__loop.run_forever()
+        finally:
+            self.__loop.close()
+
+    async def __job(
+        self,
+        key: Hashable,
+        func: Callable[..., Awaitable[Any]],
+        args: Any,
+        kw: Dict[str, Any],
+    ) -> None:
+        keylock = self.__keylocks.setdefault(key, asyncio.Lock())
+        try:
+            async with keylock:
+                with self.__lock:
+                    self.__busy += 1
+                try:
+                    await func(*args, **kw)
+                except Exception:  # pylint: disable=broad-except
+                    LOGGER.exception("Uncaught exception in job for %s", key)
+                finally:
+                    with self.__lock:
+                        self.__busy -= 1
+        finally:
+            with self.__lock:
+                self.__tasks -= 1
+                self.__executed += 1
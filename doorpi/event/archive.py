@@ -0,0 +1,166 @@
+"""Daily partitions of the event log in compressed files"""
+import datetime
+import gzip
+import json
+import logging
+import os
+import pathlib
+import zlib
+from typing import (
+    Any,
+    Dict,
+    IO,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Set,
+)
+
+LOGGER = logging.getLogger(__name__)
+
+_PREFIX = "events-"
+_SUFFIX = ".jsonl.gz"
+
+
+def day_start(timestamp: float) -> float:
+    """The timestamp of the local midnight before ``timestamp``"""
+    day = datetime.date.fromtimestamp(timestamp)
+    return datetime.datetime.combine(day, datetime.time()).timestamp()
+
+
+def next_day_start(timestamp: float) -> float:
+    """The timestamp of the local midnight after ``timestamp``"""
+    day = datetime.date.fromtimestamp(timestamp) + datetime.timedelta(days=1)
+    return datetime.datetime.combine(day, datetime.time()).timestamp()
+
+
+class EventArchive:
+    """Archived events, one gzip-compressed JSON lines file per day
+
+    Each line holds one event as returned by `EventLog.get_event_log`.
+    Files are named after the local date of the events they contain,
+    so that queries only need to open the files of the requested time
+    range.  Each append writes a complete gzip member, so that a file
+    stays readable if the process is killed at any time.  Once a day
+    is over, `compact` rewrites its file as a single member.
+    """
+
+    def __init__(self, directory: pathlib.Path) -> None:
+        self.__dir = pathlib.Path(directory)
+        # Days appended to since they were last compacted
+        self.__appended: Set[datetime.date] = set()
+
+    @property
+    def directory(self) -> pathlib.Path:
+        """The directory containing the archive files"""
+        return self.__dir
+
+    def days(self) -> List[datetime.date]:
+        """The dates for which archived events exist, oldest first"""
+        days = []
+        for path in self.__dir.glob(f"{_PREFIX}*{_SUFFIX}"):
+            try:
+                days.append(
+                    datetime.date.fromisoformat(
+                        path.name[len(_PREFIX) : -len(_SUFFIX)]
+                    )
+                )
+            except ValueError:
+                continue
+        return sorted(days)
+
+    def append(self, entries: Iterable[Mapping[str, Any]]) -> int:
+        """Append events to the files of their respective days
+
+        Returns:
+            The number of archived events.
+        """
+        files: Dict[datetime.date, IO[str]] = {}
+        count = 0
+        try:
+            for entry in entries:
+                day = datetime.date.fromtimestamp(entry["start_time"])
+                file = files.get(day)
+                if file is None:
+                    self.__dir.mkdir(parents=True, exist_ok=True)
+                    file = files[day] = gzip.open(
+                        self.__path(day), "at", encoding="utf-8"
+                    )
+                    self.__appended.add(day)
+                file.write(json.dumps(dict(entry)) + "\n")
+                count += 1
+        finally:
+            for file in files.values():
+                file.close()
+        return count
+
+    def compact(self, before: datetime.date) -> None:
+        """Rewrite the files appended to before ``before`` as one member
+
+        Files that cannot be read completely are left as they are.
+
+        Raises:
+            OSError: If a file could not be rewritten
+        """
+        for day in sorted(d for d in self.__appended if d < before):
+            path = self.__path(day)
+            try:
+                with gzip.open(path, "rb") as file:
+                    data = file.read()
+            except (OSError, EOFError, zlib.error) as err:
+                LOGGER.warning("Cannot compact event archive %s: %s", day, err)
+                self.__appended.discard(day)
+                continue
+            temp = path.with_name(f".{path.name}.tmp")
+            try:
+                with gzip.open(temp, "wb") as file:
+                    file.write(data)
+                os.replace(temp, path)
+            finally:
+                temp.unlink(missing_ok=True)
+            self.__appended.discard(day)
+
+    def read(
+        self, since: Optional[float] = None, until: Optional[float] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Iterate over archived events, newest first
+
+        Args:
+            since: Only return events fired at or after this timestamp
+            until: Only return events fired before this timestamp
+        """
+        first = (
+            datetime.date.fromtimestamp(since) if since is not None else None
+        )
+        last = (
+            datetime.date.fromtimestamp(until) if until is not None else None
+        )
+        for day in reversed(self.days()):
+            if last is not None and day > last:
+                continue
+            if first is not None and day < first:
+                break
+            entries = [
+                entry
+                for entry in self.__load(day)
+                if (since is None or entry["start_time"] >= since)
+                and (until is None or entry["start_time"] < until)
+            ]
+            entries.sort(key=lambda e: e["start_time"], reverse=True)
+            yield from entries
+
+    def __path(self, day: datetime.date) -> pathlib.Path:
+        return self.__dir / f"{_PREFIX}{day.isoformat()}{_SUFFIX}"
+
+    def __load(self, day: datetime.date) -> List[Dict[str, Any]]:
+        entries = []
+        try:
+            with gzip.open(self.__path(day), "rt", encoding="utf-8") as file:
+                for line in file:
+                    entries.append(json.loads(line))
+        except (OSError, EOFError, ValueError, zlib.error) as err:
+            # Keep what could be read, e.g. if the last write was cut off
+            LOGGER.warning("Cannot read event archive for %s: %s", day, err)
+        return entries
@@ -0,0 +1,139 @@
+"""Collapsing of bursts of identical events"""
+import fnmatch
+import re
+import threading
+import time
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Pattern,
+    Tuple,
+)
+
+
+class _Window:
+    __slots__ = ("opened", "dropped", "last", "timer")
+
+    def __init__(self, opened: float) -> None:
+        self.opened = opened
+        self.dropped = 0
+        self.last: Any = None
+        self.timer: Optional[threading.Timer] = None
+
+
+class Coalescer:
+    """Collapses repeated firings of an event within a time window
+
+    Each event name is assigned the window of the first pattern that
+    matches it.  The first firing of an event from a source opens a
+    window; further firings from the same source are dropped until
+    the window has passed.  When a window closes after firings were
+    dropped, ``flush`` is called with the last dropped firing and the
+    number of dropped firings.  This trailing firing opens the next
+    window, so that a continuous burst results in one firing per
+    window.
+    """
+
+    def __init__(
+        self,
+        windows: Mapping[str, float],
+        flush: Optional[Callable[[Any, int], None]] = None,
+    ) -> None:
+        self.__patterns: List[Tuple[Pattern[str], float]] = [
+            (re.compile(fnmatch.translate(pattern)), window)
+            for pattern, window in windows.items()
+            if window > 0
+        ]
+        self.__flush = flush
+        self.__windows: Dict[str, float] = {}
+        self.__state: Dict[Tuple[str, str], _Window] = {}
+        self.__dropped: Dict[str, int] = {}
+        self.__lock = threading.Lock()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Number of dropped firings per event"""
+        with self.__lock:
+            return dict(self.__dropped)
+
+    def window(self, event: str) -> float:
+        """The coalescing window for ``event`` (0 if not coalesced)"""
+        try:
+            return self.__windows[event]
+        except KeyError:
+            pass
+        window = next(
+            (w for regex, w in self.__patterns if regex.match(event)), 0.0
+        )
+        self.__windows[event] = window
+        return window
+
+    def admit(
+        self,
+        event: str,
+        source: str,
+        firing: Any = None,
+        *,
+        window: Optional[float] = None,
+    ) -> Optional[int]:
+        """Decide whether a firing of ``event`` should be executed
+
+        Args:
+            firing: Passed to ``flush`` if this is the last firing
+                dropped within the window.
+            window: Overrides the window configured for ``event``
+
+        Returns:
+            None if the firing is to be dropped, otherwise the number
+            of firings that were dropped since the last executed one.
+        """
+        if window is None:
+            window = self.window(event)
+        if not window:
+            return 0
+
+        now = time.monotonic()
+        with self.__lock:
+            state = self.__state.get((event, source))
+            if state is not None and now - state.opened < window:
+                state.dropped += 1
+                state.last = firing
+                self.__dropped[event] = self.__dropped.get(event, 0) + 1
+                if state.timer is None and self.__flush is not None:
+                    state.timer = threading.Timer(
+                        state.opened + window - now,
+                        self.__expire,
+                        (event, source, state),
+                    )
+                    state.timer.daemon = True
+                    state.timer.start()
+                return None
+            # The window has passed, but its timer has not flushed yet:
+            # This firing takes the place of the trailing one.
+            dropped = 0
+            if state is not None:
+                dropped = state.dropped
+                if state.timer is not None:
+                    state.timer.cancel()
+            self.__state[event, source] = _Window(now)
+            return dropped
+
+    def shutdown(self) -> None:
+        """Discard all pending trailing firings"""
+        with self.__lock:
+            for state in self.__state.values():
+                if state.timer is not None:
+                    state.timer.cancel()
+            self.__state.clear()
+
+    def __expire(self, event: str, source: str, state: _Window) -> None:
+        with self.__lock:
+            if self.__state.get((event, source)) is not state:
+                return
+            self.__state[event, source] = _Window(time.monotonic())
+        if self.__flush is not None:
+            self.__flush(state.last, state.dropped)
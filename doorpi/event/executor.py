@@ -0,0 +1,142 @@
+"""A bounded worker pool that executes asynchronously fired events"""
+import collections
+import logging
+import threading
+import time
+from typing import Any, Callable, Deque, Dict, Hashable, List, Tuple
+
+LOGGER = logging.getLogger(__name__)
+
+Job = Tuple[Callable[..., Any], Tuple[Any, ...], Dict[str, Any]]
+
+
+class OrderedExecutor:
+    """A fixed-size pool of worker threads with a bounded job queue
+
+    Every job is submitted together with a key.  Jobs that share a key
+    are executed strictly in the order they were submitted and never
+    concurrently; jobs with different keys are distributed over all
+    available workers.
+    """
+
+    def __init__(self, workers: int, queue_size: int, *, name: str) -> None:
+        if workers < 1:
+            raise ValueError("Need at least one worker thread")
+        if queue_size < 1:
+            raise ValueError("Queue size must be positive")
+
+        self.__queue_size = queue_size
+        self.__cond = threading.Condition()
+        self.__pending: Dict[Hashable, Deque[Job]] = {}
+        self.__ready: Deque[Hashable] = collections.deque()
+        self.__active = True
+        self.__queued = 0
+        self.__busy = 0
+        self.__busy_time = 0.0
+        self.__executed = 0
+        self.__rejected = 0
+        self.__started = time.monotonic()
+
+        self.__threads = [
+            threading.Thread(
+                target=self.__work, name=f"{name} Worker-{i}", daemon=True
+            )
+            for i in range(workers)
+        ]
+        for thread in self.__threads:
+            thread.start()
+
+    @property
+    def threads(self) -> List[threading.Thread]:
+        """The worker threads of this pool"""
+        return list(self.__threads)
+
+    @property
+    def idle(self) -> bool:
+        """Whether no job is currently queued or executing"""
+        with self.__cond:
+            return not (self.__queued or self.__busy)
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and worker utilisation of this pool"""
+        with self.__cond:
+            elapsed = time.monotonic() - self.__started
+            return {
+                "workers": len(self.__threads),
+                "busy": self.__busy,
+                "queued": self.__queued,
+                "queue_size": self.__queue_size,
+                "executed": self.__executed,
+                "rejected": self.__rejected,
+                "utilisation": (
+                    self.__busy_time / (elapsed * len(self.__threads))
+                    if elapsed > 0
+                    else 0.0
+                ),
+            }
+
+    def submit(
+        self, key: Hashable, func: Callable[..., Any], *args: Any, **kw: Any
+    ) -> bool:
+        """Queue ``func(*args, **kw)`` for execution
+
+        Returns:
+            False if the pool is shut down or its queue is full, in
+            which case the job was discarded; True otherwise.
+        """
+        with self.__cond:
+            if not self.__active:
+                return False
+            if self.__queued >= self.__queue_size:
+                self.__rejected += 1
+                return False
+
+            self.__queued += 1
+            if key in self.__pending:
+                # A worker already owns this key and will pick the job up
+                self.__pending[key].append((func, args, kw))
+            else:
+                self.__pending[key] = collections.deque(((func, args, kw),))
+                self.__ready.append(key)
+                self.__cond.notify()
+            return True
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Stop accepting jobs and wait for queued ones to finish"""
+        with self.__cond:
+            self.__active = False
+            self.__cond.notify_all()
+        deadline = time.monotonic() + timeout
+        for thread in self.__threads:
+            if thread is not threading.current_thread():
+                thread.join(max(0.0, deadline - time.monotonic()))
+
+    def __work(self) -> None:
+        while True:
+            with self.__cond:
+                while not self.__ready:
+                    if not self.__active:
+                        return
+                    self.__cond.wait()
+                key = self.__ready.popleft()
+                func, args, kw = self.__pending[key].popleft()
+                self.__queued -= 1
+                self.__busy += 1
+
+            start = time.monotonic()
+            try:
+                func(*args, **kw)
+            except Exception:  # pylint: disable=broad-except
+                LOGGER.exception("Uncaught exception in job for %s", key)
+
+            with self.__cond:
+                self.__busy -= 1
+                self.__busy_time += time.monotonic() - start
+                self.__executed += 1
+                if self.__pending[key]:
+                    # Re-queue at the end, so that other keys get a turn
+                    self.__ready.append(key)
+                    self.__cond.notify()
+                else:
+                    del self.__pending[key]
@@ -1,7 +1,9 @@
-import collections
+import fnmatch
 import itertools
 import logging
+import pathlib
 import random
+import re
 import string
 import threading
 import time
@@ -9,9 +11,13 @@ from typing import (
     Any,
     Callable,
     Dict,
+    FrozenSet,
+    Iterable,
     List,
     Mapping,
+    NamedTuple,
     Optional,
+    Sequence,
     Set,
     Tuple,
     Union,
@@ -21,14 +27,43 @@ import doorpi.actions
 import doorpi.event
 
 #skip eventDB logging 
-from . import log
+from . import log, trace
 #from . import logFake as log
+from .aio import AsyncioExecutor
+from .coalesce import Coalescer
+from .executor import OrderedExecutor
+from .histogram import LatencyRecorder
+from .pattern import PatternIndex, from_glob, is_pattern, to_glob
+from .timer import TimerWheel
+from .watchdog import ActionTimeoutError, ActionWatchdog
 from doorpi.actions import CallbackAction
 
 LOGGER: doorpi.DoorPiLogger = logging.getLogger(__name__)  # type: ignore
 
 ActionCallable = Callable[[str, Mapping[str, Any]], Any]
 RegistrableAction = Union[str, "doorpi.actions.Action", ActionCallable]
+# One tuple of actions per lane, indexed by the lane's value
+LaneChains = Tuple[Tuple[ActionCallable, ...], ...]
+DispatchTable = Mapping[Tuple[str, str], LaneChains]
+ConfigSource = Union[
+    "doorpi.config.Configuration", "doorpi.config.ConfigSnapshot"
+]
+
+
+class PreparedActions(NamedTuple):
+    """Configured actions instantiated by `EventHandler.prepare_actions`
+
+    Attributes:
+        base: The configured action strings they were compared with
+        configured: The configured action strings per event
+        changed: The events whose configured actions changed
+        actions: The new actions of the changed events
+    """
+
+    base: Mapping[str, Tuple[str, ...]]
+    configured: Dict[str, Tuple[str, ...]]
+    changed: List[str]
+    actions: Dict[str, Tuple[ActionCallable, ...]]
 
 
 def generate_id() -> str:
@@ -39,47 +74,148 @@ def generate_id() -> str:
 
 
 class EventHandler:
-    """The event handler and action dispatcher."""
+    """The event handler and action dispatcher.
+
+    All registrations are copy-on-write: ``actions``, ``events`` and
+    ``sources`` are never modified in place, but replaced as a whole
+    while holding the registration lock.  Each change also publishes a
+    new dispatch table, which maps every valid ``(event, source)`` pair
+    to the actions to execute, grouped by their ``Lane``.  Firing an
+    event therefore only needs a single, lock-free dictionary lookup,
+    and actions that are (un)registered while an event executes do not
+    affect that event.  In the same way, all actions of an event read
+    the configuration snapshot that was current when it fired, also
+    in lanes that are deferred to other workers.
+    """
 
-    actions: Dict[str, List[ActionCallable]]
-    events: Dict[str, Set[str]]
+    actions: Dict[str, Tuple[ActionCallable, ...]]
+    events: Dict[str, FrozenSet[str]]
     extra_info: Dict[str, Any]
     sources: List[str]
+    timers: TimerWheel
 
+    __action_latency: LatencyRecorder
     __active: bool
+    __aio: Optional[AsyncioExecutor]
+    __coalescer: Coalescer
+    __config: "doorpi.config.Configuration"
+    __configured: Dict[str, Tuple[str, ...]]
+    __configured_actions: Dict[str, Tuple[ActionCallable, ...]]
+    __deadlines: Dict[doorpi.event.Lane, float]
+    __dispatch: DispatchTable
+    __event_latency: LatencyRecorder
+    __executor: Union[OrderedExecutor, AsyncioExecutor]
+    __lane_executors: Dict[
+        doorpi.event.Lane, Union[OrderedExecutor, AsyncioExecutor]
+    ]
+    __lane_stats: Dict[doorpi.event.Lane, Dict[str, Any]]
+    __lanes: Dict[str, Tuple[doorpi.event.Lane, ...]]
+    __lock: threading.RLock
+    __overrun_logged: Dict[doorpi.event.Lane, float]
+    __patterns: PatternIndex
+    __stats_lock: threading.Lock
+    __watchdog: ActionWatchdog
 
     def __init__(self) -> None:
-        conf = doorpi.INSTANCE.config
+        conf = self.__config = doorpi.INSTANCE.config
         db_path = conf["eventlog"]
-        self.log = log.EventLog(db_path)
+        archive = None
+        if conf["event_handler.log.archive.enabled"]:
+            archive = pathlib.Path(
+                doorpi.INSTANCE.base_path,
+                conf["event_handler.log.archive.directory"],
+            )
+        self.log = log.EventLog(
+            db_path,
+            max_entries=conf["event_handler.log.max_entries"],
+            max_actions=conf["event_handler.log.max_actions"],
+            batch_size=conf["event_handler.log.batch_size"],
+            flush_interval=conf["event_handler.log.flush_interval"],
+            queue_size=conf["event_handler.log.queue_size"],
+            archive=archive,
+        )
 
-        self.actions = collections.defaultdict(list)
-        self.events = collections.defaultdict(set)
+        self.actions = {}
+        self.events = {}
         self.extra_info = {"LastKey": "NotSetYet", "event": {}}
         self.sources = []
+        self.timers = TimerWheel()
         self.__active = True
+        self.__dispatch = {}
+        self.__lanes = {}
+        self.__patterns = PatternIndex()
+        self.__lock = threading.RLock()
+        if conf["event_handler.asyncio.enabled"]:
+            self.__aio = AsyncioExecutor(
+                conf["event_handler.asyncio.max_tasks"],
+                conf["event_handler.workers"],
+                name="DoorPi Event",
+            )
+            self.__executor = self.__aio
+        else:
+            self.__aio = None
+            self.__executor = OrderedExecutor(
+                conf["event_handler.workers"],
+                conf["event_handler.queue_size"],
+                name="DoorPi Event",
+            )
+        self.__lane_executors = {
+            doorpi.event.Lane.NORMAL: self.__executor,
+            doorpi.event.Lane.BACKGROUND: OrderedExecutor(
+                conf["event_handler.background_workers"],
+                conf["event_handler.queue_size"],
+                name="DoorPi Event Background",
+            ),
+        }
+        self.__deadlines = {
+            lane: conf[f"event_handler.deadline.{lane.name.lower()}"]
+            for lane in doorpi.event.Lane
+        }
+        self.__lane_stats = {
+            lane: {"executed": 0, "overruns": 0, "max_latency": 0.0}
+            for lane in doorpi.event.Lane
+        }
+        self.__overrun_logged = {}
+        self.__stats_lock = threading.Lock()
+        self.__event_latency = LatencyRecorder()
+        self.__action_latency = LatencyRecorder()
+        self.__coalescer = Coalescer(
+            conf.view("event_handler.coalesce"), self.__fire_coalesced
+        )
+        if conf["trace.enabled"]:
+            trace.configure(
+                pathlib.Path(doorpi.INSTANCE.base_path, conf["trace.file"]),
+                sample_rate=conf["trace.sample_rate"],
+                max_bytes=conf["trace.max_size"] * 1024,
+                backups=conf["trace.backups"],
+                exclude=conf["trace.exclude"],
+            )
+        self.__watchdog = ActionWatchdog(
+            conf["event_handler.action_timeout"],
+            conf.view("event_handler.action_timeouts"),
+            conf["event_handler.workers"],
+            name="DoorPi Event",
+        )
+
+        # register eventbased, DTMF and keyboard actions from configfile
+        self.__configured = {}
+        self.__configured_actions = {}
+        self.reload_actions(conf)
 
-        # register eventbased actions from configfile
-        for event, actions in conf.view("events").items():
-            LOGGER.info("Registering configured actions for %s", event)
-            for action in actions:
-                LOGGER.debug("Registering action %s", repr(action))
-                self.register_action(event, action)
-
-        # register configured DTMF actions
-        LOGGER.info("Registering DTMF actions")
-        for seq, actions in conf.view("sipphone.dtmf").items():
-            for action in actions:
-                LOGGER.debug("Registering action %r for DTMF %r", action, seq)
-                self.register_action(f"OnDTMF_{seq}", action)
-        
         # register eventlog cleanup
         ac_clean = CallbackAction(self.log.clean)
-        self.register_action("OnTimeHour", ac_clean)
+        self.register_action(
+            "OnTimeHour", ac_clean, lane=doorpi.event.Lane.BACKGROUND
+        )
 
     def destroy(self) -> None:
         """Shut down the event handler"""
         self.__active = False
+        self.__coalescer.shutdown()
+        for executor in self.__lane_executors.values():
+            executor.shutdown()
+        self.__watchdog.shutdown()
+        trace.configure(None)
         self.log.destroy()
 
     @property
@@ -90,35 +226,84 @@ class EventHandler:
     def threads(self) -> List[threading.Thread]:
         """List event threads managed by the handler"""
         return [
-            t
-            for t in threading.enumerate()
-            if t.name.startswith("DoorPi Event")
+            thread
+            for executor in self.__lane_executors.values()
+            for thread in executor.threads
         ]
 
+    @property
+    def executor_stats(self) -> Dict[str, Any]:
+        """Queue depth and utilisation of the event worker pool or loop"""
+        return self.__executor.stats
+
+    @property
+    def lane_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Execution counts and deadline overruns per lane"""
+        with self.__stats_lock:
+            return {
+                lane.name.lower(): {
+                    **self.__lane_stats[lane],
+                    "deadline": self.__deadlines[lane],
+                }
+                for lane in doorpi.event.Lane
+            }
+
+    @property
+    def latency(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Latency percentiles and error counts per event and action"""
+        return {
+            "events": self.__event_latency.snapshot(),
+            "actions": self.__action_latency.snapshot(),
+        }
+
+    @property
+    def timeouts(self) -> Dict[str, Any]:
+        """Number of actions that exceeded their timeout"""
+        return self.__watchdog.stats
+
+    @property
+    def coalesced(self) -> Dict[str, int]:
+        """Number of firings dropped by coalescing, per event"""
+        return self.__coalescer.stats
+
     @property
     def idle(self) -> bool:
         """Return whether the handler is currently idle"""
-        return not self.threads
+        return all(ex.idle for ex in self.__lane_executors.values())
+
+    def is_subscribed(self, event: str, source: str) -> bool:
+        """Whether firing ``event`` from ``source`` would execute actions"""
+        return any(self.__dispatch.get((event, source), ()))
 
     def get_events_by_source(self, source: str) -> Set[str]:
         """Group all known events by the sources that can fire them"""
-        return {ev for ev in self.events if source in self.events[ev]}
+        return {ev for ev, sources in self.events.items() if source in sources}
 
     def register_source(self, source: str) -> None:
         """Register a new event source"""
-        if source not in self.sources:
-            self.sources.append(source)
-            LOGGER.debug("Added event source %s", source)
+        with self.__lock:
+            if source not in self.sources:
+                self.sources = self.sources + [source]
+                LOGGER.debug("Added event source %s", source)
 
     def register_event(self, event: str, source: str) -> None:
-        """Register an event to be fired from the named event source"""
+        """Register an event to be fired from the named event source
+
+        Raises:
+            ValueError: ``event`` is a pattern subscription name
+        """
+        if is_pattern(event):
+            raise ValueError(f"Cannot register pattern {event} as event")
         suppress_logs = _suppress_logs(event)
         if not suppress_logs:
             LOGGER.debug("Registering event %s with source %s", event, source)
-        self.register_source(source)
-
-        if source not in self.events[event]:
-            self.events[event].add(source)
+        with self.__lock:
+            self.register_source(source)
+            sources = self.events.get(event, frozenset())
+            if source not in sources:
+                self.events = {**self.events, event: sources | {source}}
+                self.__recompile(event)
+        if source not in sources:
             if not suppress_logs:
                 LOGGER.debug(
                     "Registered source %s for event %s", source, event
@@ -133,50 +318,253 @@ class EventHandler:
     def fire_event(
         self, event: str, source: str, *, extra: Dict[str, Any] = None
     ) -> None:
-        """Fire an event asynchronously"""
+        """Fire an event asynchronously
+
+        The event is queued for execution by the worker pool, or by the
+        event loop if asyncio mode is enabled. Events with the same
+        name are executed in the order they were fired.
+
+        If a coalescing window is configured for the event, repeated
+        firings within the window are dropped.  When the window closes,
+        the last dropped firing is executed with ``coalesced_count``
+        set to the number of dropped firings in its ``extra`` dict.
+        """
+        self.fire_event_group((event,), source, extra=extra)
+
+    def fire_event_group(
+        self,
+        events: Sequence[str],
+        source: str,
+        *,
+        extra: Dict[str, Any] = None,
+    ) -> None:
+        """Fire several aliases of the same occurrence asynchronously
+
+        This behaves like firing each of ``events`` in turn, except that
+        the occurrence is validated, logged and assigned an event ID
+        only once, and the union of the actions registered for all
+        names is executed in a single dispatch. Actions registered for
+        more than one of the names are only executed once. Aborting or
+        skipping actions is confined to the actions of the name that
+        the raising action was registered for.
+
+        The names must be ordered from the most generic to the most
+        specific one. The first name is used for logging and latency
+        statistics. Firings are ordered and coalesced by the last name,
+        with the longest coalescing window configured for any of the
+        names. Names that are not registered for ``source`` are
+        ignored, unless none of them is.
+        """
         if not self.__active:
             return
-        threading.Thread(
-            target=self.fire_event_sync,
-            args=(event, source),
-            kwargs={"extra": extra},
-            name=f"DoorPi Event {event} from {source}",
-        ).start()
+        events = tuple(events)
+        coalesced = self.__coalescer.admit(
+            events[-1],
+            source,
+            (events, source, extra),
+            window=max(map(self.__coalescer.window, events)),
+        )
+        if coalesced is None:
+            return
+        self.__submit_event(events, source, extra, coalesced)
+
+    def __fire_coalesced(
+        self,
+        firing: Tuple[Tuple[str, ...], str, Optional[Dict[str, Any]]],
+        coalesced: int,
+    ) -> None:
+        if self.__active:
+            self.__submit_event(*firing, coalesced)
+
+    def __submit_event(
+        self,
+        events: Tuple[str, ...],
+        source: str,
+        extra: Optional[Dict[str, Any]],
+        coalesced: int,
+    ) -> None:
+        if coalesced:
+            extra = {**(extra or {}), "coalesced_count": coalesced}
+        if self.__aio is not None:
+            accepted = self.__aio.submit(
+                events[-1],
+                trace.bind(self.__fire_event_async),
+                events,
+                source,
+                extra=extra,
+            )
+        else:
+            accepted = self.__executor.submit(
+                events[-1],
+                trace.bind(self.fire_event_group_sync),
+                events,
+                source,
+                extra=extra,
+            )
+        if not accepted:
+            LOGGER.error(
+                "Event queue is full, dropping %s from %s", events[0], source
+            )
 
     def fire_event_sync(
-        self, event: str, source: str, *, extra: Dict[str, Any] = None
+        self,
+        event: str,
+        source: str,
+        *,
+        extra: Dict[str, Any] = None,
+        lane: doorpi.event.Lane = doorpi.event.Lane.NORMAL,
+    ) -> None:
+        """Fire an event synchronously
+
+        Args:
+            lane: The lane of the calling context. Actions in this and
+                more important lanes are executed before returning,
+                actions in less important lanes are deferred to the
+                respective worker pool.
+        """
+        self.fire_event_group_sync((event,), source, extra=extra, lane=lane)
+
+    def fire_event_group_sync(
+        self,
+        events: Sequence[str],
+        source: str,
+        *,
+        extra: Dict[str, Any] = None,
+        lane: doorpi.event.Lane = doorpi.event.Lane.NORMAL,
     ) -> None:
-        """Fire an event synchronously"""
+        """Fire several aliases of the same occurrence synchronously
+
+        See `fire_event_group` and `fire_event_sync`.
+        """
         if not self.__active:
             return
+        events = tuple(events)
+        event = events[0]
+        prepared = self.__prepare_event(events, source, extra)
+        if prepared is None:
+            return
+        chains, owners, event_id, extra, start_time = prepared
+
+        failed = False
+        with trace.span(
+            "event", event, span_id=event_id, source=source, **_aliases(events)
+        ), self.__config.pinned(self.__config.snapshot()):
+            for chain_lane, chain in zip(doorpi.event.Lane, chains):
+                if not chain:
+                    continue
+                if chain_lane <= lane:
+                    failed |= self.__execute_chain(
+                        event,
+                        event_id,
+                        extra,
+                        chain_lane,
+                        chain,
+                        start_time,
+                        owners,
+                    )
+                else:
+                    self.__defer_chain(
+                        event,
+                        event_id,
+                        extra,
+                        chain_lane,
+                        chain,
+                        start_time,
+                        owners,
+                    )
+
+        self.__finish_event(event, event_id, start_time, failed)
+
+    async def __fire_event_async(
+        self,
+        events: Tuple[str, ...],
+        source: str,
+        *,
+        extra: Dict[str, Any] = None,
+    ) -> None:
+        """Fire an event on the event loop (asyncio mode only)
+
+        Realtime and normal actions are executed on the loop, while
+        background actions are deferred to their worker pool.
+        """
+        if not self.__active:
+            return
+        event = events[0]
+        prepared = self.__prepare_event(events, source, extra)
+        if prepared is None:
+            return
+        chains, owners, event_id, extra, start_time = prepared
+
+        failed = False
+        with trace.span(
+            "event", event, span_id=event_id, source=source, **_aliases(events)
+        ), self.__config.pinned(self.__config.snapshot()):
+            for chain_lane, chain in zip(doorpi.event.Lane, chains):
+                if not chain:
+                    continue
+                if chain_lane <= doorpi.event.Lane.NORMAL:
+                    failed |= await self.__execute_chain_async(
+                        event,
+                        event_id,
+                        extra,
+                        chain_lane,
+                        chain,
+                        start_time,
+                        owners,
+                    )
+                else:
+                    self.__defer_chain(
+                        event,
+                        event_id,
+                        extra,
+                        chain_lane,
+                        chain,
+                        start_time,
+                        owners,
+                    )
+
+        self.__finish_event(event, event_id, start_time, failed)
+
+    def __prepare_event(
+        self,
+        events: Tuple[str, ...],
+        source: str,
+        extra: Optional[Dict[str, Any]],
+    ) -> Optional[
+        Tuple[LaneChains, Mapping[int, str], str, Dict[str, Any], float]
+    ]:
+        """Validate and log a fired event
+
+        Returns:
+            None if the event is not to be executed, otherwise the
+            actions to execute, the names they were found under (see
+            `__merge_chains`), the event ID, the updated extra dict and
+            the start time.
+        """
+        event = events[0]
+        owners: Mapping[int, str] = {}
+        if len(events) == 1:
+            chains = self.__dispatch.get((event, source))
+        else:
+            merged = self.__merge_chains(events, source)
+            chains = None if merged is None else merged[0]
+            if merged is not None:
+                owners = merged[1]
+        if chains is None:
+            self.__warn_undeliverable(event, source)
+            return None
 
         if extra is None:
             extra = {}
         suppress_logs = _suppress_logs(event)
-        
-        if source not in self.sources:
-            LOGGER.warning(
-                "Unknown event source %s, skipping %s", source, event
-            )
-            return
-        if event not in self.events:
-            LOGGER.warning(
-                "Unknown event %s (from source %s), skipping", event, source
-            )
-            return
-        if source not in self.events[event]:
-            LOGGER.warning(
-                "Source %s not registered for %s, skipping", source, event
-            )
-            return
 
         skipLater = False
-        if event not in self.actions:
+        if not any(chains):
             if not suppress_logs:
                 LOGGER.debug("No actions registered for %s, skipping", event)
             # for webevents, make sure to skip after log_event only
             if source != "doorpi.web":
-                return
+                return None
             else:
                 skipLater = True
 
@@ -186,7 +574,7 @@ class EventHandler:
         if not suppress_logs:
             self.log.log_event(event_id, source, event, start_time, extra)
         if skipLater:
-            return
+            return None
         
         extra.update(
             {
@@ -202,62 +590,426 @@ class EventHandler:
         for key in ["last_finished", "last_duration"]:
             extra[key] = last_info.get(key, None)
         extra["prev_fired_dt"] = last_info.get("last_fired_dt", None)
-        self.extra_info[event] = extra
+        for name in events:
+            self.extra_info[name] = extra
 
         if not suppress_logs:
             LOGGER.debug(
                 "[%s] Executing %d action(s) for %s",
                 event_id,
-                len(self.actions[event]),
+                sum(map(len, chains)),
+                event,
+            )
+        return chains, owners, event_id, extra, start_time
+
+    def __merge_chains(
+        self, events: Tuple[str, ...], source: str
+    ) -> Optional[Tuple[LaneChains, Dict[int, str]]]:
+        """Merge the actions of several event names, lane by lane
+
+        Returns:
+            None if none of the names is registered for ``source``,
+            otherwise the merged chains and a dict mapping the ``id`` of
+            each action to the event name it was found under.
+        """
+        dispatch = self.__dispatch
+        found = [
+            (event, chains)
+            for event, chains in (
+                (event, dispatch.get((event, source))) for event in events
+            )
+            if chains is not None
+        ]
+        if not found:
+            return None
+        owners: Dict[int, str] = {}
+        merged = []
+        for lane in doorpi.event.Lane:
+            chain = []
+            for event, chains in found:
+                for action in chains[lane]:
+                    if id(action) not in owners:
+                        owners[id(action)] = event
+                        chain.append(action)
+            merged.append(tuple(chain))
+        return tuple(merged), owners
+
+    def __finish_event(
+        self, event: str, event_id: str, start_time: float, failed: bool
+    ) -> None:
+        suppress_logs = _suppress_logs(event)
+        duration = time.time() - start_time
+        self.__event_latency.record(event, duration, error=failed)
+        if not suppress_logs:
+            self.log.log_event_finished(event, start_time, duration)
+            LOGGER.debug(
+                "[%s] ##FINISHED## event %s, duration %sms",
+                event_id,
+                event,
+                str(round(duration * 10000) / 10),
+            )
+
+        if self.extra_info[event]["event_id"] == event_id:
+            self.extra_info[event]["last_finished"] = time.time()
+            self.extra_info[event]["last_duration"] = duration
+        else:
+            if not suppress_logs:
+                LOGGER.info(
+                    "[%s] Skipping update of last_finished,"
+                    " already next event [%s] in extra_info",
+                    event_id,
+                    self.extra_info[event]["event_id"],
+                )
+
+    def __defer_chain(
+        self,
+        event: str,
+        event_id: str,
+        extra: Dict[str, Any],
+        lane: doorpi.event.Lane,
+        actions: Tuple[ActionCallable, ...],
+        start_time: float,
+        owners: Mapping[int, str],
+    ) -> None:
+        """Hand the actions of one lane over to that lane's executor"""
+        if lane is doorpi.event.Lane.NORMAL and self.__aio is not None:
+            accepted = self.__aio.submit(
+                event,
+                trace.bind(
+                    self.__config.bind(self.__execute_chain_async)
+                ),
+                event,
+                event_id,
+                extra,
+                lane,
+                actions,
+                start_time,
+                owners,
+            )
+        else:
+            accepted = self.__lane_executors[lane].submit(
+                event,
+                trace.bind(self.__config.bind(self.__execute_chain)),
+                event,
+                event_id,
+                extra,
+                lane,
+                actions,
+                start_time,
+                owners,
+            )
+        if not accepted:
+            LOGGER.error(
+                "[%s] Queue for %s lane is full, dropping %d action(s)"
+                " for %s",
+                event_id,
+                lane.name.lower(),
+                len(actions),
                 event,
             )
 
+    def __execute_chain(
+        self,
+        event: str,
+        event_id: str,
+        extra: Dict[str, Any],
+        lane: doorpi.event.Lane,
+        actions: Tuple[ActionCallable, ...],
+        start_time: float,
+        owners: Mapping[int, str],
+    ) -> bool:
+        """Execute the actions of one lane of an event in order
+
+        Aborting or skipping actions only affects the current lane, and
+        only the actions that were registered for the same event name
+        as the raising action, according to ``owners`` (default:
+        ``event``).  Oneshot actions are removed from that name as well.
+
+        Returns:
+            Whether any action failed.
+        """
+        suppress_logs = _suppress_logs(event)
         oneshot_actions = []
-        skip_action = 0
-        for action in self.actions[event]:
-            try:
-                if skip_action > 0:
-                    LOGGER.debug("[%s] Skipping #%s %s", event_id, skip_action, action)
-                    skip_action -= 1
+        skip_action: Optional[int] = 0
+        failed = False
+        segment = event
+        for action in actions:
+            owner = owners.get(id(action), event)
+            if owner != segment:
+                segment, skip_action = owner, 0
+            if skip_action is None:
+                continue
+            if skip_action:
+                LOGGER.debug(
+                    "[%s] Skipping #%s %s", event_id, skip_action, action
+                )
+                skip_action -= 1
+            else:
+                if not suppress_logs:
+                    LOGGER.debug("[%s] Executing %s", event_id, action)
+                action_start = time.perf_counter()
+                try:
+                    with trace.span(
+                        "action", repr(action), lane=lane.name.lower()
+                    ):
+                        if lane is doorpi.event.Lane.REALTIME:
+                            action(event_id, extra)
+                        else:
+                            self.__watchdog.call(action, event_id, extra)
+                except Exception as err:  # pylint: disable=broad-except
+                    failed |= self.__record_action(
+                        event_id, action, action_start, err, suppress_logs
+                    )
+                    skip_action = self.__action_failed(
+                        event, event_id, action, err
+                    )
+                    if skip_action is None:
+                        continue
                 else:
-                    if not suppress_logs:
-                        LOGGER.debug("[%s] Executing %s", event_id, action)
-                    action(event_id, extra)
-                    if not suppress_logs:
-                        self.log.log_action(event_id, str(action), start_time)
-            except doorpi.event.AbortEventExecution:
-                LOGGER.info("[%s] Aborting event execution early", event_id)
-                break
-            except doorpi.event.SkipEventExecution as ex:
-                LOGGER.debug("[%s] Skipping next %s action of event", event_id, ex.steps)
-                skip_action = ex.steps
-            except Exception:  # pylint: disable=broad-except
+                    self.__record_action(
+                        event_id, action, action_start, None, suppress_logs
+                    )
+
+            if getattr(action, "oneshot", False):
+                oneshot_actions.append(action)
+
+        for action in oneshot_actions:
+            self.unregister_action(owners.get(id(action), event), action)
+
+        self.__record_latency(event, event_id, lane, time.time() - start_time)
+        return failed
+
+    async def __execute_chain_async(
+        self,
+        event: str,
+        event_id: str,
+        extra: Dict[str, Any],
+        lane: doorpi.event.Lane,
+        actions: Tuple[ActionCallable, ...],
+        start_time: float,
+        owners: Mapping[int, str],
+    ) -> bool:
+        """Execute the actions of one lane of an event on the event loop
+
+        Coroutine-capable actions are awaited directly, realtime actions
+        are called on the loop and all other actions are run in the
+        loop's thread pool.
+        """
+        assert self.__aio is not None
+        suppress_logs = _suppress_logs(event)
+        oneshot_actions = []
+        skip_action: Optional[int] = 0
+        failed = False
+        segment = event
+        for action in actions:
+            owner = owners.get(id(action), event)
+            if owner != segment:
+                segment, skip_action = owner, 0
+            if skip_action is None:
+                continue
+            if skip_action:
+                LOGGER.debug(
+                    "[%s] Skipping #%s %s", event_id, skip_action, action
+                )
+                skip_action -= 1
+            else:
+                if not suppress_logs:
+                    LOGGER.debug("[%s] Executing %s", event_id, action)
+                action_start = time.perf_counter()
                 try:
-                    LOGGER.exception(
-                        '[%s] Error executing action "%s" for event %s',
-                        event_id,
-                        action,
-                        event,
+                    with trace.span(
+                        "action", repr(action), lane=lane.name.lower()
+                    ):
+                        if isinstance(action, doorpi.actions.AsyncAction):
+                            await self.__watchdog.wait(
+                                action,
+                                action.call_async(event_id, extra),
+                                cancellable=True,
+                            )
+                        elif lane is doorpi.event.Lane.REALTIME:
+                            action(event_id, extra)
+                        else:
+                            await self.__watchdog.wait(
+                                action,
+                                self.__aio.run_blocking(
+                                    action, event_id, extra
+                                ),
+                                cancellable=False,
+                            )
+                except Exception as err:  # pylint: disable=broad-except
+                    failed |= self.__record_action(
+                        event_id, action, action_start, err, suppress_logs
+                    )
+                    skip_action = self.__action_failed(
+                        event, event_id, action, err
+                    )
+                    if skip_action is None:
+                        continue
+                else:
+                    self.__record_action(
+                        event_id, action, action_start, None, suppress_logs
                     )
-                except Exception:  # pylint: disable=broad-except
-                    LOGGER.exception("[%s] Error executing an action")
 
             if getattr(action, "oneshot", False):
                 oneshot_actions.append(action)
 
         for action in oneshot_actions:
-            self.actions[event].remove(action)
+            self.unregister_action(owners.get(id(action), event), action)
 
-        duration = time.time() - start_time
+        self.__record_latency(event, event_id, lane, time.time() - start_time)
+        return failed
+
+    def __record_action(
+        self,
+        event_id: str,
+        action: ActionCallable,
+        started: float,
+        err: Optional[Exception],
+        suppress_logs: bool,
+    ) -> bool:
+        """Record the latency and outcome of an action
+
+        Returns:
+            Whether the action failed with an error, as opposed to
+            finishing normally or aborting or skipping on purpose.
+        """
+        duration = time.perf_counter() - started
+        result = _action_result(err)
+        failed = result in ("error", "timeout")
+        self.__action_latency.record(repr(action), duration, error=failed)
         if not suppress_logs:
-            LOGGER.debug("[%s] ##FINISHED## event %s, duration %sms", event_id, event, str(round(duration*10000)/10))
+            self.log.log_action(
+                event_id,
+                str(action),
+                time.time() - duration,
+                duration,
+                result,
+                type(err).__name__ if err is not None else None,
+            )
+        return failed
 
-        if self.extra_info[event]["event_id"] == event_id:
-            self.extra_info[event]["last_finished"] = time.time()
-            self.extra_info[event]["last_duration"] = duration
+    @staticmethod
+    def __action_failed(
+        event: str, event_id: str, action: ActionCallable, err: Exception
+    ) -> Optional[int]:
+        """Handle an exception raised by an action
+
+        Returns:
+            None if the rest of the lane is to be aborted, otherwise
+            the number of following actions to skip.
+        """
+        if isinstance(err, doorpi.event.AbortEventExecution):
+            LOGGER.info("[%s] Aborting event execution early", event_id)
+            return None
+        if isinstance(err, doorpi.event.SkipEventExecution):
+            LOGGER.debug(
+                "[%s] Skipping next %s action of event", event_id, err.steps
+            )
+            return err.steps
+        if isinstance(err, ActionTimeoutError):
+            LOGGER.warning(
+                "[%s] Timeout for event %s: %s", event_id, event, err
+            )
+            return 0
+        try:
+            LOGGER.error(
+                '[%s] Error executing action "%s" for event %s',
+                event_id,
+                action,
+                event,
+                exc_info=err,
+            )
+        except Exception:  # pylint: disable=broad-except
+            LOGGER.exception("[%s] Error executing an action", event_id)
+        return 0
+
+    def __record_latency(
+        self,
+        event: str,
+        event_id: str,
+        lane: doorpi.event.Lane,
+        latency: float,
+    ) -> None:
+        deadline = self.__deadlines[lane]
+        with self.__stats_lock:
+            stats = self.__lane_stats[lane]
+            stats["executed"] += 1
+            stats["max_latency"] = max(stats["max_latency"], latency)
+            if latency <= deadline:
+                return
+            stats["overruns"] += 1
+            # Warn at most once per minute and lane to avoid log floods
+            now = time.monotonic()
+            if now - self.__overrun_logged.get(lane, -60.0) < 60.0:
+                return
+            self.__overrun_logged[lane] = now
+            overruns = stats["overruns"]
+
+        LOGGER.warning(
+            "[%s] %s lane of %s finished after %.1fms, exceeding its"
+            " deadline of %.1fms (%d overrun(s) so far)",
+            event_id,
+            lane.name.capitalize(),
+            event,
+            latency * 1000,
+            deadline * 1000,
+            overruns,
+        )
+
+    def __warn_undeliverable(self, event: str, source: str) -> None:
+        if source not in self.sources:
+            LOGGER.warning(
+                "Unknown event source %s, skipping %s", source, event
+            )
+        elif event not in self.events:
+            LOGGER.warning(
+                "Unknown event %s (from source %s), skipping", event, source
+            )
         else:
-            if not suppress_logs:
-                LOGGER.info("[%s] Skipping update of last_finished, already next event [%s] in extra_info", event_id, self.extra_info[event]["event_id"])
+            LOGGER.warning(
+                "Source %s not registered for %s, skipping", source, event
+            )
+
+    def __recompile(self, event: str) -> None:
+        """Publish a new dispatch table with updated entries for ``event``
+
+        If ``event`` is a pattern, all matching events are updated.
+        Must be called with the registration lock held.
+        """
+        table = dict(self.__dispatch)
+        self.__compile(event, table)
+        self.__dispatch = table
+
+    def __compile(
+        self, event: str, table: Dict[Tuple[str, str], LaneChains]
+    ) -> None:
+        """Update the entries for ``event`` in the dispatch ``table``"""
+        if is_pattern(event):
+            regex = re.compile(fnmatch.translate(to_glob(event)))
+            for name in self.events:
+                if regex.match(name):
+                    self.__compile(name, table)
+            return
+
+        for key in [k for k in table if k[0] == event]:
+            del table[key]
+        # Actions registered for the event itself come first, followed
+        # by those of matching patterns in the order they were added
+        registered = tuple(
+            itertools.chain.from_iterable(
+                zip(self.actions.get(key, ()), self.__lanes.get(key, ()))
+                for key in [
+                    event,
+                    *map(from_glob, self.__patterns.match(event)),
+                ]
+            )
+        )
+        chains = tuple(
+            tuple(action for action, alane in registered if alane is lane)
+            for lane in doorpi.event.Lane
+        )
+        for source in self.events.get(event, ()):
+            table[event, source] = chains
 
     def _unregister_event(self, event: str, source: str) -> bool:
         suppress_logs = _suppress_logs(event)
@@ -266,21 +1018,25 @@ class EventHandler:
                 "Unregistering event %s from source %s", event, source
             )
 
-        if event not in self.events:
-            LOGGER.error("Attempt to unregister unknown event %s", event)
-            return False
+        with self.__lock:
+            if event not in self.events:
+                LOGGER.error("Attempt to unregister unknown event %s", event)
+                return False
 
-        if source not in self.events[event]:
-            LOGGER.error(
-                "Attempt to unregister unknown source %s from event %s",
-                source,
-                event,
-            )
-            return False
+            if source not in self.events[event]:
+                LOGGER.error(
+                    "Attempt to unregister unknown source %s from event %s",
+                    source,
+                    event,
+                )
+                return False
 
-        self.events[event] -= {source}
-        if not self.events[event]:
-            del self.events[event]
+            events = dict(self.events)
+            events[event] -= {source}
+            if not events[event]:
+                del events[event]
+            self.events = events
+            self.__recompile(event)
 
         return True
 
@@ -305,24 +1061,25 @@ class EventHandler:
             "Removing source %s%s", source, " with force" if force else ""
         )
 
-        events = self.get_events_by_source(source)
-        if events:
-            if force is False:
-                LOGGER.error(
-                    "Attempt to unregister source %s,"
-                    " which is used for %d events: %s",
-                    source,
-                    len(events),
-                    ", ".join(events),
-                )
-            if not force:
-                return
+        with self.__lock:
+            events = self.get_events_by_source(source)
+            if events:
+                if force is False:
+                    LOGGER.error(
+                        "Attempt to unregister source %s,"
+                        " which is used for %d events: %s",
+                        source,
+                        len(events),
+                        ", ".join(events),
+                    )
+                if not force:
+                    return
 
-            for ev in events:
-                self._unregister_event(ev, source)
+                for ev in events:
+                    self._unregister_event(ev, source)
 
-        if source in self.sources:
-            self.sources.remove(source)
+            if source in self.sources:
+                self.sources = [s for s in self.sources if s != source]
 
     def register_action(
         self,
@@ -330,11 +1087,22 @@ class EventHandler:
         action: RegistrableAction,
         *,
         oneshot: bool = False,
+        prepend: bool = False,
+        lane: doorpi.event.Lane = doorpi.event.Lane.NORMAL,
     ) -> None:
         """Register an action to execute when the ``event`` fires
 
+        ``event`` may also be a shell-style pattern with the prefix
+        ``pattern:``, like ``pattern:OnKeyPressed_*`` or
+        ``pattern:OnTimeMinute[0-5]0``, which subscribes the action to
+        all matching events.  Without the prefix, wildcard characters
+        are part of the event name (e.g. ``OnDTMF_*1``).
+
         Args:
             oneshot: Only execute the action once and remove it afterwards
+            prepend: Execute the action before all previously registered
+                actions, instead of after them
+            lane: The lane to execute the action in
         """
         action_obj: Optional[ActionCallable]
         if isinstance(action, str):
@@ -346,13 +1114,254 @@ class EventHandler:
 
         if action_obj is None:
             return
+        if oneshot:
+            # Picked up by the dispatcher after executing the action
+            action_obj.oneshot = True  # type: ignore[union-attr]
 
-        self.actions.setdefault(event, []).append(action_obj)
+        with self.__lock:
+            actions = self.actions.get(event, ())
+            lanes = self.__lanes.get(event, ())
+            if prepend:
+                actions = (action_obj,) + actions
+                lanes = (lane,) + lanes
+            else:
+                actions = actions + (action_obj,)
+                lanes = lanes + (lane,)
+            self.actions = {**self.actions, event: actions}
+            self.__lanes = {**self.__lanes, event: lanes}
+            if is_pattern(event):
+                self.__patterns.add(to_glob(event))
+            self.__recompile(event)
 
         LOGGER.trace("Registered action %s for event %s", action, event)
 
+    def unregister_action(self, event: str, action: ActionCallable) -> None:
+        """Remove a previously registered action from ``event``
+
+        If the action is not registered for ``event`` itself, it is
+        removed from the first matching pattern it is registered for.
+        """
+        with self.__lock:
+            if action not in self.actions.get(event, ()):
+                event = next(
+                    (
+                        pattern
+                        for pattern in map(
+                            from_glob, self.__patterns.match(event)
+                        )
+                        if action in self.actions[pattern]
+                    ),
+                    event,
+                )
+            actions = self.actions.get(event, ())
+            if action not in actions:
+                return
+            index = actions.index(action)
+            actions = actions[:index] + actions[index + 1 :]
+            lanes = self.__lanes[event]
+            lanes = lanes[:index] + lanes[index + 1 :]
+            if actions:
+                self.actions = {**self.actions, event: actions}
+                self.__lanes = {**self.__lanes, event: lanes}
+            else:
+                self.actions = {
+                    k: v for k, v in self.actions.items() if k != event
+                }
+                self.__lanes = {
+                    k: v for k, v in self.__lanes.items() if k != event
+                }
+                if is_pattern(event):
+                    self.__patterns.remove(to_glob(event))
+            self.__recompile(event)
+
+    def reload_actions(self, conf: ConfigSource) -> List[str]:
+        """Apply the actions configured in ``conf``
+
+        This is `prepare_actions` followed by `apply_actions`.
+
+        Returns:
+            The events whose configured actions changed.
+
+        Raises:
+            ValueError: An action could not be instantiated.  No
+                actions were changed in that case.
+        """
+        return self.apply_actions(self.prepare_actions(conf))
+
+    def prepare_actions(self, conf: ConfigSource) -> PreparedActions:
+        """Instantiate the changed actions configured in ``conf``
+
+        The configured actions (see `_configured_actions`) are compared
+        with those applied previously.  Only the actions of events whose
+        configuration changed are instantiated anew.  As that may take
+        a while, it can be done on any thread; the result is put into
+        effect by `apply_actions`.
+
+        Raises:
+            ValueError: An action could not be instantiated.  The
+                actions instantiated before the failing one were
+                closed (see `doorpi.actions.Action.close`).
+        """
+        configured = _configured_actions(conf)
+        with self.__lock:
+            base = self.__configured
+        changed = sorted(
+            event
+            for event in configured.keys() | base.keys()
+            if configured.get(event) != base.get(event)
+        )
+
+        new_actions: Dict[str, Tuple[ActionCallable, ...]] = {}
+        objs: List[ActionCallable] = []
+        try:
+            for event in changed:
+                LOGGER.info("Registering configured actions for %s", event)
+                start = len(objs)
+                for action in configured.get(event, ()):
+                    LOGGER.debug("Registering action %r", action)
+                    obj = doorpi.actions.from_string(action)
+                    if obj is not None:
+                        objs.append(obj)
+                new_actions[event] = tuple(objs[start:])
+        except BaseException:
+            # Undo the side effects of the actions built so far
+            _close_actions(reversed(objs))
+            raise
+        return PreparedActions(base, configured, changed, new_actions)
+
+    def apply_actions(self, prepared: PreparedActions) -> List[str]:
+        """Replace the configured actions by the ``prepared`` ones
+
+        The new actions replace the old ones at the same position, so
+        that actions registered by other modules keep their order.  All
+        changes are published as a single new dispatch table, so that a
+        firing event sees either the old or the new actions, never a mix
+        of both.  The replaced actions are closed afterwards.
+
+        Returns:
+            The events whose configured actions changed.
+
+        Raises:
+            ValueError: Other configured actions were applied since
+                ``prepared`` was created.  Its actions were closed.
+        """
+        base, configured, changed, new_actions = prepared
+        if not changed:
+            return []
+        removed: List[ActionCallable] = []
+        with self.__lock:
+            if self.__configured is not base:
+                _close_actions(
+                    a for actions in new_actions.values() for a in actions
+                )
+                raise ValueError("Configured actions changed meanwhile")
+            actions = dict(self.actions)
+            lanes = dict(self.__lanes)
+            for event in changed:
+                old = self.__configured_actions.get(event, ())
+                removed.extend(old)
+                kept = []
+                index = None
+                for action, lane in zip(
+                    actions.get(event, ()), lanes.get(event, ())
+                ):
+                    if any(action is o for o in old):
+                        if index is None:
+                            index = len(kept)
+                    else:
+                        kept.append((action, lane))
+                if index is None:
+                    index = len(kept)
+                merged = kept[:index]
+                merged.extend(
+                    (action, doorpi.event.Lane.NORMAL)
+                    for action in new_actions[event]
+                )
+                merged.extend(kept[index:])
+                if merged:
+                    actions[event] = tuple(a for a, _ in merged)
+                    lanes[event] = tuple(lane for _, lane in merged)
+                    if is_pattern(event):
+                        self.__patterns.add(to_glob(event))
+                else:
+                    actions.pop(event, None)
+                    lanes.pop(event, None)
+                    if is_pattern(event):
+                        self.__patterns.remove(to_glob(event))
+            self.actions = actions
+            self.__lanes = lanes
+            self.__configured = configured
+            self.__configured_actions = {
+                **{
+                    k: v
+                    for k, v in self.__configured_actions.items()
+                    if k not in new_actions
+                },
+                **{k: v for k, v in new_actions.items() if v},
+            }
+            table = dict(self.__dispatch)
+            for event in changed:
+                self.__compile(event, table)
+            self.__dispatch = table
+        _close_actions(removed)
+        return changed
+
     __call__ = fire_event
 
 
+def _configured_actions(conf: ConfigSource) -> Dict[str, Tuple[str, ...]]:
+    """Collect the action strings configured for each event
+
+    These are the actions in ``events``, the DTMF actions in
+    ``sipphone.dtmf`` (for ``OnDTMF_<sequence>``) and the keyboard
+    input actions (for ``OnKeyPressed_<keyboard>.<pin>``).
+    """
+    configured: Dict[str, Tuple[str, ...]] = {}
+
+    def add(event: str, actions: Sequence[str]) -> None:
+        actions = tuple(action for action in actions if action)
+        if actions:
+            configured[event] = configured.get(event, ()) + actions
+
+    for event, actions in conf.view("events").items():
+        add(event, actions)
+    for seq, actions in conf.view("sipphone.dtmf").items():
+        add(f"OnDTMF_{seq}", actions)
+    for kbname in conf.view("keyboard").keys():
+        for pin, actions in conf.view(("keyboard", kbname, "input")).items():
+            add(f"OnKeyPressed_{kbname}.{pin}", actions)
+    return configured
+
+
+def _close_actions(actions: Iterable[ActionCallable]) -> None:
+    """Close actions that are no longer used, logging any errors"""
+    for action in actions:
+        close = getattr(action, "close", None)
+        if close is None:
+            continue
+        try:
+            close()
+        except Exception:  # pylint: disable=broad-except
+            LOGGER.exception("Cannot close action %r", action)
+
+
 def _suppress_logs(event_name: str) -> bool:
     return ("OnTime" in event_name) or ("OnCallOutgoing" in event_name) or ("_S" in event_name)
+
+
+def _action_result(err: Optional[Exception]) -> str:
+    """Describe how an action ended for the action log"""
+    if err is None:
+        return "ok"
+    if isinstance(err, doorpi.event.AbortEventExecution):
+        return "abort"
+    if isinstance(err, doorpi.event.SkipEventExecution):
+        return "skip"
+    if isinstance(err, ActionTimeoutError):
+        return "timeout"
+    return "error"
+
+
+def _aliases(events: Tuple[str, ...]) -> Dict[str, Any]:
+    """Trace attributes for the secondary names of an event group"""
+    return {"aliases": list(events[1:])} if len(events) > 1 else {}
@@ -0,0 +1,112 @@
+"""Constant-memory latency histograms"""
+import math
+import threading
+from typing import Any, Dict, List
+
+# Bucket boundaries grow by 2**(1/8) (about 9%), starting at 10µs.
+# Everything below ends up in the first, everything above ~17 minutes
+# in the last bucket.
+_MIN_LATENCY = 1e-5
+_BUCKETS_PER_OCTAVE = 8
+_NUM_BUCKETS = 27 * _BUCKETS_PER_OCTAVE
+_SCALE = _BUCKETS_PER_OCTAVE / math.log(2)
+
+
+def _bucket(latency: float) -> int:
+    if latency <= _MIN_LATENCY:
+        return 0
+    index = int(math.log(latency / _MIN_LATENCY) * _SCALE) + 1
+    return min(index, _NUM_BUCKETS - 1)
+
+
+def _upper_bound(bucket: int) -> float:
+    return _MIN_LATENCY * 2 ** (bucket / _BUCKETS_PER_OCTAVE)
+
+
+class LatencyHistogram:
+    """A streaming histogram of durations with logarithmic buckets
+
+    Percentiles are accurate to within one bucket width (about 9%),
+    independently of the number of recorded values.
+    """
+
+    __slots__ = ("__buckets", "__count", "__errors", "__max", "__total")
+
+    def __init__(self) -> None:
+        self.__buckets: List[int] = [0] * _NUM_BUCKETS
+        self.__count = 0
+        self.__errors = 0
+        self.__max = 0.0
+        self.__total = 0.0
+
+    @property
+    def count(self) -> int:
+        """Number of recorded durations"""
+        return self.__count
+
+    @property
+    def errors(self) -> int:
+        """Number of recorded durations that ended in an error"""
+        return self.__errors
+
+    def record(self, latency: float, *, error: bool = False) -> None:
+        """Record a duration (in seconds)"""
+        self.__buckets[_bucket(latency)] += 1
+        self.__count += 1
+        self.__total += latency
+        self.__max = max(self.__max, latency)
+        if error:
+            self.__errors += 1
+
+    def percentile(self, percent: float) -> float:
+        """Estimate the given percentile (0-100) of recorded durations"""
+        if not self.__count:
+            return 0.0
+        rank = math.ceil(self.__count * percent / 100) or 1
+        seen = 0
+        for bucket, count in enumerate(self.__buckets):
+            seen += count
+            if seen >= rank:
+                break
+        if bucket == _NUM_BUCKETS - 1:
+            return self.__max
+        return min(_upper_bound(bucket), self.__max)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Summarize the histogram for status output"""
+        return {
+            "count": self.__count,
+            "errors": self.__errors,
+            "mean": self.__total / self.__count if self.__count else 0.0,
+            "max": self.__max,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+        }
+
+
+class LatencyRecorder:
+    """A thread-safe collection of named latency histograms"""
+
+    def __init__(self) -> None:
+        self.__histograms: Dict[str, LatencyHistogram] = {}
+        self.__lock = threading.Lock()
+
+    def record(
+        self, name: str, latency: float, *, error: bool = False
+    ) -> None:
+        """Record a duration for ``name``"""
+        with self.__lock:
+            try:
+                histogram = self.__histograms[name]
+            except KeyError:
+                histogram = self.__histograms[name] = LatencyHistogram()
+            histogram.record(latency, error=error)
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Summarize all histograms"""
+        with self.__lock:
+            return {
+                name: histogram.snapshot()
+                for name, histogram in self.__histograms.items()
+            }
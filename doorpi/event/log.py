@@ -1,11 +1,34 @@
+import base64
+import collections
+import datetime
+import itertools
 import json
 import logging
 import pathlib
+import shlex
 import sqlite3
-from typing import Any, Mapping, Optional, Tuple, TypedDict
+import threading
+import time
+from typing import (
+    Any,
+    Deque,
+    Dict,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    TypedDict,
+    Union,
+)
 
 import os
 
+from . import migrations
+from .archive import EventArchive, day_start, next_day_start
+from .packing import InfoCodec
+
 LOGGER = logging.getLogger(__name__)
 
 
@@ -16,11 +39,132 @@ class EventLogEntry(TypedDict):
     start_time: float
     additional_infos: str
 
+
+class RollupEntry(TypedDict):
+    bucket: float
+    count: int
+    first_time: float
+    last_time: float
+    mean_duration: Optional[float]
+
+
+class ActionLogEntry(TypedDict):
+    event_id: str
+    action_name: str
+    start_time: float
+    duration: float
+    action_result: str
+    exception: Optional[str]
+
+
+class _Action(NamedTuple):
+    event_id: str
+    action_name: str
+    start_time: float
+    action_result: str
+    duration: float
+    exception: Optional[str]
+
+
+class _Finished(NamedTuple):
+    event_name: str
+    start_time: float
+    duration: float
+
+
+EventLogRow = Tuple[str, str, str, float, Optional[Dict[str, Any]]]
+_Record = Union[EventLogRow, _Action, _Finished]
+# A column name (or None for any column) and the text to search for
+SearchTerm = Tuple[Optional[str], str]
+
+SEARCH_COLUMNS = ("event_id", "fired_by", "event_name", "additional_infos")
+SORT_COLUMNS = ("start_time", "event_name", "fired_by", "event_id")
+FIELDS = tuple(EventLogEntry.__annotations__)
+ROLLUP_RESOLUTIONS = ("hour", "day", "hour_of_day", "hour_of_week", "weekday")
+# The trigram tokenizer cannot look up shorter strings
+_FTS_MIN_LENGTH = 3
+
+
+def parse_query(query: str) -> List[SearchTerm]:
+    """Split a search query into terms
+
+    Terms are separated by whitespace; use double quotes to search for
+    text containing spaces. A term of the form ``column:text``, where
+    ``column`` is one of `SEARCH_COLUMNS`, only searches that column.
+    """
+    try:
+        words = shlex.split(query)
+    except ValueError:
+        words = query.split()
+    terms: List[SearchTerm] = []
+    for word in words:
+        column, sep, text = word.partition(":")
+        if sep and column in SEARCH_COLUMNS:
+            if text:
+                terms.append((column, text))
+        else:
+            terms.append((None, word))
+    return terms
+
+
 class EventLog:
-    """Record keeper about fired events and executed actions"""
+    """Record keeper about fired events and executed actions
+
+    Logged events are written to the database by a background thread,
+    which commits them in batches of up to ``batch_size`` records, or
+    after at most ``flush_interval`` seconds.  At most ``queue_size``
+    records wait for the writer; further records are dropped and
+    counted in `stats`.
+
+    The event log is a ring buffer of the ``max_entries`` most recently
+    logged events: After each batch, all events whose rowid is at least
+    ``max_entries`` below the newest one are deleted.  As rowids are
+    assigned in ascending order, this is a range delete on the primary
+    key, whose cost does not depend on the size of the log.
+
+    Independently of this, the writer counts events per name and hour
+    in the ``event_rollup`` table, together with the time of the first
+    and last event and the total time taken to execute their actions.
+    These statistics are never deleted.  See `get_event_rollup`.
+
+    Executed actions are kept in the same way as events, up to
+    ``max_actions`` of them.  As they are less important, action
+    records are already dropped once the queue is half full.
+
+    If an ``archive`` directory is given, no event is lost to the ring
+    buffer: Events are appended to an `EventArchive` before they are
+    deleted, and at each day rollover the events of the past day that
+    are still in the database are archived as well.  The database keeps
+    the time up to which events were archived in the ``archived_until``
+    metadata key.  `search_event_log` spans the database and the
+    archive.
+
+    The additional infos of events are stored in the compact binary
+    format of `InfoCodec`, and decoded to the JSON text they would have
+    been stored as when read.
+
+    The schema of the database is upgraded by `migrations` on startup.
+
+    Searches are answered from an FTS5 trigram index over
+    `SEARCH_COLUMNS`, which triggers keep in sync with the event log.
+    If SQLite lacks FTS5, they fall back to scanning the table.
+    """
     MAX_ENTRIES = 1000
+    MAX_ACTIONS = 5000
+    # Free pages returned to the file system per `clean` call
+    VACUUM_PAGES = 1000
 
-    def __init__(self, db: str) -> None:
+    def __init__(
+        self,
+        db: str,
+        *,
+        max_entries: int = MAX_ENTRIES,
+        max_actions: int = MAX_ACTIONS,
+        batch_size: int = 50,
+        flush_interval: float = 1.0,
+        queue_size: int = 1000,
+        archive: Optional[pathlib.Path] = None,
+    ) -> None:
         if not sqlite3.threadsafety:
             raise RuntimeError(
                 "Your version of SQLite is not compiled thread-safe!"
@@ -36,79 +180,122 @@ class EventLog:
             check_same_thread=False,
         )
         self._event_count = 0;
+        self.__max_entries = max_entries
+        self.__max_actions = max_actions
 
-        with self._db:
-            self._db.executescript(
-                """
-                CREATE TABLE IF NOT EXISTS event_log (
-                    event_id TEXT,
-                    fired_by TEXT,
-                    event_name TEXT,
-                    start_time REAL,
-                    additional_infos TEXT
-                );
-                CREATE TABLE IF NOT EXISTS action_log (
-                    event_id TEXT,
-                    action_name TEXT,
-                    start_time REAL,
-                    action_result TEXT
-                );
-                CREATE TABLE IF NOT EXISTS metadata (
-                    key TEXT PRIMARY KEY ON CONFLICT REPLACE,
-                    value TEXT
-                );
-                INSERT INTO metadata VALUES ('db_version', '1');
-                """
-            )
-    
-    def clean (self) -> None:
-        try:
-            with self._db:
-                # 1. Count the number of entries
-                count_cursor = self._db.execute(
-                    "SELECT COUNT(*) FROM event_log"
+        # Incremental vacuuming must be enabled before any table is
+        # created, or requires a full VACUUM to convert an existing file
+        if self._db.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            self._db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            self._db.execute("VACUUM")
+        self._db.execute("PRAGMA journal_mode = WAL")
+
+        migrations.migrate(self._db)
+        self.__codec = InfoCodec(self._db)
+        self._db.create_function(
+            "doorpi_infos", 1, self.__infos, deterministic=True
+        )
+        self.__fts = self.__create_fts()
+
+        self.__batch_size = batch_size
+        self.__flush_interval = flush_interval
+        self.__queue_size = queue_size
+        self.__queue: Deque[Tuple[float, _Record]] = collections.deque()
+        self.__cond = threading.Condition()
+        self.__enqueued = 0
+        self.__done = 0
+        self.__dropped = 0
+        self.__actions_written = 0
+        self.__actions_dropped = 0
+        self.__batches = 0
+        self.__flushing = 0
+        self.__stopping = False
+        self.__archive = EventArchive(archive) if archive else None
+        self.__archived = 0
+        # Archive the events of past days once the writer starts
+        self.__rollover = 0.0
+        self.__backfilling = True
+        self.__writer_db = sqlite3.connect(
+            database=self._db_path,
+            timeout=1,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        # With WAL, NORMAL only syncs on checkpoints, not on each commit
+        self.__writer_db.execute("PRAGMA synchronous = NORMAL")
+        self.__writer = threading.Thread(
+            target=self.__run, name="DoorPi Event Log", daemon=True
+        )
+        self.__writer.start()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Counters of the background writer"""
+        with self.__cond:
+            return {
+                "queued": len(self.__queue),
+                "queue_size": self.__queue_size,
+                "written": self._event_count,
+                "dropped": self.__dropped,
+                "actions_written": self.__actions_written,
+                "actions_dropped": self.__actions_dropped,
+                "batches": self.__batches,
+                "archived": self.__archived,
+            }
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until all events logged so far are written
+
+        Returns:
+            False if the timeout expired before, True otherwise.
+        """
+        with self.__cond:
+            target = self.__enqueued
+            self.__flushing += 1
+            self.__cond.notify_all()
+            try:
+                return self.__cond.wait_for(
+                    lambda: self.__done >= target
+                    or not self.__writer.is_alive(),
+                    timeout,
                 )
-                current_count = count_cursor.fetchone()[0]
-                
-                # 2. If count > 100, delete the oldest entry
-                if current_count >= self.MAX_ENTRIES:
-                    LOGGER.info(
-                        "Event log has %d entries. Deleting oldest entry to cap size.",
-                        current_count
-                    )
-                    # Delete the entry with the minimum start_time (the oldest event)
-                    self._db.execute(
-                        """
-                        DELETE FROM event_log
-                        WHERE start_time = (SELECT MIN(start_time) FROM event_log)
-                        """
-                    )
+            finally:
+                self.__flushing -= 1
 
-                # 3.vacuum db
-                size_before_bytes = os.path.getsize(self._db_path)
-                self._db.execute("VACUUM")
-                size_after_bytes = os.path.getsize(self._db_path)
-                LOGGER.info(f"Executing VACUUM, file size {size_before_bytes / 1024:.2f}kB > {size_after_bytes / 1024:.2f}kB")
-                
+    def clean(self) -> None:
+        """Return unused space of the database to the file system
+
+        This truncates the write-ahead log and releases up to
+        `VACUUM_PAGES` free pages at the end of the database file,
+        instead of rewriting the whole file with VACUUM.
+        """
+        try:
+            size_before = os.path.getsize(self._db_path)
+            self._db.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+            self._db.execute(
+                f"PRAGMA incremental_vacuum({self.VACUUM_PAGES:d})"
+            ).fetchall()
+            size_after = os.path.getsize(self._db_path)
+            LOGGER.info(
+                "Cleaned event log, file size %.2fkB > %.2fkB",
+                size_before / 1024,
+                size_after / 1024,
+            )
         except Exception:
             LOGGER.exception("Error cleaning db")
-    
+
     def count_event_log_entries(self, filter_: str = "") -> int:
         """Count the event log entries that match ``filter_``
 
         Args:
-            filter_: A SQLite LIKE substring to filter any column
+            filter_: A substring to search for in any column
         """
+        self.flush(5.0)
+        terms = [(None, filter_)] if filter_ else []
+        where, params = self.__conditions(terms)
         try:
             return self._db.execute(
-                """
-                SELECT COUNT(*) FROM event_log
-                WHERE event_id LIKE ?
-                OR fired_by LIKE ?
-                OR event_name LIKE ?
-                OR start_time LIKE ?
-            """,
-                (f"%{filter_}%",) * 4,
+                f"SELECT COUNT(*) FROM event_log {_where(where)}", params
             ).fetchone()[0]
         except sqlite3.Error:
             LOGGER.exception(
@@ -125,10 +312,10 @@ class EventLog:
 
         Args:
             max_count: The maximum number of events to fetch
-            filter_: A SQLite LIKE substring to filter any column
+            filter_: A substring to search for in any column
 
         Returns:
-            A tuple of dicts describing logged events.
+            A tuple of dicts describing logged events, newest first.
             Each dict contains the following keys:
 
             * ``event_id``: The unique ID for this event.
@@ -137,40 +324,231 @@ class EventLog:
             * ``start_time``: The timestamp when the event fired.
             * ``additional_infos``: A JSON object with auxiliary info.
         """
+        self.flush(5.0)
+        terms = [(None, filter_)] if filter_ else []
         try:
-            cursor = self._db.execute(
-                """
+            return self.__select(terms, max_count)
+        except sqlite3.Error:
+            LOGGER.exception("Error reading event log with filter %r", filter_)
+            return ()
+
+    def search_event_log(
+        self,
+        query: str = "",
+        *,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        max_count: int = 1000,
+    ) -> Tuple[EventLogEntry, ...]:
+        """Search the event log
+
+        Args:
+            query: Search terms as understood by `parse_query`. All
+                terms must match (case-insensitively) as substrings.
+            since: Only return events fired at or after this timestamp
+            until: Only return events fired before this timestamp
+            max_count: The maximum number of events to fetch
+
+        Returns:
+            Matching events like `get_event_log`, newest first.  If
+            the database holds fewer matching events than requested,
+            older ones are taken from the archive (if enabled).
+        """
+        self.flush(5.0)
+        terms = parse_query(query)
+        try:
+            found = self.__select(terms, max_count, since=since, until=until)
+            if self.__archive is None or len(found) >= max_count:
+                return found
+            # The database holds all events since its oldest one
+            oldest = self._db.execute(
+                "SELECT MIN(start_time) FROM event_log"
+            ).fetchone()[0]
+        except sqlite3.Error:
+            LOGGER.exception("Error searching event log for %r", query)
+            return ()
+        if oldest is not None:
+            until = oldest if until is None else min(until, oldest)
+        archived = (
+            EventLogEntry(entry)  # type: ignore
+            for entry in self.__archive.read(since, until)
+            if _matches(entry, terms)
+        )
+        return found + tuple(
+            itertools.islice(archived, max_count - len(found))
+        )
+
+    def get_event_rollup(
+        self,
+        events: Sequence[str] = (),
+        *,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        resolution: str = "hour",
+    ) -> Dict[str, List[RollupEntry]]:
+        """Get long-term statistics about events
+
+        Args:
+            events: Event names or shell-style patterns to include
+                (default: all events)
+            since, until: Only include events fired in this time range,
+                widened to full hours
+            resolution: How to group events, one of
+                `ROLLUP_RESOLUTIONS`. "hour" and "day" group by
+                consecutive hours or (local) days; the bucket is the
+                timestamp of their start. "hour_of_day" (0-23),
+                "hour_of_week" (0-167, starting Monday 0:00) and
+                "weekday" (0-6, Monday is 0) group by recurring
+                periods in local time; the bucket is their number.
+
+        Returns:
+            For each event name, its statistics per bucket in ascending
+            bucket order.
+
+        Raises:
+            ValueError: If the resolution is invalid
+        """
+        if resolution not in ROLLUP_RESOLUTIONS:
+            raise ValueError(f"Invalid resolution: {resolution!r}")
+
+        where = []
+        params: List[Any] = []
+        if events:
+            where.append(
+                "(" + " OR ".join("event_name GLOB ?" for _ in events) + ")"
+            )
+            params.extend(events)
+        if since is not None:
+            where.append("hour >= ?")
+            params.append(_hour(since))
+        if until is not None:
+            where.append("hour < ?")
+            params.append(_hour(until, up=True))
+
+        self.flush(5.0)
+        try:
+            rows = self._db.execute(
+                f"""
                 SELECT
-                    event_id,
-                    fired_by,
                     event_name,
-                    start_time,
-                    additional_infos
+                    hour,
+                    count,
+                    first_time,
+                    last_time,
+                    duration_total,
+                    duration_count
+                FROM event_rollup
+                {_where(where)}
+                ORDER BY event_name, hour""",
+                params,
+            ).fetchall()
+        except sqlite3.Error:
+            LOGGER.exception("Error reading event rollup")
+            return {}
+
+        buckets: Dict[str, Dict[float, List[Any]]] = {}
+        for name, hour, count, first, last, total, finished in rows:
+            bucket = _bucket(hour, resolution)
+            entry = buckets.setdefault(name, {}).get(bucket)
+            if entry is None:
+                buckets[name][bucket] = [count, first, last, total, finished]
+            else:
+                entry[0] += count
+                entry[1] = min(entry[1], first)
+                entry[2] = max(entry[2], last)
+                entry[3] += total
+                entry[4] += finished
+        return {
+            name: [
+                RollupEntry(
+                    bucket=bucket,
+                    count=count,
+                    first_time=first,
+                    last_time=last,
+                    mean_duration=total / finished if finished else None,
+                )
+                for bucket, (count, first, last, total, finished) in sorted(
+                    entries.items()
+                )
+            ]
+            for name, entries in buckets.items()
+        }
+
+    def page_event_log(
+        self,
+        query: str = "",
+        *,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        sort: str = "start_time",
+        descending: bool = True,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Tuple[Tuple[Dict[str, Any], ...], Optional[str]]:
+        """Fetch one page of a search of the event log
+
+        Pages are delimited by the sort column and the rowid of the last
+        event on the previous page, so fetching a page costs the same
+        regardless of how far into the log it is, and events logged in
+        the meantime do not shift the following pages.
+
+        Args:
+            query, since, until: Filter events, see `search_event_log`
+            limit: The maximum number of events on the page
+            cursor: The cursor returned with the previous page, or None
+                to fetch the first page
+            sort: The column to sort by, one of `SORT_COLUMNS`
+            descending: Sort in descending instead of ascending order
+            fields: The keys to include in the returned dicts (default:
+                all of `FIELDS`)
+
+        Returns:
+            The events on the page, and the cursor for the next page or
+            None if this is the last one.
+
+        Raises:
+            ValueError: If any of the arguments is invalid
+        """
+        if limit < 1:
+            raise ValueError("Limit must be positive")
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort by {sort!r}")
+        fields = tuple(fields or FIELDS)
+        unknown = set(fields) - set(FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+        where, params = self.__conditions(parse_query(query), since, until)
+        direction, operator = ("DESC", "<") if descending else ("ASC", ">")
+        if cursor is not None:
+            where.append(f"({sort}, rowid) {operator} (?, ?)")
+            params.extend(_decode_cursor(cursor))
+
+        self.flush(5.0)
+        try:
+            rows = self._db.execute(
+                f"""
+                SELECT {", ".join(fields)}, {sort}, rowid
                 FROM event_log
-                WHERE event_id LIKE ?
-                OR fired_by LIKE ?
-                OR event_name LIKE ?
-                OR start_time LIKE ?
-                ORDER BY start_time DESC
+                {_where(where)}
+                ORDER BY {sort} {direction}, rowid {direction}
                 LIMIT ?""",
-                (f"%{filter_}%",) * 4 + (max_count,),
-            )
+                params + [limit + 1],
+            ).fetchall()
+        except sqlite3.Error:
+            LOGGER.exception("Error paging event log for %r", query)
+            return (), None
 
-            return tuple(
-                EventLogEntry(
-                    {
-                        "event_id": row[0],
-                        "fired_by": row[1],
-                        "event_name": row[2],
-                        "start_time": row[3],
-                        "additional_infos": row[4],
-                    }
+        page = tuple(dict(zip(fields, row)) for row in rows[:limit])
+        if "additional_infos" in fields:
+            for entry in page:
+                entry["additional_infos"] = self.__infos(
+                    entry["additional_infos"]
                 )
-                for row in cursor
-            )
-        except sqlite3.Error:
-            LOGGER.exception("Error reading event log with filter %r", filter_)
-            return ()
+        if len(rows) <= limit:
+            return page, None
+        return page, _encode_cursor(*rows[limit - 1][-2:])
 
     def log_event(
         self,
@@ -180,7 +558,7 @@ class EventLog:
         start_time: float,
         extra: Optional[Mapping[str, Any]],
     ) -> None:
-        """Insert an event into the event log
+        """Queue an event for insertion into the event log
 
         Args:
             event_id: The unique ID for this event
@@ -189,72 +567,626 @@ class EventLog:
             start_time: The timestamp when the event fired
             extra: A JSON-serializable object with auxiliary info
         """
-        try:
-            with self._db:
-                # 1. Count the number of entries
-                count_cursor = self._db.execute(
-                    "SELECT COUNT(*) FROM event_log"
-                )
-                current_count = count_cursor.fetchone()[0]
-                
-                # 2. If count > 100, delete the oldest entry
-                if current_count >= self.MAX_ENTRIES:
-                    LOGGER.debug(
-                        "Event log has %d entries. Deleting oldest entry to cap size.",
-                        current_count
-                    )
-                    # Delete the entry with the minimum start_time (the oldest event)
-                    self._db.execute(
-                        """
-                        DELETE FROM event_log
-                        WHERE start_time = (SELECT MIN(start_time) FROM event_log)
-                        """
-                    )
-
-                # 3. Insert the new event
-                self._db.execute(
-                    "INSERT INTO event_log VALUES (?, ?, ?, ?, ?)",
-                    (
-                        event_id,
-                        source,
-                        event,
-                        start_time,
-                        json.dumps(extra, sort_keys=True) if extra else "",
-                    ),
-                )
-                self._event_count += 1;
-                
-        except sqlite3.Error:
-            LOGGER.exception(
-                "[%s] Cannot insert event %s into event log", event_id, event
+        # Copy right away, the caller may modify ``extra`` later
+        row = (event_id, source, event, start_time, dict(extra or {}))
+        if not self.__enqueue(row) and self.__dropped % 100 == 1:
+            LOGGER.warning(
+                "[%s] Event log queue is full, dropping event %s",
+                event_id,
+                event,
             )
 
+    def log_event_finished(
+        self, event: str, start_time: float, duration: float
+    ) -> None:
+        """Record the time taken to execute the actions of an event
+
+        Args:
+            event: The event name
+            start_time: The timestamp when the event fired
+            duration: The time (s) taken to execute its actions
+        """
+        self.__enqueue(_Finished(event, start_time, duration))
+
     def log_action(
-        self, event_id: str, action_name: str, start_time: float
+        self,
+        event_id: str,
+        action_name: str,
+        start_time: float,
+        duration: float = 0.0,
+        result: str = "ok",
+        exception: Optional[str] = None,
     ) -> None:
-        """Insert an executed action into the event log
+        """Queue an executed action for insertion into the event log
 
         Args:
             event_id: The unique ID of the associated event
             action_name: The configuration name of this action
             start_time: The timestamp when this action was executed
+            duration: The time (s) the action took
+            result: How the action ended ("ok", "error", "timeout",
+                "abort" or "skip")
+            exception: The class name of the exception raised by the
+                action, if any
         """
-        
-        LOGGER.trace ("skipping log_action: " + action_name)
-        
-        #try:
-        #    with self._db:
-        #        self._db.execute(
-        #            "INSERT INTO action_log VALUES (?, ?, ?, ?)",
-        #            (event_id, action_name, start_time, ""),
-        #        )
-        #except sqlite3.Error:
-        #    LOGGER.exception(
-        #        "[%s] Cannot insert action %s into event log",
-        #        event_id,
-        #        action_name,
-        #    )
+        self.__enqueue(
+            _Action(
+                event_id, action_name, start_time, result, duration, exception
+            )
+        )
+
+    def get_action_log(
+        self,
+        max_count: int = 1000,
+        filter_: str = "",
+    ) -> Tuple[ActionLogEntry, ...]:
+        """Get executed actions from the event log
+
+        Args:
+            max_count: The maximum number of actions to fetch
+            filter_: A substring of the event ID or action name
+
+        Returns:
+            A tuple of dicts describing executed actions, newest first.
+            Each dict contains the following keys:
+
+            * ``event_id``: The ID of the event that executed the action.
+            * ``action_name``: The action, as configured.
+            * ``start_time``: The timestamp when the action started.
+            * ``duration``: The time (s) the action took.
+            * ``action_result``: How the action ended, see `log_action`.
+            * ``exception``: The class name of the raised exception.
+        """
+        self.flush(5.0)
+        try:
+            cursor = self._db.execute(
+                """
+                SELECT
+                    event_id,
+                    action_name,
+                    start_time,
+                    duration,
+                    action_result,
+                    exception
+                FROM action_log
+                WHERE event_id LIKE ? OR action_name LIKE ?
+                ORDER BY rowid DESC
+                LIMIT ?""",
+                (f"%{filter_}%",) * 2 + (max_count,),
+            )
+            return tuple(
+                ActionLogEntry(
+                    event_id=row[0],
+                    action_name=row[1],
+                    start_time=row[2],
+                    duration=row[3],
+                    action_result=row[4],
+                    exception=row[5],
+                )
+                for row in cursor
+            )
+        except sqlite3.Error:
+            LOGGER.exception(
+                "Error reading action log with filter %r", filter_
+            )
+            return ()
 
     def destroy(self) -> None:
-        """Shut down the event log"""
+        """Shut down the event log
+
+        Events that are still queued are written before returning.
+        """
+        with self.__cond:
+            self.__stopping = True
+            self.__cond.notify_all()
+        if self.__writer is not threading.current_thread():
+            self.__writer.join()
+        self.__writer_db.close()
         self._db.close()
+
+    def __enqueue(self, record: _Record) -> bool:
+        """Hand a record to the writer thread
+
+        Returns:
+            False if the record was dropped.
+        """
+        is_action = isinstance(record, _Action)
+        limit = self.__queue_size // 2 if is_action else self.__queue_size
+        with self.__cond:
+            if self.__stopping or len(self.__queue) >= limit:
+                if is_action:
+                    self.__actions_dropped += 1
+                elif not isinstance(record, _Finished):
+                    self.__dropped += 1
+                return False
+            self.__queue.append((time.monotonic(), record))
+            self.__enqueued += 1
+            # Wake the writer for the first record and for a full batch
+            if len(self.__queue) in (1, self.__batch_size):
+                self.__cond.notify_all()
+        return True
+
+    def __create_fts(self) -> bool:
+        """Set up the full-text index, if SQLite supports it"""
+        columns = ", ".join(SEARCH_COLUMNS)
+        new_columns = ", ".join(f"new.{c}" for c in SEARCH_COLUMNS)
+        old_columns = ", ".join(f"old.{c}" for c in SEARCH_COLUMNS)
+        exists = self._db.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'event_log_fts'"
+        ).fetchone()
+        # Index events that were logged before the index existed. Events
+        # with packed infos are indexed by the writer, see `__write`.
+        rebuild = (
+            ""
+            if exists
+            else f"""
+                INSERT INTO event_log_fts (rowid, {columns})
+                SELECT rowid, {columns} FROM event_log
+                WHERE typeof(additional_infos) != 'blob';
+            """
+        )
+        try:
+            self._db.executescript(
+                f"""
+                BEGIN;
+                CREATE VIRTUAL TABLE IF NOT EXISTS event_log_fts USING fts5(
+                    {columns},
+                    content='event_log',
+                    content_rowid='rowid',
+                    tokenize='trigram'
+                );
+                DROP TRIGGER IF EXISTS event_log_fts_insert;
+                CREATE TRIGGER event_log_fts_insert
+                AFTER INSERT ON event_log
+                WHEN typeof(new.additional_infos) != 'blob' BEGIN
+                    INSERT INTO event_log_fts (rowid, {columns})
+                    VALUES (new.rowid, {new_columns});
+                END;
+                DROP TRIGGER IF EXISTS event_log_fts_delete;
+                CREATE TRIGGER event_log_fts_delete
+                AFTER DELETE ON event_log
+                WHEN typeof(old.additional_infos) != 'blob' BEGIN
+                    INSERT INTO event_log_fts (event_log_fts, rowid, {columns})
+                    VALUES ('delete', old.rowid, {old_columns});
+                END;
+                {rebuild}
+                """
+            )
+            if not exists:
+                self.__index_packed(
+                    self._db,
+                    self._db.execute(
+                        f"""
+                        SELECT rowid, {columns} FROM event_log
+                        WHERE typeof(additional_infos) = 'blob'
+                        """
+                    ).fetchall(),
+                )
+            self._db.execute("COMMIT")
+        except sqlite3.OperationalError as err:
+            if self._db.in_transaction:
+                self._db.execute("ROLLBACK")
+            LOGGER.info("Cannot create event log search index: %s", err)
+            return False
+        return True
+
+    def __index_packed(
+        self,
+        db: sqlite3.Connection,
+        rows: Sequence[Tuple[int, str, str, str, bytes]],
+        *,
+        delete: bool = False,
+    ) -> None:
+        """Add events with packed infos to the full-text index
+
+        The index holds the JSON text of the infos, like for events
+        logged before packing was introduced.
+
+        Args:
+            rows: The rowid followed by the `SEARCH_COLUMNS` of events
+            delete: Remove the events from the index instead
+        """
+        columns = ", ".join(SEARCH_COLUMNS)
+        if delete:
+            sql = f"""
+                INSERT INTO event_log_fts (event_log_fts, rowid, {columns})
+                VALUES ('delete', ?, ?, ?, ?, ?)"""
+        else:
+            sql = f"""
+                INSERT INTO event_log_fts (rowid, {columns})
+                VALUES (?, ?, ?, ?, ?)"""
+        db.executemany(
+            sql,
+            (
+                (rowid, event_id, source, event, self.__codec.text(infos, db))
+                for rowid, event_id, source, event, infos in rows
+            ),
+        )
+
+    def __infos(self, infos: Union[bytes, str, None]) -> str:
+        """Decode stored additional infos to their JSON text"""
+        return self.__codec.text(infos, self._db)
+
+    def __conditions(
+        self,
+        terms: Sequence[SearchTerm],
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> Tuple[List[str], List[Any]]:
+        """Build the conditions and parameters for a search"""
+        match = []
+        where = []
+        params: List[Any] = []
+        for column, text in terms:
+            if self.__fts and len(text) >= _FTS_MIN_LENGTH:
+                phrase = '"{}"'.format(text.replace('"', '""'))
+                match.append(f"{column} : {phrase}" if column else phrase)
+                continue
+            columns = [
+                (
+                    "doorpi_infos(additional_infos)"
+                    if c == "additional_infos"
+                    else c
+                )
+                for c in ((column,) if column else SEARCH_COLUMNS)
+            ]
+            where.append(
+                "(" + " OR ".join(f"{c} LIKE ?" for c in columns) + ")"
+            )
+            params.extend((f"%{text}%",) * len(columns))
+        if match:
+            where.insert(
+                0,
+                "rowid IN (SELECT rowid FROM event_log_fts"
+                " WHERE event_log_fts MATCH ?)",
+            )
+            params.insert(0, " AND ".join(match))
+        if since is not None:
+            where.append("start_time >= ?")
+            params.append(since)
+        if until is not None:
+            where.append("start_time < ?")
+            params.append(until)
+        return where, params
+
+    def __select(
+        self,
+        terms: Sequence[SearchTerm],
+        max_count: int,
+        *,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+    ) -> Tuple[EventLogEntry, ...]:
+        where, params = self.__conditions(terms, since, until)
+        cursor = self._db.execute(
+            f"""
+            SELECT
+                event_id,
+                fired_by,
+                event_name,
+                start_time,
+                additional_infos
+            FROM event_log
+            {_where(where)}
+            ORDER BY start_time DESC
+            LIMIT ?""",
+            params + [max_count],
+        )
+        return tuple(
+            EventLogEntry(
+                {
+                    "event_id": row[0],
+                    "fired_by": row[1],
+                    "event_name": row[2],
+                    "start_time": row[3],
+                    "additional_infos": self.__infos(row[4]),
+                }
+            )
+            for row in cursor
+        )
+
+    def __run(self) -> None:
+        while True:
+            with self.__cond:
+                self.__cond.wait_for(
+                    lambda: self.__queue or self.__stopping,
+                    self.__idle_timeout(),
+                )
+                if self.__stopping and not self.__queue:
+                    return
+                deadline = (
+                    self.__queue[0][0] + self.__flush_interval
+                    if self.__queue
+                    else time.monotonic()
+                )
+                while (
+                    len(self.__queue) < self.__batch_size
+                    and not self.__stopping
+                    and not self.__flushing
+                ):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.__cond.wait(remaining)
+                batch = [
+                    self.__queue.popleft()[1]
+                    for _ in range(min(len(self.__queue), self.__batch_size))
+                ]
+
+            if self.__archive is not None and time.time() >= self.__rollover:
+                self.__archive_past_days()
+            if self.__backfilling:
+                # Migrate a chunk of old events between batches
+                self.__backfilling = migrations.backfill_step(
+                    self.__writer_db
+                )
+            if not batch:
+                continue
+
+            rows = []
+            actions = []
+            for record in batch:
+                if isinstance(record, _Action):
+                    actions.append(record)
+                elif not isinstance(record, _Finished):
+                    rows.append(record)
+            written = self.__write(rows, actions, _rollup(batch))
+
+            with self.__cond:
+                if written:
+                    self._event_count += len(rows)
+                    self.__actions_written += len(actions)
+                    self.__batches += 1
+                else:
+                    self.__dropped += len(rows)
+                    self.__actions_dropped += len(actions)
+                self.__done += len(batch)
+                self.__cond.notify_all()
+
+    def __idle_timeout(self) -> Optional[float]:
+        """How long the writer may wait for records"""
+        if self.__backfilling:
+            return 0.0
+        if self.__archive is None:
+            return None
+        return max(0.0, self.__rollover - time.time())
+
+    def __write(
+        self,
+        rows: List[EventLogRow],
+        actions: List[_Action],
+        rollup: List[Tuple[Any, ...]],
+    ) -> bool:
+        """Insert a batch of records in a single transaction"""
+        db = self.__writer_db
+        expired: List[EventLogEntry] = []
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                packed = []
+                for event_id, source, event, start_time, extra in rows:
+                    infos = self.__codec.pack(extra, db) if extra else ""
+                    rowid = db.execute(
+                        "INSERT INTO event_log VALUES (?, ?, ?, ?, ?)",
+                        (event_id, source, event, start_time, infos),
+                    ).lastrowid
+                    if isinstance(infos, bytes):
+                        packed.append((rowid, event_id, source, event, infos))
+                if self.__fts and packed:
+                    self.__index_packed(db, packed)
+                db.executemany(
+                    """
+                    INSERT INTO event_rollup VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (event_name, hour) DO UPDATE SET
+                        count = count + excluded.count,
+                        first_time = min(first_time, excluded.first_time),
+                        last_time = max(last_time, excluded.last_time),
+                        duration_total =
+                            duration_total + excluded.duration_total,
+                        duration_count =
+                            duration_count + excluded.duration_count
+                    """,
+                    rollup,
+                )
+                newest = db.execute(
+                    "SELECT MAX(rowid) FROM event_log"
+                ).fetchone()[0]
+                oldest = (newest or 0) - self.__max_entries
+                if self.__archive is not None:
+                    expired = self.__entries(
+                        db,
+                        "rowid <= ? AND start_time >= ?",
+                        (oldest, self.__archived_until(db)),
+                    )
+                if self.__fts:
+                    self.__index_packed(
+                        db,
+                        db.execute(
+                            f"""
+                            SELECT rowid, {", ".join(SEARCH_COLUMNS)}
+                            FROM event_log
+                            WHERE rowid <= ?
+                            AND typeof(additional_infos) = 'blob'
+                            """,
+                            (oldest,),
+                        ).fetchall(),
+                        delete=True,
+                    )
+                db.execute("DELETE FROM event_log WHERE rowid <= ?", (oldest,))
+                if actions:
+                    db.executemany(
+                        f"""
+                        INSERT INTO action_log ({", ".join(_Action._fields)})
+                        VALUES (?, ?, ?, ?, ?, ?)
+                        """,
+                        actions,
+                    )
+                    db.execute(
+                        """
+                        DELETE FROM action_log WHERE rowid <=
+                            (SELECT MAX(rowid) FROM action_log) - ?
+                        """,
+                        (self.__max_actions,),
+                    )
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                # Forget keys that were added in the failed transaction
+                self.__codec.reload(db)
+                raise
+        except sqlite3.Error:
+            LOGGER.exception(
+                "Cannot insert %d event(s) into event log", len(rows)
+            )
+            return False
+        if expired:
+            self.__append_archive(expired)
+        return True
+
+    def __archive_past_days(self) -> None:
+        """Archive the events before today that are not archived yet"""
+        assert self.__archive is not None
+        db = self.__writer_db
+        now = time.time()
+        today = day_start(now)
+        try:
+            entries = self.__entries(
+                db,
+                "start_time >= ? AND start_time < ?",
+                (self.__archived_until(db), today),
+            )
+            if entries and not self.__append_archive(entries):
+                # Try again with the next batch
+                return
+            db.execute(
+                "INSERT INTO metadata VALUES ('archived_until', ?)", (today,)
+            )
+        except sqlite3.Error:
+            LOGGER.exception("Cannot archive event log")
+            return
+        try:
+            self.__archive.compact(before=datetime.date.fromtimestamp(now))
+        except OSError:
+            LOGGER.exception("Cannot compact event archive")
+        self.__rollover = next_day_start(now)
+
+    def __append_archive(self, entries: List[EventLogEntry]) -> bool:
+        assert self.__archive is not None
+        try:
+            count = self.__archive.append(entries)
+        except OSError:
+            LOGGER.exception("Cannot archive %d event(s)", len(entries))
+            return False
+        with self.__cond:
+            self.__archived += count
+        return True
+
+    def __entries(
+        self, db: sqlite3.Connection, condition: str, params: Tuple[Any, ...]
+    ) -> List[EventLogEntry]:
+        """Read events in rowid order, for archiving them"""
+        return [
+            EventLogEntry(
+                {
+                    "event_id": row[0],
+                    "fired_by": row[1],
+                    "event_name": row[2],
+                    "start_time": row[3],
+                    "additional_infos": self.__codec.text(row[4], db),
+                }
+            )
+            for row in db.execute(
+                f"""
+                SELECT {", ".join(FIELDS)} FROM event_log
+                WHERE {condition}
+                ORDER BY rowid
+                """,
+                params,
+            )
+        ]
+
+    @staticmethod
+    def __archived_until(db: sqlite3.Connection) -> float:
+        row = db.execute(
+            "SELECT value FROM metadata WHERE key = 'archived_until'"
+        ).fetchone()
+        return float(row[0]) if row else 0.0
+
+
+def _hour(timestamp: float, *, up: bool = False) -> int:
+    """Round ``timestamp`` down (or up) to a full hour"""
+    hour = int(timestamp // 3600 * 3600)
+    if up and hour < timestamp:
+        hour += 3600
+    return hour
+
+
+def _bucket(hour: int, resolution: str) -> float:
+    """Map the start of an hour to its bucket at ``resolution``"""
+    if resolution == "hour":
+        return hour
+    local = time.localtime(hour)
+    if resolution == "day":
+        return time.mktime(local[:3] + (0, 0, 0) + local[6:8] + (-1,))
+    if resolution == "hour_of_day":
+        return local.tm_hour
+    if resolution == "weekday":
+        return local.tm_wday
+    return local.tm_wday * 24 + local.tm_hour
+
+
+def _rollup(batch: Sequence[_Record]) -> List[Tuple[Any, ...]]:
+    """Aggregate a batch of records into rows of the rollup table"""
+    rollup: Dict[Tuple[str, int], List[Any]] = {}
+    for record in batch:
+        if isinstance(record, _Action):
+            continue
+        if isinstance(record, _Finished):
+            name, start_time, duration = record
+        else:
+            name, start_time, duration = record[2], record[3], None
+        entry = rollup.get((name, _hour(start_time)))
+        if entry is None:
+            entry = rollup[name, _hour(start_time)] = [
+                0, start_time, start_time, 0.0, 0
+            ]
+        if duration is None:
+            entry[0] += 1
+        else:
+            entry[3] += duration
+            entry[4] += 1
+        entry[1] = min(entry[1], start_time)
+        entry[2] = max(entry[2], start_time)
+    return [key + tuple(entry) for key, entry in rollup.items()]
+
+
+def _matches(entry: Mapping[str, Any], terms: Sequence[SearchTerm]) -> bool:
+    """Whether an event matches all search terms, like `__conditions`"""
+    for column, text in terms:
+        text = text.casefold()
+        if not any(
+            text in str(entry[c]).casefold()
+            for c in ((column,) if column else SEARCH_COLUMNS)
+        ):
+            return False
+    return True
+
+
+def _where(conditions: Sequence[str]) -> str:
+    return f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+
+def _encode_cursor(value: Any, rowid: int) -> str:
+    data = json.dumps([value, rowid]).encode("utf-8")
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[Any, int]:
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        value, rowid = json.loads(data)
+    except (TypeError, ValueError) as err:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from err
+    if not isinstance(rowid, int):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return value, rowid
@@ -0,0 +1,295 @@
+"""Schema migrations of the event log database
+
+The schema version is kept in the ``db_version`` key of the
+``metadata`` table.  At startup, `migrate` applies all migrations with
+a higher version in order, each in its own transaction together with
+the update of ``db_version``.  A failing migration is rolled back and
+aborts the startup, so that it is retried with the next start.
+
+Work that takes long on large databases, like filling a new table from
+existing events or building an index, is split off into a migration's
+``backfill``.  The
+event log's writer thread calls `backfill_step` between its batches
+until all backfills are done.  Their progress is kept in the metadata
+keys ``backfill_version`` and ``backfill_position``, so that they
+resume after a restart.
+
+Migrations must tolerate databases that already contain (parts of)
+their changes, as the schema used to be extended without bumping
+``db_version``.
+"""
+import contextlib
+import logging
+import sqlite3
+from typing import Callable, Iterator, NamedTuple, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+# Number of rowids processed per backfill step
+BACKFILL_CHUNK = 500
+
+
+class Migration(NamedTuple):
+    """A change of the event log schema
+
+    Attributes:
+        version: The ``db_version`` after applying the migration
+        description: A short summary for the log
+        apply: Changes the schema; runs inside a transaction
+        backfill: Called repeatedly in the background, each time in a
+            transaction, with the position returned by the previous
+            call (starting at 0), until it returns None.
+    """
+
+    version: int
+    description: str
+    apply: Callable[[sqlite3.Connection], None]
+    backfill: Optional[
+        Callable[[sqlite3.Connection, int], Optional[int]]
+    ] = None
+
+
+def _initial_schema(db: sqlite3.Connection) -> None:
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS event_log (
+            event_id TEXT,
+            fired_by TEXT,
+            event_name TEXT,
+            start_time REAL,
+            additional_infos TEXT
+        )"""
+    )
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS action_log (
+            event_id TEXT,
+            action_name TEXT,
+            start_time REAL,
+            action_result TEXT
+        )"""
+    )
+
+
+_INDEXES = (
+    "event_log_start_time ON event_log (start_time)",
+    "action_log_event_id ON action_log (event_id)",
+)
+
+
+def _add_indexes(db: sqlite3.Connection) -> None:
+    # The indexes are built in the background, one per step
+    del db
+
+
+def _build_indexes(db: sqlite3.Connection, position: int) -> Optional[int]:
+    db.execute(f"CREATE INDEX IF NOT EXISTS {_INDEXES[position]}")
+    position += 1
+    return position if position < len(_INDEXES) else None
+
+
+def _add_action_details(db: sqlite3.Connection) -> None:
+    columns = {row[1] for row in db.execute("PRAGMA table_info(action_log)")}
+    for column, type_ in (("duration", "REAL"), ("exception", "TEXT")):
+        if column not in columns:
+            db.execute(f"ALTER TABLE action_log ADD COLUMN {column} {type_}")
+
+
+def _add_rollup(db: sqlite3.Connection) -> None:
+    exists = db.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'event_rollup'"
+    ).fetchone()
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS event_rollup (
+            event_name TEXT,
+            hour INTEGER,
+            count INTEGER,
+            first_time REAL,
+            last_time REAL,
+            duration_total REAL,
+            duration_count INTEGER,
+            PRIMARY KEY (event_name, hour)
+        ) WITHOUT ROWID"""
+    )
+    # Events logged from now on are counted by the writer; count the
+    # existing ones in the background, unless that happened already
+    db.execute(
+        """
+        INSERT INTO metadata VALUES (
+            'rollup_backfill_until',
+            (SELECT IFNULL(MAX(rowid), 0) FROM event_log)
+        )"""
+        if not exists
+        else "INSERT INTO metadata VALUES ('rollup_backfill_until', 0)"
+    )
+
+
+def _backfill_rollup(db: sqlite3.Connection, position: int) -> Optional[int]:
+    until = int(_get(db, "rollup_backfill_until") or 0)
+    if position >= until:
+        db.execute("DELETE FROM metadata WHERE key = 'rollup_backfill_until'")
+        return None
+    end = min(position + BACKFILL_CHUNK, until)
+    db.execute(
+        """
+        INSERT INTO event_rollup
+        SELECT
+            event_name,
+            CAST(start_time / 3600 AS INTEGER) * 3600,
+            COUNT(*),
+            MIN(start_time),
+            MAX(start_time),
+            0,
+            0
+        FROM event_log
+        WHERE rowid > ? AND rowid <= ?
+        GROUP BY 1, 2
+        ON CONFLICT (event_name, hour) DO UPDATE SET
+            count = count + excluded.count,
+            first_time = min(first_time, excluded.first_time),
+            last_time = max(last_time, excluded.last_time)
+        """,
+        (position, end),
+    )
+    return end
+
+
+def _add_info_keys(db: sqlite3.Connection) -> None:
+    db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS info_keys (
+            id INTEGER PRIMARY KEY,
+            key TEXT UNIQUE NOT NULL
+        )"""
+    )
+
+
+MIGRATIONS = (
+    Migration(1, "Create event and action log", _initial_schema),
+    Migration(
+        2,
+        "Index event times and action event IDs",
+        _add_indexes,
+        _build_indexes,
+    ),
+    Migration(
+        3, "Record action durations and exceptions", _add_action_details
+    ),
+    Migration(4, "Count events per hour", _add_rollup, _backfill_rollup),
+    Migration(5, "Add key dictionary for packed infos", _add_info_keys),
+)
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def get_version(db: sqlite3.Connection) -> int:
+    """The schema version of the database (0 if it is empty)"""
+    try:
+        return int(_get(db, "db_version") or 0)
+    except sqlite3.OperationalError:
+        # No metadata table yet
+        return 0
+
+
+def migrate(db: sqlite3.Connection) -> None:
+    """Apply all pending migrations
+
+    Raises:
+        sqlite3.Error: A migration failed; it was rolled back
+    """
+    version = get_version(db)
+    if version > LATEST_VERSION:
+        LOGGER.warning(
+            "Event log database has version %d, expected at most %d",
+            version,
+            LATEST_VERSION,
+        )
+        return
+    for migration in MIGRATIONS:
+        if migration.version <= version:
+            continue
+        LOGGER.info(
+            "Migrating event log to version %d: %s",
+            migration.version,
+            migration.description,
+        )
+        with _transaction(db):
+            db.execute(
+                """
+                CREATE TABLE IF NOT EXISTS metadata (
+                    key TEXT PRIMARY KEY ON CONFLICT REPLACE,
+                    value TEXT
+                )"""
+            )
+            migration.apply(db)
+            _set(db, "db_version", migration.version)
+
+
+def backfill_step(db: sqlite3.Connection) -> bool:
+    """Execute one step of the oldest pending backfill
+
+    Returns:
+        False if no backfill is pending (anymore), or if it failed;
+        True if this function should be called again.
+    """
+    version = get_version(db)
+    done = int(_get(db, "backfill_version") or 0)
+    pending = [
+        m
+        for m in MIGRATIONS
+        if m.backfill is not None and done < m.version <= version
+    ]
+    if not pending:
+        return False
+    migration = pending[0]
+    assert migration.backfill is not None
+    try:
+        with _transaction(db):
+            position = migration.backfill(
+                db, int(_get(db, "backfill_position") or 0)
+            )
+            if position is None:
+                _set(db, "backfill_version", migration.version)
+                db.execute(
+                    "DELETE FROM metadata WHERE key = 'backfill_position'"
+                )
+            else:
+                _set(db, "backfill_position", position)
+    except sqlite3.Error:
+        LOGGER.exception(
+            "Cannot migrate event log to version %d in the background",
+            migration.version,
+        )
+        return False
+    if position is None:
+        LOGGER.info(
+            "Finished migrating event log to version %d", migration.version
+        )
+    return True
+
+
+@contextlib.contextmanager
+def _transaction(db: sqlite3.Connection) -> Iterator[None]:
+    """Run the ``with`` block in an immediate transaction
+
+    Unlike the connection's context manager, this also works for
+    connections in autocommit mode (``isolation_level=None``).
+    """
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+    except BaseException:
+        db.execute("ROLLBACK")
+        raise
+    db.execute("COMMIT")
+
+
+def _get(db: sqlite3.Connection, key: str) -> Optional[str]:
+    row = db.execute(
+        "SELECT value FROM metadata WHERE key = ?", (key,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def _set(db: sqlite3.Connection, key: str, value: object) -> None:
+    db.execute("INSERT INTO metadata VALUES (?, ?)", (key, str(value)))
@@ -0,0 +1,230 @@
+"""Compact binary encoding of the additional infos of logged events"""
+import json
+import sqlite3
+import struct
+import threading
+from typing import Any, Callable, Dict, Mapping, Optional, Tuple, Union
+
+# The first byte of every packed value identifies its format
+SCHEMA_ID = 1
+
+
+class UnpackableError(ValueError):
+    """A value cannot be represented in the packed format"""
+
+
+class InfoCodec:
+    """Packs JSON-like dicts into a msgpack-style binary format
+
+    Packed values consist of the `SCHEMA_ID` byte followed by the value
+    in msgpack encoding, except that map keys are encoded as integer
+    IDs into a key dictionary.  The dictionary is kept in the
+    ``info_keys`` table, so that each distinct key is stored only once.
+
+    Packing a value and decoding it with `text` yields the same JSON
+    text as ``json.dumps(value, sort_keys=True)``.
+    """
+
+    def __init__(self, db: sqlite3.Connection) -> None:
+        self.__ids: Dict[str, int] = {}
+        self.__keys: Dict[int, str] = {}
+        self.__lock = threading.Lock()
+        self.reload(db)
+
+    def reload(self, db: sqlite3.Connection) -> None:
+        """Re-read the key dictionary from the database"""
+        rows = db.execute("SELECT id, key FROM info_keys").fetchall()
+        with self.__lock:
+            self.__keys = dict(rows)
+            self.__ids = {key: id_ for id_, key in rows}
+
+    def pack(
+        self, value: Mapping[str, Any], db: sqlite3.Connection
+    ) -> Union[bytes, str]:
+        """Pack ``value``, adding new keys to the dictionary in ``db``
+
+        Values that cannot be packed (e.g. dicts with non-string keys)
+        are returned as JSON text instead.
+        """
+        out = bytearray((SCHEMA_ID,))
+        try:
+            _pack(value, out, lambda key: self.__key_id(key, db))
+        except UnpackableError:
+            return json.dumps(value, sort_keys=True, default=str)
+        return bytes(out)
+
+    def unpack(self, data: bytes, db: sqlite3.Connection) -> Any:
+        """Decode a packed value
+
+        Args:
+            db: Used to reload the key dictionary if a key is unknown
+        """
+        if data[0] != SCHEMA_ID:
+            raise ValueError(f"Unknown schema ID {data[0]}")
+        try:
+            value, _ = _unpack(data, 1, self.__keys)
+        except KeyError:
+            # A key that was added through another connection
+            self.reload(db)
+            value, _ = _unpack(data, 1, self.__keys)
+        return value
+
+    def text(
+        self, data: Union[bytes, str, None], db: sqlite3.Connection
+    ) -> str:
+        """Return the JSON text of a stored value, packed or not"""
+        if isinstance(data, bytes):
+            return json.dumps(self.unpack(data, db), sort_keys=True)
+        return data or ""
+
+    def __key_id(self, key: str, db: sqlite3.Connection) -> int:
+        try:
+            return self.__ids[key]
+        except KeyError:
+            pass
+        id_ = db.execute(
+            "INSERT INTO info_keys (key) VALUES (?)", (key,)
+        ).lastrowid
+        with self.__lock:
+            self.__keys = {**self.__keys, id_: key}
+            self.__ids[key] = id_
+        return id_
+
+
+def _pack(value: Any, out: bytearray, key_id: Callable[[str], int]) -> None:
+    # pylint: disable=too-many-branches
+    if value is None:
+        out.append(0xC0)
+    elif value is True:
+        out.append(0xC3)
+    elif value is False:
+        out.append(0xC2)
+    elif isinstance(value, int):
+        _pack_int(int(value), out)
+    elif isinstance(value, float):
+        out.append(0xCB)
+        out += struct.pack(">d", value)
+    elif isinstance(value, str):
+        data = value.encode("utf-8")
+        _pack_header(len(data), out, 0xA0, 32, 0xD9, 0xDA, 0xDB)
+        out += data
+    elif isinstance(value, (list, tuple)):
+        _pack_header(len(value), out, 0x90, 16, None, 0xDC, 0xDD)
+        for item in value:
+            _pack(item, out, key_id)
+    elif isinstance(value, dict):
+        _pack_header(len(value), out, 0x80, 16, None, 0xDE, 0xDF)
+        for key, item in value.items():
+            if not isinstance(key, str):
+                raise UnpackableError(f"Cannot pack key {key!r}")
+            _pack_int(key_id(key), out)
+            _pack(item, out, key_id)
+    else:
+        raise UnpackableError(f"Cannot pack {type(value).__name__}")
+
+
+def _pack_int(value: int, out: bytearray) -> None:
+    if 0 <= value < 0x80:
+        out.append(value)
+    elif -0x20 <= value < 0:
+        out.append(value & 0xFF)
+    elif -(2 ** 63) <= value < 2 ** 63:
+        out.append(0xD3)
+        out += struct.pack(">q", value)
+    elif 0 <= value < 2 ** 64:
+        out.append(0xCF)
+        out += struct.pack(">Q", value)
+    else:
+        raise UnpackableError(f"Integer {value} is out of range")
+
+
+def _pack_header(
+    length: int,
+    out: bytearray,
+    fix: int,
+    fix_limit: int,
+    code8: Optional[int],
+    code16: int,
+    code32: int,
+) -> None:
+    if length < fix_limit:
+        out.append(fix | length)
+    elif code8 is not None and length < 0x100:
+        out += bytes((code8, length))
+    elif length < 0x10000:
+        out.append(code16)
+        out += struct.pack(">H", length)
+    else:
+        out.append(code32)
+        out += struct.pack(">I", length)
+
+
+_FIXED = {
+    0xC0: None,
+    0xC2: False,
+    0xC3: True,
+}
+_NUMBERS = {
+    0xCB: struct.Struct(">d"),
+    0xCF: struct.Struct(">Q"),
+    0xD3: struct.Struct(">q"),
+}
+_LENGTHS = {
+    0xD9: ("str", struct.Struct(">B")),
+    0xDA: ("str", struct.Struct(">H")),
+    0xDB: ("str", struct.Struct(">I")),
+    0xDC: ("array", struct.Struct(">H")),
+    0xDD: ("array", struct.Struct(">I")),
+    0xDE: ("map", struct.Struct(">H")),
+    0xDF: ("map", struct.Struct(">I")),
+}
+
+
+def _read(data: bytes, pos: int) -> Tuple[str, Any, int]:
+    """Read the header at ``pos``
+
+    Returns:
+        The kind of value ("value", "str", "array" or "map"), the value
+        or length, and the position after the header.
+    """
+    code = data[pos]
+    pos += 1
+    if code < 0x80:
+        return "value", code, pos
+    if code >= 0xE0:
+        return "value", code - 0x100, pos
+    if code < 0x90:
+        return "map", code & 0x0F, pos
+    if code < 0xA0:
+        return "array", code & 0x0F, pos
+    if code < 0xC0:
+        return "str", code & 0x1F, pos
+    if code in _FIXED:
+        return "value", _FIXED[code], pos
+    if code in _NUMBERS:
+        number = _NUMBERS[code]
+        return "value", number.unpack_from(data, pos)[0], pos + number.size
+    if code in _LENGTHS:
+        kind, length = _LENGTHS[code]
+        return kind, length.unpack_from(data, pos)[0], pos + length.size
+    raise ValueError(f"Invalid type code {code:#x} at {pos - 1}")
+
+
+def _unpack(data: bytes, pos: int, keys: Mapping[int, str]) -> Tuple[Any, int]:
+    kind, value, pos = _read(data, pos)
+    if kind == "value":
+        return value, pos
+    if kind == "str":
+        return data[pos : pos + value].decode("utf-8"), pos + value
+    if kind == "array":
+        items = []
+        for _ in range(value):
+            item, pos = _unpack(data, pos, keys)
+            items.append(item)
+        return items, pos
+    result = {}
+    for _ in range(value):
+        key, pos = _unpack(data, pos, keys)
+        result[keys[key]], pos = _unpack(data, pos, keys)
+    return result, pos
+
@@ -0,0 +1,129 @@
+"""Lookup of wildcard event subscriptions"""
+import fnmatch
+import itertools
+import re
+from typing import Dict, Iterator, List, Optional, Pattern, Tuple
+
+WILDCARDS = frozenset("*?[")
+# Subscriptions starting with this prefix are patterns; all other names,
+# including those containing wildcard characters, are literal
+PREFIX = "pattern:"
+
+
+def is_pattern(name: str) -> bool:
+    """Whether ``name`` subscribes to a pattern rather than an event"""
+    return name.startswith(PREFIX)
+
+
+def to_glob(name: str) -> str:
+    """The shell-style pattern of the pattern subscription ``name``"""
+    return name[len(PREFIX) :]
+
+
+def from_glob(pattern: str) -> str:
+    """The subscription name for the shell-style ``pattern``"""
+    return PREFIX + pattern
+
+
+def literal_prefix(pattern: str) -> str:
+    """The part of ``pattern`` before its first wildcard"""
+    for i, char in enumerate(pattern):
+        if char in WILDCARDS:
+            return pattern[:i]
+    return pattern
+
+
+class _Node:
+    __slots__ = ("children", "patterns")
+
+    def __init__(self) -> None:
+        self.children: Dict[str, _Node] = {}
+        self.patterns: Dict[str, Tuple[int, Pattern[str]]] = {}
+
+
+class PatternIndex:
+    """A prefix trie of shell-style event name patterns
+
+    Patterns may use the wildcards ``*``, ``?`` and ``[...]`` as
+    understood by `fnmatch`.  Each pattern is stored at the trie node of
+    its literal prefix (the part before the first wildcard), so that
+    looking up an event name only needs to test the patterns along its
+    path through the trie.
+    """
+
+    def __init__(self) -> None:
+        self.__root = _Node()
+        self.__seq = itertools.count()
+        self.__count = 0
+
+    def __len__(self) -> int:
+        return self.__count
+
+    def __iter__(self) -> Iterator[str]:
+        stack = [self.__root]
+        while stack:
+            node = stack.pop()
+            yield from node.patterns
+            stack.extend(node.children.values())
+
+    def __contains__(self, pattern: object) -> bool:
+        if not isinstance(pattern, str):
+            return False
+        node = self.__find(literal_prefix(pattern))
+        return node is not None and pattern in node.patterns
+
+    def add(self, pattern: str) -> None:
+        """Add ``pattern`` to the index (no-op if already present)"""
+        node = self.__root
+        for char in literal_prefix(pattern):
+            node = node.children.setdefault(char, _Node())
+        if pattern not in node.patterns:
+            regex = re.compile(fnmatch.translate(pattern))
+            node.patterns[pattern] = (next(self.__seq), regex)
+            self.__count += 1
+
+    def remove(self, pattern: str) -> None:
+        """Remove ``pattern`` from the index"""
+        prefix = literal_prefix(pattern)
+        path = [self.__root]
+        for char in prefix:
+            child = path[-1].children.get(char)
+            if child is None:
+                return
+            path.append(child)
+        if path[-1].patterns.pop(pattern, None) is None:
+            return
+        self.__count -= 1
+        # Prune nodes that became empty
+        for depth in range(len(prefix), 0, -1):
+            node = path[depth]
+            if node.children or node.patterns:
+                break
+            del path[depth - 1].children[prefix[depth - 1]]
+
+    def match(self, name: str) -> List[str]:
+        """All patterns that match ``name``, in the order they were added"""
+        found = []
+        node: Optional[_Node] = self.__root
+        for depth in range(len(name) + 1):
+            assert node is not None
+            found.extend(
+                (seq, pattern)
+                for pattern, (seq, regex) in node.patterns.items()
+                if regex.match(name)
+            )
+            if depth == len(name):
+                break
+            node = node.children.get(name[depth])
+            if node is None:
+                break
+        return [pattern for _, pattern in sorted(found)]
+
+    def __find(self, prefix: str) -> Optional[_Node]:
+        node = self.__root
+        for char in prefix:
+            child = node.children.get(char)
+            if child is None:
+                return None
+            node = child
+        return node
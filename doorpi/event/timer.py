@@ -0,0 +1,214 @@
+"""A hierarchical timer wheel for in-process scheduling"""
+import logging
+import math
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Timer:
+    """A scheduled callback, as returned by the `TimerWheel`"""
+
+    __slots__ = ("when", "interval", "callback", "args", "cancelled", "_tick")
+
+    def __init__(
+        self,
+        when: float,
+        interval: Optional[float],
+        callback: Callable[..., Any],
+        args: Any,
+    ) -> None:
+        self.when = when
+        self.interval = interval
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+        self._tick = 0
+
+    def cancel(self) -> None:
+        """Prevent the timer from firing (again)"""
+        self.cancelled = True
+
+    def __repr__(self) -> str:
+        return (
+            f"<Timer at {self.when:.3f}"
+            f"{f' every {self.interval}s' if self.interval else ''}"
+            f" for {self.callback!r}>"
+        )
+
+
+class TimerWheel:
+    """Schedules callbacks without threads
+
+    Timers are kept in ``levels`` wheels of ``slots`` slots each.  Slots
+    of the lowest level span ``resolution`` seconds, slots of each
+    higher level span a full turn of the level below.  Timers are
+    moved down one level whenever the lower wheel completes a turn, so
+    that inserting, cancelling and expiring a timer is O(1) regardless
+    of the number of timers.
+
+    The wheel does not run by itself.  Its owner must call `advance`
+    regularly, which executes the callbacks of all expired timers in
+    the calling thread.
+    """
+
+    def __init__(
+        self,
+        resolution: float = 0.05,
+        *,
+        slots: int = 64,
+        levels: int = 4,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.__resolution = resolution
+        self.__slots = slots
+        self.__clock = clock
+        self.__wheels: List[List[List[Timer]]] = [
+            [[] for _ in range(slots)] for _ in range(levels)
+        ]
+        self.__overflow: List[Timer] = []
+        self.__tick = self.__ticks(clock())
+        self.__count = 0
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of pending timers (including cancelled ones)"""
+        return self.__count
+
+    def schedule_at(
+        self, when: float, callback: Callable[..., Any], *args: Any
+    ) -> Timer:
+        """Call ``callback(*args)`` at the UNIX timestamp ``when``"""
+        timer = Timer(when, None, callback, args)
+        with self.__lock:
+            self.__insert(timer)
+        return timer
+
+    def schedule_every(
+        self,
+        interval: float,
+        callback: Callable[..., Any],
+        *args: Any,
+        start: Optional[float] = None,
+    ) -> Timer:
+        """Call ``callback(*args)`` every ``interval`` seconds
+
+        Args:
+            start: The time of the first call (default: after one
+                interval). Missed calls are skipped, not made up for.
+        """
+        if interval <= 0:
+            raise ValueError("Interval must be positive")
+        if start is None:
+            start = self.__clock() + interval
+        timer = Timer(start, interval, callback, args)
+        with self.__lock:
+            self.__insert(timer)
+        return timer
+
+    def advance(self, now: Optional[float] = None) -> int:
+        """Execute all timers that expired until ``now``
+
+        Returns:
+            The number of executed callbacks.
+        """
+        if now is None:
+            now = self.__clock()
+        target = self.__ticks(now)
+        with self.__lock:
+            if not 0 <= target - self.__tick < self.__range:
+                # The clock jumped; re-sort all timers from scratch
+                due = self.__rebuild(target)
+            else:
+                due = []
+                while self.__tick < target:
+                    self.__tick += 1
+                    due.extend(self.__expire())
+            self.__count -= len(due)
+
+        executed = 0
+        for timer in due:
+            if timer.cancelled:
+                continue
+            try:
+                timer.callback(*timer.args)
+            except Exception:  # pylint: disable=broad-except
+                LOGGER.exception("Error executing %r", timer)
+            executed += 1
+            if timer.interval and not timer.cancelled:
+                missed = math.floor((now - timer.when) / timer.interval)
+                timer.when += timer.interval * (max(0, missed) + 1)
+                with self.__lock:
+                    self.__insert(timer)
+        return executed
+
+    @property
+    def __range(self) -> int:
+        return self.__slots ** len(self.__wheels)
+
+    def __ticks(self, timestamp: float) -> int:
+        return math.floor(timestamp / self.__resolution)
+
+    def __insert(self, timer: Timer) -> None:
+        """Sort a timer into its slot; must be called with the lock held"""
+        self.__count += 1
+        tick = math.ceil(timer.when / self.__resolution)
+        self.__place(timer, max(tick, self.__tick + 1))
+
+    def __place(self, timer: Timer, tick: int) -> None:
+        timer._tick = tick  # pylint: disable=protected-access
+        delta = tick - self.__tick
+        span = 1
+        for wheel in self.__wheels:
+            if delta < span * self.__slots:
+                wheel[(tick // span) % self.__slots].append(timer)
+                return
+            span *= self.__slots
+        self.__overflow.append(timer)
+
+    def __expire(self) -> List[Timer]:
+        """Cascade higher wheels and return the timers of the current tick"""
+        # pylint: disable=protected-access
+        tick = self.__tick
+        span = self.__range
+        if tick % span == 0:
+            overflow, self.__overflow = self.__overflow, []
+            for timer in overflow:
+                self.__place(timer, timer._tick)
+        for level in range(len(self.__wheels) - 1, 0, -1):
+            span //= self.__slots
+            if tick % span == 0:
+                slot = (tick // span) % self.__slots
+                timers = self.__wheels[level][slot]
+                self.__wheels[level][slot] = []
+                for timer in timers:
+                    self.__place(timer, timer._tick)
+
+        slot = tick % self.__slots
+        due, self.__wheels[0][slot] = self.__wheels[0][slot], []
+        return due
+
+    def __rebuild(self, target: int) -> List[Timer]:
+        timers = self.__overflow
+        self.__overflow = []
+        for wheel in self.__wheels:
+            for slot in wheel:
+                timers.extend(slot)
+                slot.clear()
+        self.__tick = target
+        now = target * self.__resolution
+        due = []
+        for timer in timers:
+            if timer.interval and timer.when - now > timer.interval:
+                # After jumping back, keep the phase but not the delay
+                skip = math.floor((timer.when - now) / timer.interval)
+                timer.when -= timer.interval * skip
+            tick = math.ceil(timer.when / self.__resolution)
+            if tick <= target:
+                due.append(timer)
+            else:
+                self.__place(timer, tick)
+        due.sort(key=lambda t: t.when)
+        return due
@@ -0,0 +1,212 @@
+"""Lightweight tracing of event dispatch and related activity
+
+A span describes one unit of work, like dispatching an event, executing
+an action, a SIP call changing its state or an outbound HTTP request.
+Spans that are started while another span is active become its
+children, so that the causal chain from e.g. a key press to the phone
+ringing can be reconstructed offline.  The active span follows the
+code through the event handler's worker pools and event loop.
+
+Finished spans are appended to a JSON lines file, one object per span
+with these keys: ``trace`` (the ID of the root span), ``span``,
+``parent`` (None for root spans), ``kind``, ``name``, ``start`` (UNIX
+timestamp), ``duration`` (seconds), ``error`` (exception class name or
+None) and ``attrs``.  Spans of events dispatched by the event handler
+use the event ID as their span ID.
+
+Tracing is disabled unless `configure` is called with a path.
+"""
+import contextlib
+import contextvars
+import fnmatch
+import functools
+import inspect
+import json
+import logging
+import logging.handlers
+import pathlib
+import random
+import re
+import secrets
+import time
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    TypeVar,
+)
+
+_T = TypeVar("_T", bound=Callable[..., Any])
+
+
+class SpanContext(NamedTuple):
+    """Identifies a span and the trace it belongs to"""
+
+    trace_id: str
+    span_id: str
+    sampled: bool
+
+
+class Tracer:
+    """Writes finished spans to a rotating JSON lines file"""
+
+    def __init__(
+        self,
+        path: pathlib.Path,
+        *,
+        sample_rate: float = 1.0,
+        max_bytes: int = 1024 * 1024,
+        backups: int = 3,
+        exclude: Iterable[str] = (),
+    ) -> None:
+        self.__sample_rate = sample_rate
+        self.__exclude = [re.compile(fnmatch.translate(p)) for p in exclude]
+        self.__handler = logging.handlers.RotatingFileHandler(
+            path,
+            maxBytes=max_bytes,
+            backupCount=backups,
+            encoding="utf-8",
+            delay=True,
+        )
+
+    def sample(self, name: str) -> bool:
+        """Decide whether a new trace starting with ``name`` is recorded"""
+        if any(regex.match(name) for regex in self.__exclude):
+            return False
+        return random.random() < self.__sample_rate
+
+    def write(self, span: dict) -> None:
+        """Append a finished span to the trace file"""
+        self.__handler.handle(
+            logging.makeLogRecord({"msg": json.dumps(span, default=str)})
+        )
+
+    def close(self) -> None:
+        """Close the trace file"""
+        self.__handler.close()
+
+
+_CURRENT: "contextvars.ContextVar[Optional[SpanContext]]" = (
+    contextvars.ContextVar("doorpi_trace_span", default=None)
+)
+_TRACER: Optional[Tracer] = None
+
+
+def configure(path: Optional[pathlib.Path], **kw: Any) -> None:
+    """Enable tracing to ``path``, or disable tracing if it is None
+
+    Keyword arguments are passed on to `Tracer`.
+    """
+    global _TRACER  # pylint: disable=global-statement
+    old, _TRACER = _TRACER, (Tracer(path, **kw) if path else None)
+    if old is not None:
+        old.close()
+
+
+def current() -> Optional[SpanContext]:
+    """Return the currently active span"""
+    return _CURRENT.get()
+
+
+@contextlib.contextmanager
+def attach(context: Optional[SpanContext]) -> Iterator[None]:
+    """Make ``context`` the active span within the ``with`` block"""
+    if context is None:
+        yield
+        return
+    token = _CURRENT.set(context)
+    try:
+        yield
+    finally:
+        _CURRENT.reset(token)
+
+
+def bind(func: _T) -> _T:
+    """Bind ``func`` to the currently active span
+
+    The returned callable activates the span that was active while
+    calling `bind`, which allows handing work to other threads or
+    tasks without losing the causal chain.
+    """
+    context = _CURRENT.get()
+    if context is None:
+        return func
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args: Any, **kw: Any) -> Any:
+            with attach(context):
+                return await func(*args, **kw)
+
+        return async_wrapper  # type: ignore
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kw: Any) -> Any:
+        with attach(context):
+            return func(*args, **kw)
+
+    return wrapper  # type: ignore
+
+
+@contextlib.contextmanager
+def span(
+    kind: str, name: str, *, span_id: Optional[str] = None, **attrs: Any
+) -> Iterator[Optional[SpanContext]]:
+    """Record the ``with`` block as a span
+
+    Args:
+        kind: The kind of span, e.g. "event", "action", "sip" or "http"
+        name: A description of the span, like the event name
+        span_id: The ID of the new span (default: a random ID)
+        attrs: Additional information to record with the span
+    """
+    tracer = _TRACER
+    if tracer is None:
+        yield None
+        return
+
+    parent = _CURRENT.get()
+    if parent is None:
+        span_id = span_id or secrets.token_hex(4)
+        context = SpanContext(span_id, span_id, tracer.sample(name))
+    elif parent.sampled:
+        span_id = span_id or secrets.token_hex(4)
+        context = SpanContext(parent.trace_id, span_id, True)
+    else:
+        context = parent
+
+    token = _CURRENT.set(context)
+    if not context.sampled:
+        try:
+            yield context
+        finally:
+            _CURRENT.reset(token)
+        return
+
+    start = time.time()
+    started = time.perf_counter()
+    error = None
+    try:
+        yield context
+    except BaseException as err:
+        error = type(err).__name__
+        raise
+    finally:
+        _CURRENT.reset(token)
+        tracer.write(
+            {
+                "trace": context.trace_id,
+                "span": context.span_id,
+                "parent": parent.span_id if parent else None,
+                "kind": kind,
+                "name": name,
+                "start": start,
+                "duration": time.perf_counter() - started,
+                "error": error,
+                "attrs": attrs,
+            }
+        )
@@ -0,0 +1,187 @@
+"""Enforcement of per-action execution timeouts"""
+import asyncio
+import concurrent.futures
+import contextvars
+import fnmatch
+import logging
+import re
+import threading
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    Optional,
+    Pattern,
+    Set,
+    Tuple,
+)
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ActionTimeoutError(Exception):
+    """Raised when an action did not finish within its timeout"""
+
+    def __init__(self, action: Any, timeout: float, cancelled: bool) -> None:
+        super().__init__(
+            f"{action} did not finish within {timeout}s and was"
+            f" {'cancelled' if cancelled else 'abandoned'}"
+        )
+        self.action = action
+        self.timeout = timeout
+        self.cancelled = cancelled
+
+
+class ActionWatchdog:
+    """Runs actions with a deadline and abandons them on overruns
+
+    Each action is assigned the timeout of the first pattern that
+    matches its action string (``repr(action)``), or the default
+    timeout if none does.  A timeout of 0 disables the watchdog for
+    that action, which is then called directly.
+
+    Timed actions are run in a separate thread pool while the caller
+    waits for their completion.  If an action does not finish in
+    time, the caller gives up waiting and `ActionTimeoutError` is
+    raised.  Actions that have not started yet are cancelled, running
+    ones are abandoned: Their thread stays busy until they return, but
+    the caller can continue with the next action.  Once abandoned
+    actions block all threads of the pool, the pool is replaced by a
+    new one, so that hung actions cannot starve all later ones.
+    """
+
+    def __init__(
+        self,
+        default: float,
+        patterns: Mapping[str, float],
+        workers: int,
+        *,
+        name: str,
+    ) -> None:
+        self.__default = default
+        self.__patterns: List[Tuple[Pattern[str], float]] = [
+            (re.compile(fnmatch.translate(pattern)), timeout)
+            for pattern, timeout in patterns.items()
+        ]
+        self.__timeouts: Dict[str, float] = {}
+        self.__workers = workers
+        self.__name = name
+        self.__pool: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self.__lock = threading.Lock()
+        # Abandoned actions that still block a thread of the current pool
+        self.__blocked: Set[concurrent.futures.Future] = set()
+        self.__overruns: Dict[str, int] = {}
+        self.__cancelled = 0
+        self.__abandoned = 0
+        self.__replaced = 0
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Number of timeout overruns, in total and per action"""
+        with self.__lock:
+            return {
+                "overruns": sum(self.__overruns.values()),
+                "cancelled": self.__cancelled,
+                "abandoned": self.__abandoned,
+                "replaced_pools": self.__replaced,
+                "actions": dict(self.__overruns),
+            }
+
+    def timeout(self, action: Any) -> float:
+        """The timeout for ``action`` (0 if unlimited)"""
+        key = repr(action)
+        try:
+            return self.__timeouts[key]
+        except KeyError:
+            pass
+        timeout = next(
+            (t for regex, t in self.__patterns if regex.match(key)),
+            self.__default,
+        )
+        self.__timeouts[key] = timeout
+        return timeout
+
+    def call(self, action: Callable[..., Any], *args: Any) -> Any:
+        """Call ``action(*args)``, enforcing its timeout"""
+        timeout = self.timeout(action)
+        if not timeout:
+            return action(*args)
+
+        future = self.__get_pool().submit(
+            contextvars.copy_context().run, action, *args
+        )
+        done, _ = concurrent.futures.wait((future,), timeout)
+        if not done:
+            cancelled = future.cancel()
+            if not cancelled:
+                self.__abandon(future)
+            self.__overrun(action, timeout, cancelled)
+        return future.result()
+
+    async def wait(
+        self, action: Any, awaitable: Awaitable[Any], *, cancellable: bool
+    ) -> Any:
+        """Await ``awaitable`` on behalf of ``action``, enforcing its timeout
+
+        Args:
+            cancellable: Whether cancelling ``awaitable`` actually stops
+                the action, as opposed to abandoning it in a thread.
+        """
+        timeout = self.timeout(action)
+        if not timeout:
+            return await awaitable
+
+        task = asyncio.ensure_future(awaitable)
+        done, _ = await asyncio.wait((task,), timeout=timeout)
+        if not done:
+            task.cancel()
+            self.__overrun(action, timeout, cancellable)
+        return task.result()
+
+    def shutdown(self) -> None:
+        """Release the thread pool without waiting for abandoned actions"""
+        with self.__lock:
+            pool, self.__pool = self.__pool, None
+        if pool is not None:
+            pool.shutdown(wait=False)
+
+    def __get_pool(self) -> concurrent.futures.ThreadPoolExecutor:
+        with self.__lock:
+            if self.__pool is None:
+                self.__pool = concurrent.futures.ThreadPoolExecutor(
+                    self.__workers,
+                    thread_name_prefix=f"{self.__name} Watchdog",
+                )
+            return self.__pool
+
+    def __abandon(self, future: concurrent.futures.Future) -> None:
+        """Replace the pool if abandoned actions block all its threads"""
+        with self.__lock:
+            blocked = self.__blocked
+            blocked.add(future)
+            future.add_done_callback(blocked.discard)
+            if len(blocked) < self.__workers or self.__pool is None:
+                return
+            pool, self.__pool = self.__pool, None
+            self.__blocked = set()
+            self.__replaced += 1
+        LOGGER.warning(
+            "All %d %s watchdog threads are blocked by abandoned actions;"
+            " leaving them behind and starting new ones",
+            len(blocked),
+            self.__name,
+        )
+        pool.shutdown(wait=False)
+
+    def __overrun(self, action: Any, timeout: float, cancelled: bool) -> None:
+        key = repr(action)
+        with self.__lock:
+            self.__overruns[key] = self.__overruns.get(key, 0) + 1
+            if cancelled:
+                self.__cancelled += 1
+            else:
+                self.__abandoned += 1
+        raise ActionTimeoutError(action, timeout, cancelled)
@@ -225,11 +225,16 @@ class AbstractKeyboard:
             self.last_key
         ) = f"{self.name}.{pin}"
 
-        extra = self.additional_info
-        eh.fire_event(event_name, self._event_source, extra=extra)
-        eh.fire_event(f"{event_name}_{pin}", self._event_source, extra=extra)
-        eh.fire_event(
-            f"{event_name}_{self.name}.{pin}", self._event_source, extra=extra
+        # The generic, per-pin and per-keyboard names are aliases of the
+        # same key event, so they are dispatched together
+        eh.fire_event_group(
+            (
+                event_name,
+                f"{event_name}_{pin}",
+                f"{event_name}_{self.name}.{pin}",
+            ),
+            self._event_source,
+            extra=self.additional_info,
         )
 
     def _fire_keyup(self, pin: str) -> None:
@@ -3,6 +3,7 @@ import logging
 from typing import Any, Dict, Optional, Tuple
 
 import doorpi.actions
+import doorpi.event
 import doorpi.keyboard.abc
 import doorpi.keyboard.enums
 
@@ -24,18 +25,13 @@ class KeyboardHandler:
     def __load_keyboard(
         self, kbname: str, kbtype: str
     ) -> doorpi.keyboard.abc.AbstractKeyboard:
-        eh = doorpi.INSTANCE.event_handler
-
         LOGGER.debug("Instantiating keyboard %r (%s)", kbname, kbtype)
         entrypoint = doorpi.keyboard.enums.KeyboardType[kbtype].value
         kbcls = entrypoint.load()
         kb = kbcls(kbname)
 
-        LOGGER.debug("Registering input pins for %r", kbname)
-        for pin, actions in kb.config.view("input").items():
-            for action in actions:
-                if action:
-                    eh.register_action(f"OnKeyPressed_{kbname}.{pin}", action)
+        # The actions of input pins are registered by the event handler,
+        # so that they follow configuration reloads
 
         LOGGER.debug("Registering output pins for %r", kbname)
         self.__aliases[kbname] = {}
@@ -68,7 +64,9 @@ class KeyboardHandler:
             )
 
         eh.register_action(
-            "OnTimeTick", doorpi.actions.CheckAction(self.self_check)
+            "OnTimeTick",
+            doorpi.actions.CheckAction(self.self_check),
+            lane=doorpi.event.Lane.REALTIME,
         )
 
     def input(self, pinpath: str) -> bool:
@@ -1,6 +1,9 @@
 """Additional project metadata"""
 # pylint: disable=invalid-name
 
+import os
+import pathlib
+import sys
 from importlib import metadata as _meta
 
 try:
@@ -47,3 +50,20 @@ Supporter:  {supporters}
     supporters="\n            ".join(supporters),
     url=distribution.metadata["Home-page"],
 )
+
+
+def cache_dir(name: str) -> pathlib.Path:
+    """The directory for cached data of kind ``name``
+
+    The directory is not created.
+    """
+    if sys.platform == "linux":
+        try:
+            cachedir = pathlib.Path(os.environ["XDG_CACHE_HOME"])
+        except KeyError:
+            cachedir = pathlib.Path.home() / ".cache"
+    elif sys.platform == "win32":
+        cachedir = pathlib.Path(os.environ["TEMP"])
+    else:
+        cachedir = pathlib.Path.home()
+    return cachedir / distribution.metadata["Name"] / name
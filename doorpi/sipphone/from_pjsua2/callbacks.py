@@ -8,6 +8,7 @@ from typing import TYPE_CHECKING, Tuple
 import pjsua2 as pj
 
 import doorpi
+from doorpi.event import trace
 
 from . import fire_event, config
 
@@ -23,6 +24,10 @@ class AccountCallback(pj.Account):
 
     # pylint: disable=arguments-differ
     def onIncomingCall(self, iprm: pj.OnIncomingCallParam) -> None:
+        with trace.span("sip", "INCOMING"):
+            self.__handleIncomingCall(iprm)
+
+    def __handleIncomingCall(self, iprm: pj.OnIncomingCallParam) -> None:
         sp: glue.Pjsua2 = doorpi.INSTANCE.sipphone  # type: ignore
         call = CallCallback(self, iprm.callId)
         callInfo = call.getInfo()
@@ -80,6 +85,8 @@ class CallCallback(pj.Call):
             "sipphone.dtmf"
         ).keys()
         self.__call_answered = False
+        # the trace span that created this call
+        self.__trace = trace.current()
 
     def __getAudioVideoMedia(self) -> Tuple[pj.AudioMedia, pj.VideoMedia]:
         """Helper function that returns the first audio and video media"""
@@ -96,6 +103,12 @@ class CallCallback(pj.Call):
 
     def onCallState(self, prm: pj.OnCallStateParam) -> None:
         ci = self.getInfo()
+        with trace.attach(self.__trace), trace.span(
+            "sip", ci.stateText, remote_uri=ci.remoteUri
+        ):
+            self.__handleCallState(ci)
+
+    def __handleCallState(self, ci: pj.CallInfo) -> None:
         sp: glue.Pjsua2 = doorpi.INSTANCE.sipphone  # type: ignore
 
         if ci.state == pj.PJSIP_INV_STATE_CALLING:
@@ -1,12 +1,13 @@
 """This module contains the "glue class", which binds PJSUA2 to DoorPi."""
 import logging
 import threading
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 
 import pjsua2 as pj
 
 import doorpi
 from doorpi.actions import CallbackAction
+from doorpi.event import trace
 from doorpi.sipphone.abc import AbstractSIPPhone
 
 from . import EVENT_SOURCE, config, fileio, fire_event, worker
@@ -54,11 +55,12 @@ class Pjsua2(AbstractSIPPhone):
             eh.register_event(ev, EVENT_SOURCE)
 
         # register DTMF events, fired by CallCallback
-        for dtmf in doorpi.INSTANCE.config.view("sipphone.dtmf"):
-            eh.register_event(f"OnDTMF_{dtmf}", EVENT_SOURCE)
+        self._register_dtmf_events()
 
         # outgoing calls that are not yet connected
         self._waiting_calls: List[str] = []
+        # trace spans that requested the waiting calls
+        self._call_traces: Dict[str, trace.SpanContext] = {}
         # outgoing calls that are currently ringing
         self._ringing_calls: List[pj.Call] = []
         self._call_lock = threading.Lock()
@@ -70,11 +72,24 @@ class Pjsua2(AbstractSIPPhone):
         self._worker: Optional[worker.Worker] = None
         fire_event("OnSIPPhoneCreate", async_only=True)
         eh.register_action("OnShutdown", CallbackAction(self.stop))
+        eh.register_action(
+            "OnConfigReload",
+            CallbackAction(self._register_dtmf_events),
+            lane=doorpi.event.Lane.REALTIME,
+        )
         eh.register_action(
             "OnWebServerStart",
             CallbackAction(self._register_thread, "DoorPiWeb"),
         )
 
+    def _register_dtmf_events(self) -> None:
+        """Register the events of newly configured DTMF sequences"""
+        eh = doorpi.INSTANCE.event_handler
+        registered = eh.get_events_by_source(EVENT_SOURCE)
+        for dtmf in doorpi.INSTANCE.config.view("sipphone.dtmf"):
+            if f"OnDTMF_{dtmf}" not in registered:
+                eh.register_event(f"OnDTMF_{dtmf}", EVENT_SOURCE)
+
     def stop(self) -> None:
         assert self._worker is not None
         LOGGER.debug("Destroying PJSUA2 SIP phone")
@@ -114,6 +129,9 @@ class Pjsua2(AbstractSIPPhone):
             # Dispatch creation of the call to the main thread
             if canonical_uri not in self._waiting_calls:
                 self._waiting_calls.append(canonical_uri)
+                context = trace.current()
+                if context is not None:
+                    self._call_traces[canonical_uri] = context
             
             return True
 
@@ -159,18 +177,34 @@ class Pjsua2(AbstractSIPPhone):
         except ValueError:
             return False
 
-        conf = doorpi.INSTANCE.config
+        admins = doorpi.INSTANCE.config.snapshot().derive(
+            "sipphone.admins", self._admin_uris
+        )
+        if "*" in admins:
+            LOGGER.trace(
+                "Found '*' in config: everything is an admin number"
+            )
+            return True
+        if canonical_uri in admins:
+            LOGGER.trace("%s is admin number %s", uri, admins[canonical_uri])
+            return True
+        LOGGER.trace("%s is not an admin number", uri)
+        return False
+
+    @classmethod
+    def _admin_uris(
+        cls, conf: "doorpi.config.ConfigSnapshot"
+    ) -> Dict[str, str]:
+        """Map the canonical URIs of the admins to the configured numbers"""
+        admins = {}
         for admin_number in conf["sipphone.admins"]:
             if admin_number == "*":
-                LOGGER.trace(
-                    "Found '*' in config: everything is an admin number"
+                admins["*"] = admin_number
+            else:
+                admins.setdefault(
+                    cls.canonicalize_uri(admin_number), admin_number
                 )
-                return True
-            if canonical_uri == self.canonicalize_uri(admin_number):
-                LOGGER.trace("%s is admin number %s", uri, admin_number)
-                return True
-        LOGGER.trace("%s is not an admin number", uri)
-        return False
+        return admins
 
     @staticmethod
     def canonicalize_uri(uri: str) -> str:
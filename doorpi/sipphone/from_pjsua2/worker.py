@@ -9,6 +9,7 @@ import pjsua2 as pj
 
 import doorpi
 from doorpi.actions import CheckAction
+from doorpi.event import Lane, trace
 
 from . import EVENT_SOURCE, config, fire_event
 from .callbacks import AccountCallback, CallCallback
@@ -71,11 +72,21 @@ class Worker:
         # register tick actions
         eh = doorpi.INSTANCE.event_handler
         eh.register_action(
-            "OnTimeRapidTick", CheckAction(self.handleNativeEvents)
+            "OnTimeRapidTick",
+            CheckAction(self.handleNativeEvents),
+            lane=Lane.REALTIME,
+        )
+        eh.register_action(
+            "OnTimeTick", CheckAction(self.checkHangupAll), lane=Lane.REALTIME
+        )
+        eh.register_action(
+            "OnTimeTick", CheckAction(self.checkCallTime), lane=Lane.REALTIME
+        )
+        eh.register_action(
+            "OnTimeRapidTick",
+            CheckAction(self.createCalls),
+            lane=Lane.REALTIME,
         )
-        eh.register_action("OnTimeTick", CheckAction(self.checkHangupAll))
-        eh.register_action("OnTimeTick", CheckAction(self.checkCallTime))
-        eh.register_action("OnTimeRapidTick", CheckAction(self.createCalls))
         eh.fire_event_sync("OnSIPPhoneStart", EVENT_SOURCE)
         LOGGER.debug("Initialization complete")
 
@@ -337,15 +348,22 @@ class Worker:
                             LOGGER.info("Already calling %s", uri)
                             break
                     else:
-                        LOGGER.info("Calling %s", uri)
-                        fire_event("OnCallOutgoing", remote_uri=uri)
-                        call = CallCallback(self.__account)
-                        callprm = pj.CallOpParam(True)
-                        try:
-                            call.makeCall(uri, callprm)
-                        except pj.Error as err:
-                            LOGGER.error("Error making a call: %s", err.info())
-                        else:
-                            self.__phone._ringing_calls += [call]
-                            LOGGER.info("Call ringing %s", uri)
+                        with trace.attach(
+                            self.__phone._call_traces.get(uri)
+                        ), trace.span("sip", "MAKE_CALL", remote_uri=uri):
+                            self.__makeCall(uri)
             self.__phone._waiting_calls = []
+            self.__phone._call_traces = {}
+
+    def __makeCall(self, uri: str) -> None:
+        LOGGER.info("Calling %s", uri)
+        fire_event("OnCallOutgoing", remote_uri=uri)
+        call = CallCallback(self.__account)
+        callprm = pj.CallOpParam(True)
+        try:
+            call.makeCall(uri, callprm)
+        except pj.Error as err:
+            LOGGER.error("Error making a call: %s", err.info())
+        else:
+            self.__phone._ringing_calls += [call]
+            LOGGER.info("Call ringing %s", uri)
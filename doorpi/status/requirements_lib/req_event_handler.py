@@ -11,7 +11,8 @@ REQUIREMENT = {
         Jedes Event für sich wird seriell (eins nach dem anderen) abgearbeitet.
         Mehrere Events werden parallel (alle auf einmal) ausgeführt.  Damit das
         parallele Ausführen von Actions möglich wird, arbeitet der Event-Handler
-        mit Threads.
+        mit einem festen Pool von Worker-Threads.  Die Anzahl der Threads und
+        die Länge der Warteschlange sind unter [event_handler] konfigurierbar.
 
         Die ausgelösten Events werden in einer SQLite-Datenbank gespeichert und
         können z.B. in der Weboberfläche ausgewertet werden."""
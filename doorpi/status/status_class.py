@@ -18,7 +18,7 @@ MODULES = (
     "event_handler",
     "history_event",
     "history_snapshot",
-    # "history_action",
+    "history_action",
     "environment",
     "webserver",
 )
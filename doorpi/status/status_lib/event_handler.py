@@ -21,7 +21,13 @@ def get(
             for event, actions in eh.actions.items()
         },
         "threads": lambda eh: str(eh.threads),
+        "executor": operator.attrgetter("executor_stats"),
+        "lanes": operator.attrgetter("lane_stats"),
+        "coalesced": operator.attrgetter("coalesced"),
+        "timeouts": operator.attrgetter("timeouts"),
+        "latency": operator.attrgetter("latency"),
         "idle": operator.attrgetter("idle"),
+        "log": operator.attrgetter("log.stats"),
         "events_since_start": lambda eh: eh.log._event_count
     }
 
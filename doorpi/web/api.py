@@ -1,4 +1,6 @@
 """DoorPiWeb handlers for the JSON API"""
+import asyncio
+import functools
 import json
 import enum
 import pathlib
@@ -175,6 +177,29 @@ async def _control_config_save(
         )
 
 
+@routes.get("/control/config_reload")
+async def _control_config_reload(
+    request: aiohttp.web.BaseRequest,
+) -> aiohttp.web.StreamResponse:
+    source = request.query.get("source", "file")
+    if source not in ("file", "memory") or request.can_read_body:
+        raise aiohttp.web.HTTPBadRequest()
+
+    try:
+        changed = await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(doorpi.INSTANCE.reload, source)
+        )
+    except (KeyError, OSError, TypeError, ValueError) as err:
+        return aiohttp.web.json_response(
+            {"success": False, "message": f"{type(err).__name__}: {err}"},
+            dumps=json_encoder.encode,
+        )
+    return aiohttp.web.json_response(
+        {"success": True, "message": {"changed_events": changed}},
+        dumps=json_encoder.encode,
+    )
+
+
 @routes.get("/mirror")
 async def _mirror(
     request: aiohttp.web.BaseRequest,
@@ -230,6 +255,159 @@ async def _status(
     )
 
 
+@routes.get("/api/events")
+async def _api_events(
+    request: aiohttp.web.BaseRequest,
+) -> aiohttp.web.StreamResponse:
+    """Page through the event history
+
+    Query parameters:
+        q: Search terms, e.g. ``event_name:OnKeyPressed 4711``
+        since, until: Limit the results to this time range
+        limit: Number of events per page (default 50, at most 500)
+        cursor: The ``next`` value returned with the previous page
+        sort: The column to sort by (default ``start_time``)
+        order: ``asc`` or ``desc`` (default)
+        fields: Comma-separated list of keys to return per event
+    """
+    if request.can_read_body:
+        raise aiohttp.web.HTTPBadRequest()
+    query = request.query
+    try:
+        since = float(query["since"]) if "since" in query else None
+        until = float(query["until"]) if "until" in query else None
+        limit = min(int(query.get("limit", 50)), 500)
+        order = query.get("order", "desc")
+        if order not in ("asc", "desc"):
+            raise ValueError(f"Invalid order: {order!r}")
+        fields = [
+            field
+            for value in query.getall("fields", [])
+            for field in value.split(",")
+            if field
+        ]
+        page = functools.partial(
+            doorpi.INSTANCE.event_handler.log.page_event_log,
+            query.get("q", ""),
+            since=since,
+            until=until,
+            limit=limit,
+            cursor=query.get("cursor"),
+            sort=query.get("sort", "start_time"),
+            descending=order == "desc",
+            fields=fields,
+        )
+        events, cursor = await asyncio.get_running_loop().run_in_executor(
+            None, page
+        )
+    except ValueError as err:
+        raise aiohttp.web.HTTPBadRequest(text=str(err)) from err
+
+    return aiohttp.web.json_response(
+        {"success": True, "message": {"events": events, "next": cursor}},
+        dumps=json_encoder.encode,
+    )
+
+
+@routes.get("/api/events/search")
+async def _api_events_search(
+    request: aiohttp.web.BaseRequest,
+) -> aiohttp.web.StreamResponse:
+    """Search the event history, including archived events
+
+    Query parameters:
+        q: Search terms, e.g. ``event_name:OnKeyPressed 4711``
+        since, until: Limit the results to this time range
+        limit: Maximum number of events (default 100, at most 1000)
+    """
+    if request.can_read_body:
+        raise aiohttp.web.HTTPBadRequest()
+    query = request.query
+    try:
+        since = float(query["since"]) if "since" in query else None
+        until = float(query["until"]) if "until" in query else None
+        limit = min(int(query.get("limit", 100)), 1000)
+        search = functools.partial(
+            doorpi.INSTANCE.event_handler.log.search_event_log,
+            query.get("q", ""),
+            since=since,
+            until=until,
+            max_count=limit,
+        )
+        events = await asyncio.get_running_loop().run_in_executor(
+            None, search
+        )
+    except ValueError as err:
+        raise aiohttp.web.HTTPBadRequest(text=str(err)) from err
+
+    return aiohttp.web.json_response(
+        {"success": True, "message": {"events": events}},
+        dumps=json_encoder.encode,
+    )
+
+
+@routes.get("/api/events/rollup")
+async def _api_events_rollup(
+    request: aiohttp.web.BaseRequest,
+) -> aiohttp.web.StreamResponse:
+    """Long-term event statistics as flot data series
+
+    Query parameters:
+        events: Comma-separated event names or patterns (default: all)
+        since, until: Limit the statistics to this time range
+        resolution: See `EventLog.get_event_rollup` (default ``day``)
+        value: ``count`` (default) or ``mean_duration`` (seconds)
+
+    Time-based buckets are returned in milliseconds, as expected by
+    flot's time axis mode.
+    """
+    if request.can_read_body:
+        raise aiohttp.web.HTTPBadRequest()
+    query = request.query
+    try:
+        since = float(query["since"]) if "since" in query else None
+        until = float(query["until"]) if "until" in query else None
+        resolution = query.get("resolution", "day")
+        value = query.get("value", "count")
+        if value not in ("count", "mean_duration"):
+            raise ValueError(f"Invalid value: {value!r}")
+        events = [
+            event
+            for param in query.getall("events", [])
+            for event in param.split(",")
+            if event
+        ]
+        rollup = functools.partial(
+            doorpi.INSTANCE.event_handler.log.get_event_rollup,
+            events,
+            since=since,
+            until=until,
+            resolution=resolution,
+        )
+        stats = await asyncio.get_running_loop().run_in_executor(
+            None, rollup
+        )
+    except ValueError as err:
+        raise aiohttp.web.HTTPBadRequest(text=str(err)) from err
+
+    scale = 1000 if resolution in ("hour", "day") else 1
+    series = [
+        {
+            "label": event,
+            "data": [
+                [entry["bucket"] * scale, entry[value]]
+                for entry in entries
+                if entry[value] is not None
+            ],
+        }
+        for event, entries in stats.items()
+    ]
+    return aiohttp.web.json_response(
+        {"success": True, "message": series},
+        dumps=json_encoder.encode,
+    )
+
+
 class ComplexJSONEncoder(json.JSONEncoder):
     def default(self, obj):
         if isinstance(obj, (set, frozenset)):
@@ -1,10 +1,8 @@
 """DoorPiWeb handlers for resources"""
 import logging
-from os import environ
 from os.path import normpath
-from pathlib import Path, PurePosixPath, PurePath
+from pathlib import PurePosixPath, PurePath
 from urllib.parse import unquote
-from sys import platform
 from typing import Union
 
 import aiohttp.web
@@ -22,17 +20,7 @@ parsable_file_extensions = {".html"}
 
 def setup(app: aiohttp.web.Application) -> None:
     """Setup the aiohttp_jinja2 environment"""
-    if platform == "linux":
-        try:
-            cachedir = Path(environ["XDG_CACHE_HOME"])
-        except KeyError:
-            cachedir = Path.home() / ".cache"
-    elif platform == "win32":
-        cachedir = Path(environ["TEMP"])
-    else:
-        cachedir = Path.home()
-    cachedir /= doorpi.metadata.distribution.metadata["Name"]
-    cachedir /= "templatecache"
+    cachedir = doorpi.metadata.cache_dir("templatecache")
     cachedir.mkdir(parents=True, exist_ok=True)
 
     aiohttp_jinja2.setup(
@@ -24,6 +24,16 @@ RequestHandler = T.Callable[
 _WEB_LOOP: T.Optional[asyncio.AbstractEventLoop] = None
 _SHUTDOWN_EVENT: T.Optional[asyncio.Event] = None
 
+
+@aiohttp.web.middleware
+async def pin_config(
+    request: aiohttp.web.Request, handler: RequestHandler
+) -> aiohttp.web.StreamResponse:
+    """Serve each request from a single configuration snapshot"""
+    with doorpi.INSTANCE.config.pinned():
+        return await handler(request)
+
+
 async def run() -> None:
     """Start the web server thread"""
     cfg = doorpi.INSTANCE.config.view("web")
@@ -39,7 +49,7 @@ async def run() -> None:
     doorpi.web.server._WEB_LOOP = web_loop
     doorpi.web.server._SHUTDOWN_EVENT = shutdown
     
-    app = aiohttp.web.Application()
+    app = aiohttp.web.Application(middlewares=[pin_config])
     app["doorpi_web_config"] = cfg
     doorpi.web.resources.setup(app)
     app.add_routes(doorpi.web.api.routes)
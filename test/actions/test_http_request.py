@@ -1,3 +1,4 @@
+import asyncio
 from unittest.mock import patch
 
 from doorpi.actions import http_request
@@ -35,3 +36,13 @@ class TestHTTPRequestAction(DoorPiTestCase):
 
         with self.assertLogs("doorpi.actions.http_request", "INFO"):
             ac(EVENT_ID, EVENT_EXTRA)
+
+    @patch("doorpi.actions.http_request.aiohttp", None)
+    @patch("requests.get")
+    def test_action_async_without_aiohttp(self, req_get):
+        req_get.return_value = Namespace(status_code=200, reason="OK")
+        ac = http_request.HTTPRequestAction("http://localhost/test.html")
+
+        with self.assertLogs("doorpi.actions.http_request", "INFO"):
+            asyncio.run(ac.call_async(EVENT_ID, EVENT_EXTRA))
+        req_get.assert_called_once()
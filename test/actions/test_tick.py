@@ -2,6 +2,7 @@ from datetime import datetime
 from unittest.mock import Mock, call, patch
 
 from doorpi.actions import tick
+from doorpi.event import Lane
 
 from ..mocks import DoorPi, DoorPiTestCase
 from . import EVENT_EXTRA, EVENT_ID
@@ -20,10 +21,14 @@ class TestTickAction(DoorPiTestCase):
         with patch("datetime.datetime", dtmock):
             tick.TickAction(str(last.timestamp()))(EVENT_ID, EVENT_EXTRA)
 
-        eh = instance.event_handler
+        eh = instance.event_handler.fire_event_sync
         self.assertEqual(eh.call_count, 2)
         eh.assert_has_calls(
-            [call("OnTimeYear", ES), call("OnTimeYearOdd", ES)], any_order=True
+            [
+                call("OnTimeYear", ES, lane=Lane.REALTIME),
+                call("OnTimeYearOdd", ES, lane=Lane.REALTIME),
+            ],
+            any_order=True,
         )
 
     @patch("doorpi.INSTANCE", new_callable=DoorPi)
@@ -35,10 +40,13 @@ class TestTickAction(DoorPiTestCase):
         with patch("datetime.datetime", dtmock):
             tick.TickAction(last.timestamp())(EVENT_ID, EVENT_EXTRA)
 
-        eh = instance.event_handler
+        eh = instance.event_handler.fire_event_sync
         self.assertEqual(eh.call_count, 2)
         eh.assert_has_calls(
-            [call("OnTimeMonth", ES), call("OnTimeMonthEven", ES)],
+            [
+                call("OnTimeMonth", ES, lane=Lane.REALTIME),
+                call("OnTimeMonthEven", ES, lane=Lane.REALTIME),
+            ],
             any_order=True,
         )
 
@@ -51,10 +59,14 @@ class TestTickAction(DoorPiTestCase):
         with patch("datetime.datetime", dtmock):
             tick.TickAction(last.timestamp())(EVENT_ID, EVENT_EXTRA)
 
-        eh = instance.event_handler
+        eh = instance.event_handler.fire_event_sync
         self.assertEqual(eh.call_count, 2)
         eh.assert_has_calls(
-            [call("OnTimeDay", ES), call("OnTimeDayEven", ES)], any_order=True
+            [
+                call("OnTimeDay", ES, lane=Lane.REALTIME),
+                call("OnTimeDayEven", ES, lane=Lane.REALTIME),
+            ],
+            any_order=True,
         )
 
     @patch("doorpi.INSTANCE", new_callable=DoorPi)
@@ -66,13 +78,13 @@ class TestTickAction(DoorPiTestCase):
         with patch("datetime.datetime", dtmock):
             tick.TickAction(last.timestamp())(EVENT_ID, EVENT_EXTRA)
 
-        eh = instance.event_handler
+        eh = instance.event_handler.fire_event_sync
         self.assertEqual(eh.call_count, 3)
         eh.assert_has_calls(
             [
-                call("OnTimeHour", ES),
-                call("OnTimeHourOdd", ES),
-                call("OnTimeHour01", ES),
+                call("OnTimeHour", ES, lane=Lane.REALTIME),
+                call("OnTimeHourOdd", ES, lane=Lane.REALTIME),
+                call("OnTimeHour01", ES, lane=Lane.REALTIME),
             ],
             any_order=True,
         )
@@ -86,13 +98,13 @@ class TestTickAction(DoorPiTestCase):
         with patch("datetime.datetime", dtmock):
             tick.TickAction(last.timestamp())(EVENT_ID, EVENT_EXTRA)
 
-        eh = instance.event_handler
+        eh = instance.event_handler.fire_event_sync
         self.assertEqual(eh.call_count, 3)
         eh.assert_has_calls(
             [
-                call("OnTimeMinute", ES),
-                call("OnTimeMinuteOdd", ES),
-                call("OnTimeMinute01", ES),
+                call("OnTimeMinute", ES, lane=Lane.REALTIME),
+                call("OnTimeMinuteOdd", ES, lane=Lane.REALTIME),
+                call("OnTimeMinute01", ES, lane=Lane.REALTIME),
             ],
             any_order=True,
         )
@@ -106,13 +118,37 @@ class TestTickAction(DoorPiTestCase):
         with patch("datetime.datetime", dtmock):
             tick.TickAction(last.timestamp())(EVENT_ID, EVENT_EXTRA)
 
-        eh = instance.event_handler
+        eh = instance.event_handler.fire_event_sync
         self.assertEqual(eh.call_count, 3)
         eh.assert_has_calls(
             [
-                call("OnTimeSecond", ES),
-                call("OnTimeSecondOdd", ES),
-                call("OnTimeSecond01", ES),
+                call("OnTimeSecond", ES, lane=Lane.REALTIME),
+                call("OnTimeSecondOdd", ES, lane=Lane.REALTIME),
+                call("OnTimeSecond01", ES, lane=Lane.REALTIME),
             ],
             any_order=True,
         )
+
+    @patch("doorpi.INSTANCE", new_callable=DoorPi)
+    def test_only_subscribed_events_are_fired(self, instance):
+        dtmock = Mock(wraps=datetime)
+        dtmock.now.return_value = datetime(2000, 1, 1, 0, 0, 1)
+        last = datetime(2000, 1, 1, 0, 0, 0)
+        eh = instance.event_handler
+        eh.is_subscribed.side_effect = lambda ev, _: ev == "OnTimeSecondOdd"
+
+        with patch("datetime.datetime", dtmock):
+            tick.TickAction(str(last.timestamp()))(EVENT_ID, EVENT_EXTRA)
+
+        eh.fire_event_sync.assert_called_once_with(
+            "OnTimeSecondOdd", ES, lane=Lane.REALTIME
+        )
+
+    @patch("doorpi.INSTANCE", new_callable=DoorPi)
+    def test_schedules_on_full_seconds(self, instance):
+        tick.TickAction(str(datetime.now().timestamp()))
+
+        schedule = instance.event_handler.timers.schedule_every
+        schedule.assert_called_once()
+        self.assertEqual(schedule.call_args.args[0], 1.0)
+        self.assertEqual(schedule.call_args.kwargs["start"] % 1, 0)
@@ -2,9 +2,12 @@ import datetime
 import enum
 import io
 import operator
+import os
 import pathlib
 import tempfile
 import textwrap
+import threading
+import unittest.mock
 
 from doorpi import config
 
@@ -174,6 +177,42 @@ class TestConfigLoadSave(DoorPiTestCase):
         with assert_no_raise(self):
             conf_obj.load_builtin_definitions()
 
+    def test_builtin_definitions_are_cached(self):
+        with unittest.mock.patch.dict(
+            os.environ, {"XDG_CACHE_HOME": self.tmpdir.name}
+        ):
+            parsed = config.Configuration()
+            parsed.load_builtin_definitions()
+            cachefile = next(pathlib.Path(self.tmpdir.name).rglob("*.pickle"))
+
+            with unittest.mock.patch("toml.loads") as loads:
+                cached = config.Configuration()
+                cached.load_builtin_definitions()
+            loads.assert_not_called()
+            self.assertEqual(parsed.keypaths, cached.keypaths)
+            self.assertEqual(
+                parsed["event_handler.workers"],
+                cached["event_handler.workers"],
+            )
+
+            # A broken cache is replaced by a fresh parse
+            cachefile.write_bytes(b"garbage")
+            rebuilt = config.Configuration()
+            rebuilt.load_builtin_definitions()
+            self.assertEqual(parsed.keypaths, rebuilt.keypaths)
+            self.assertNotEqual(cachefile.read_bytes(), b"garbage")
+
+    def test_definitions_cache_is_not_used_with_other_definitions(self):
+        with unittest.mock.patch.dict(
+            os.environ, {"XDG_CACHE_HOME": self.tmpdir.name}
+        ):
+            config.Configuration().load_builtin_definitions()
+            conf_obj = config.Configuration()
+            conf_obj.attach_defs({"config": {"extra": {"_default": 1}}})
+            conf_obj.load_builtin_definitions()
+            self.assertIn("extra", conf_obj.keypaths)
+            self.assertIn("event_handler.workers", conf_obj.keypaths)
+
 
 class TestConfigGetSet(DoorPiTestCase):
     def test_setting_invalid_value_type_raises(self):
@@ -213,6 +252,56 @@ class TestConfigGetSet(DoorPiTestCase):
         conf_obj["testkey"] = "foo"
         self.assertEqual("foo", conf_obj["testkey"])
 
+    def test_cached_values_follow_changes(self):
+        conf_obj = config.Configuration()
+        conf_obj.attach_defs(
+            {
+                "config": {
+                    "section": {
+                        "*": {"_default": 1},
+                        "other": {"_default": 2},
+                    },
+                }
+            }
+        )
+        keys = ("section.key", ("section", "key"), ["section", "key"])
+        for key in keys:
+            self.assertEqual(1, conf_obj[key])
+
+        conf_obj["section.key"] = 3
+        for key in keys:
+            self.assertEqual(3, conf_obj[key])
+        self.assertEqual(2, conf_obj["section.other"])
+
+        conf_obj.view("section")["key"] = 4
+        self.assertEqual(4, conf_obj["section.key"])
+
+        del conf_obj[("section", "key")]
+        self.assertEqual(1, conf_obj["section.key"])
+
+        conf_obj.load(io.StringIO("[section]\nother = 5"))
+        self.assertEqual(5, conf_obj["section.other"])
+
+        conf_obj.attach_defs({"config": {"section": {"*": {"_default": 6}}}})
+        self.assertEqual(6, conf_obj["section.key"])
+
+    def test_failed_load_keeps_previous_values(self):
+        conf_obj = config.Configuration()
+        conf_obj.attach_defs(
+            {"config": {"section": {"key": {"_type": "int"}}}}
+        )
+        conf_obj.load(io.StringIO("[section]\nkey = 1"))
+
+        for conffile in (
+            "[section]\nkey = 2\nunknown = 3",
+            "[section]\nkey = 'two'",
+        ):
+            with self.subTest(conffile=conffile):
+                with self.assertRaises((KeyError, TypeError, ValueError)):
+                    conf_obj.load(io.StringIO(conffile))
+                self.assertEqual(1, conf_obj["section.key"])
+                self.assertEqual(["section.key"], conf_obj.keypaths)
+
     def test_loaded_non_enum_values_can_be_retrieved(self):
         values = [
             ("int", "1", 1),
@@ -354,6 +443,47 @@ class TestConfigKeydef(DoorPiTestCase):
         _, wildsegments = conf_obj.keydef("namespace.key")
         self.assertEqual(wildsegments, ["key"])
 
+    def test_keypaths_place_wildcards_before_first_match(self):
+        conf_obj = config.Configuration()
+        conf_obj.attach_defs(
+            {
+                "config": {
+                    "a": {"_default": 1},
+                    "ns": {
+                        "*": {"x": {"_default": 1}, "y": {"_default": 2}},
+                    },
+                    "other": {"*": {"_default": 3}},
+                }
+            }
+        )
+        self.assertEqual(
+            conf_obj.keypaths, ["a", "ns.*.x", "ns.*.y", "other.*"]
+        )
+
+        conf_obj["ns.k.y"] = 4
+        conf_obj["ns.j.x"] = 5
+        self.assertEqual(
+            conf_obj.keypaths,
+            ["a", "ns.*.x", "ns.j.x", "ns.*.y", "ns.k.y", "other.*"],
+        )
+
+        # Wildcards that match nothing go to the end
+        del conf_obj["ns.j.x"]
+        self.assertEqual(
+            conf_obj.keypaths, ["a", "ns.*.y", "ns.k.y", "ns.*.x", "other.*"]
+        )
+
+    def test_definitions_are_indexed_by_keypath(self):
+        conf_obj = config.Configuration()
+        conf_obj.attach_defs(
+            {"config": {"ns": {"*": {"_default": 1, "_description": "d"}}}}
+        )
+        self.assertEqual(conf_obj.get_definition("ns.*")["_description"], "d")
+        self.assertEqual(
+            conf_obj.get_definition("ns.key"),
+            {"_type": "", "_description": "", "_default": ""},
+        )
+
 
 class ConfigView(DoorPiTestCase):
     def test_iterates_over_keys_with_values(self):
@@ -465,3 +595,92 @@ class ConfigView(DoorPiTestCase):
 
         self.assertEqual(subview["key"], parentview["subspace.key"])
         self.assertEqual(subview["key"], conf_obj["namespace.subspace.key"])
+
+
+class ConfigSnapshot(DoorPiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.conf_obj = config.Configuration()
+        self.conf_obj.attach_defs(
+            {
+                "config": {
+                    "namespace": {"*": {"_default": 0}},
+                    "other": {"key": {"_default": 0}},
+                }
+            }
+        )
+        self.conf_obj.load(
+            io.StringIO("[namespace]\nkey1 = 1\n[other]\nkey = 2")
+        )
+
+    def test_snapshots_are_not_changed_by_writes(self):
+        before = self.conf_obj.snapshot()
+
+        self.conf_obj["namespace.key1"] = 3
+        self.conf_obj["namespace.key2"] = 4
+        after = self.conf_obj.snapshot()
+
+        self.assertEqual(before["namespace.key1"], 1)
+        self.assertEqual(list(before.view("namespace")), ["key1"])
+        self.assertEqual(after["namespace.key1"], 3)
+        self.assertEqual(set(after.view("namespace")), {"key1", "key2"})
+        self.assertGreater(after.version, before.version)
+        self.assertIs(after.values["other"], before.values["other"])
+
+        del self.conf_obj["namespace.key1"]
+        self.assertEqual(after["namespace.key1"], 3)
+        self.assertEqual(self.conf_obj["namespace.key1"], 0)
+
+    def test_pinned_snapshot_is_read(self):
+        with self.conf_obj.pinned() as snapshot:
+            self.conf_obj["namespace.key1"] = 3
+            self.assertEqual(self.conf_obj["namespace.key1"], 1)
+            self.assertIs(self.conf_obj.snapshot(), snapshot)
+
+            read = self.conf_obj.bind(lambda: self.conf_obj["namespace.key1"])
+            results = []
+            thread = threading.Thread(target=lambda: results.append(read()))
+            thread.start()
+            thread.join()
+            self.assertEqual(results, [1])
+
+        self.assertEqual(self.conf_obj["namespace.key1"], 3)
+
+    def test_derived_values_are_computed_once_per_snapshot(self):
+        factory = unittest.mock.Mock(
+            side_effect=lambda snapshot: snapshot["other.key"] * 2
+        )
+        snapshot = self.conf_obj.snapshot()
+
+        self.assertEqual(snapshot.derive("double", factory), 4)
+        self.assertEqual(snapshot.derive("double", factory), 4)
+        self.conf_obj["other.key"] = 5
+        self.assertEqual(
+            self.conf_obj.snapshot().derive("double", factory), 10
+        )
+        self.assertEqual(factory.call_count, 2)
+
+    def test_snapshot_views_are_read_only(self):
+        view = self.conf_obj.snapshot().view("namespace")
+
+        self.assertEqual(view["key1"], 1)
+        with self.assertRaises(TypeError):
+            view["key1"] = 2
+
+    def test_earlier_snapshot_can_be_restored(self):
+        before = self.conf_obj.snapshot()
+        self.conf_obj["namespace.key2"] = 3
+
+        self.conf_obj.restore(before)
+
+        self.assertEqual(self.conf_obj["namespace.key2"], 0)
+        self.assertEqual(list(self.conf_obj.view("namespace")), ["key1"])
+        self.assertNotIn("namespace.key2", self.conf_obj.keypaths)
+
+    def test_parsed_snapshot_is_applied_by_restore(self):
+        snapshot = self.conf_obj.parse(io.StringIO("[namespace]\nkey2 = 3\n"))
+
+        self.assertEqual(snapshot["namespace.key2"], 3)
+        self.assertEqual(self.conf_obj["namespace.key2"], 0)
+        self.conf_obj.restore(snapshot)
+        self.assertEqual(self.conf_obj["namespace.key2"], 3)
@@ -0,0 +1,93 @@
+import asyncio
+import threading
+import time
+
+from doorpi.event.aio import AsyncioExecutor
+
+from ..mocks import DoorPiTestCase
+
+
+class TestAsyncioExecutor(DoorPiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.executor = AsyncioExecutor(50, 2, name="Test")
+
+    def tearDown(self):
+        self.executor.shutdown()
+        super().tearDown()
+
+    def wait_idle(self):
+        deadline = time.monotonic() + 5
+        while not self.executor.idle and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_jobs_with_same_key_run_in_order(self):
+        results = []
+
+        async def job(i):
+            await asyncio.sleep(0.001 * (i % 3))
+            results.append(i)
+
+        for i in range(20):
+            self.assertTrue(self.executor.submit("key", job, i))
+        self.wait_idle()
+        self.assertEqual(results, list(range(20)))
+
+    def test_jobs_share_the_loop_thread(self):
+        threads = set()
+
+        async def job():
+            await asyncio.sleep(0.05)
+            threads.add(threading.current_thread())
+
+        start = time.monotonic()
+        for i in range(20):
+            self.executor.submit(i, job)
+        self.wait_idle()
+
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(threads, set(self.executor.threads))
+
+    def test_blocking_calls_use_thread_pool(self):
+        threads = []
+
+        async def job():
+            threads.append(
+                await self.executor.run_blocking(threading.current_thread)
+            )
+
+        self.executor.submit("key", job)
+        self.wait_idle()
+        self.assertNotIn(threads[0], self.executor.threads)
+
+    def test_task_limit_rejects(self):
+        block = threading.Event()
+        executor = AsyncioExecutor(2, 1, name="Test")
+
+        async def job():
+            await executor.run_blocking(block.wait)
+
+        try:
+            self.assertTrue(executor.submit("a", job))
+            self.assertTrue(executor.submit("b", job))
+            self.assertFalse(executor.submit("c", job))
+            self.assertEqual(executor.stats["rejected"], 1)
+        finally:
+            block.set()
+            executor.shutdown()
+
+    def test_exceptions_are_logged(self):
+        async def job():
+            raise RuntimeError("test")
+
+        with self.assertLogs("doorpi.event.aio", "ERROR"):
+            self.executor.submit("key", job)
+            self.wait_idle()
+        self.assertEqual(self.executor.stats["executed"], 1)
+
+    def test_shutdown_rejects_new_jobs(self):
+        async def job():
+            pass
+
+        self.executor.shutdown()
+        self.assertFalse(self.executor.submit("key", job))
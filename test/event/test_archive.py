@@ -0,0 +1,53 @@
+import datetime
+import pathlib
+import zlib
+
+from doorpi.event.archive import EventArchive
+
+from ..mocks import DoorPiTestCase
+
+DAY = datetime.date(2020, 1, 1)
+NOON = datetime.datetime(2020, 1, 1, 12).timestamp()
+PATH = pathlib.Path("archive", "events-2020-01-01.jsonl.gz")
+
+
+def members(path):
+    data = path.read_bytes()
+    count = 0
+    while data:
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        decompressor.decompress(data)
+        data = decompressor.unused_data
+        count += 1
+    return count
+
+
+class TestEventArchive(DoorPiTestCase):
+    def test_compact(self):
+        archive = EventArchive(pathlib.Path("archive"))
+        for i in range(3):
+            archive.append([{"event_id": str(i), "start_time": NOON + i}])
+        self.assertEqual(members(PATH), 3)
+
+        archive.compact(before=DAY)
+        self.assertEqual(members(PATH), 3)
+        archive.compact(before=DAY + datetime.timedelta(days=1))
+        self.assertEqual(members(PATH), 1)
+        self.assertEqual(
+            [e["event_id"] for e in archive.read()], ["2", "1", "0"]
+        )
+
+    def test_unfinished_member_is_read_up_to_the_damage(self):
+        archive = EventArchive(pathlib.Path("archive"))
+        archive.append([{"event_id": "0", "start_time": NOON}])
+        # A member that was only flushed, as if the writer was killed
+        compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+        with PATH.open("ab") as file:
+            file.write(compressor.compress(b'{"event_id": "1"}\n'))
+            file.write(compressor.flush(zlib.Z_SYNC_FLUSH))
+        archive.append([{"event_id": "2", "start_time": NOON + 2}])
+
+        with self.assertLogs("doorpi.event.archive", "WARNING"):
+            self.assertEqual([e["event_id"] for e in archive.read()], ["0"])
+        with self.assertLogs("doorpi.event.archive", "WARNING"):
+            archive.compact(before=DAY + datetime.timedelta(days=1))
@@ -0,0 +1,58 @@
+import queue
+from unittest.mock import patch
+
+from doorpi.event.coalesce import Coalescer
+
+from ..mocks import DoorPiTestCase
+
+
+@patch("doorpi.event.coalesce.time.monotonic")
+class TestCoalescer(DoorPiTestCase):
+    def test_unmatched_events_pass(self, monotonic):
+        monotonic.return_value = 100.0
+        co = Coalescer({"OnKey*": 1.0})
+        for _ in range(3):
+            self.assertEqual(co.admit("OnTimeSecond", "src"), 0)
+
+    def test_firings_within_window_are_dropped(self, monotonic):
+        co = Coalescer({"OnKey*": 1.0})
+        monotonic.return_value = 100.0
+        self.assertEqual(co.admit("OnKeyDown", "src"), 0)
+        monotonic.return_value = 100.5
+        self.assertIsNone(co.admit("OnKeyDown", "src"))
+        self.assertIsNone(co.admit("OnKeyDown", "src"))
+        monotonic.return_value = 101.0
+        self.assertEqual(co.admit("OnKeyDown", "src"), 2)
+        self.assertEqual(co.stats, {"OnKeyDown": 2})
+
+    def test_last_dropped_firing_is_flushed(self, monotonic):
+        flushed = queue.Queue()
+        co = Coalescer({"OnKey*": 0.05}, lambda *args: flushed.put(args))
+        monotonic.return_value = 100.0
+        self.assertEqual(co.admit("OnKeyDown", "src", "first"), 0)
+        self.assertIsNone(co.admit("OnKeyDown", "src", "second"))
+        self.assertIsNone(co.admit("OnKeyDown", "src", "third"))
+
+        self.assertEqual(flushed.get(timeout=5), ("third", 2))
+        # The trailing firing opened a new window
+        self.assertIsNone(co.admit("OnKeyDown", "src", "fourth"))
+        self.assertEqual(flushed.get(timeout=5), ("fourth", 1))
+        monotonic.return_value = 101.0
+        self.assertEqual(co.admit("OnKeyDown", "src", "fifth"), 0)
+        co.shutdown()
+        self.assertTrue(flushed.empty())
+
+    def test_sources_are_coalesced_separately(self, monotonic):
+        monotonic.return_value = 100.0
+        co = Coalescer({"OnKey*": 1.0})
+        self.assertEqual(co.admit("OnKeyDown", "kb1"), 0)
+        self.assertEqual(co.admit("OnKeyDown", "kb2"), 0)
+        self.assertEqual(co.admit("OnKeyUp", "kb1"), 0)
+
+    def test_first_matching_pattern_wins(self, monotonic):
+        del monotonic
+        co = Coalescer({"OnKeyDown_*": 0.5, "OnKey*": 2.0, "OnTime*": 0})
+        self.assertEqual(co.window("OnKeyDown_kb?1"), 0.5)
+        self.assertEqual(co.window("OnKeyDown_kb.1"), 0.5)
+        self.assertEqual(co.window("OnKeyUp"), 2.0)
+        self.assertEqual(co.window("OnTimeSecond"), 0.0)
@@ -0,0 +1,75 @@
+import threading
+import time
+
+from doorpi.event.executor import OrderedExecutor
+
+from ..mocks import DoorPiTestCase
+
+
+class TestOrderedExecutor(DoorPiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.executor = OrderedExecutor(4, 50, name="Test")
+
+    def tearDown(self):
+        self.executor.shutdown()
+        super().tearDown()
+
+    def wait_idle(self):
+        deadline = time.monotonic() + 5
+        while not self.executor.idle and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def test_jobs_with_same_key_run_in_order(self):
+        results = []
+
+        def job(i):
+            time.sleep(0.001 * (i % 3))
+            results.append(i)
+
+        for i in range(20):
+            self.assertTrue(self.executor.submit("key", job, i))
+        self.wait_idle()
+        self.assertEqual(results, list(range(20)))
+
+    def test_jobs_with_different_keys_run_concurrently(self):
+        barrier = threading.Barrier(3, timeout=2)
+        passed = []
+
+        def job():
+            barrier.wait()
+            passed.append(True)
+
+        for key in ("a", "b", "c"):
+            self.executor.submit(key, job)
+        self.wait_idle()
+        self.assertEqual(len(passed), 3)
+
+    def test_full_queue_rejects(self):
+        block = threading.Event()
+        executor = OrderedExecutor(1, 2, name="Test")
+        try:
+            executor.submit("block", block.wait)
+            time.sleep(0.05)
+            self.assertTrue(executor.submit("x", lambda: None))
+            self.assertTrue(executor.submit("x", lambda: None))
+            self.assertFalse(executor.submit("x", lambda: None))
+            self.assertEqual(executor.stats["rejected"], 1)
+            self.assertEqual(executor.stats["queued"], 2)
+            self.assertEqual(executor.stats["busy"], 1)
+        finally:
+            block.set()
+            executor.shutdown()
+
+    def test_exceptions_are_logged(self):
+        def job():
+            raise RuntimeError("test")
+
+        with self.assertLogs("doorpi.event.executor", "ERROR"):
+            self.executor.submit("key", job)
+            self.wait_idle()
+        self.assertEqual(self.executor.stats["executed"], 1)
+
+    def test_shutdown_rejects_new_jobs(self):
+        self.executor.shutdown()
+        self.assertFalse(self.executor.submit("key", lambda: None))
@@ -0,0 +1,779 @@
+import asyncio
+import json
+import pathlib
+import queue
+import threading
+import time
+from unittest.mock import patch
+
+import doorpi.actions
+from doorpi.event import AbortEventExecution, Lane, SkipEventExecution
+from doorpi.event.handler import EventHandler
+
+from ..mocks import DoorPi, DoorPiTestCase
+
+SOURCE = "test"
+
+
+class EventHandlerTestCase(DoorPiTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = patch("doorpi.INSTANCE", new_callable=DoorPi)
+        self.instance = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.eh = EventHandler()
+        self.addCleanup(self.eh.destroy)
+        self.eh.register_event("OnTest", SOURCE)
+
+    def wait_idle(self):
+        deadline = time.monotonic() + 5
+        while not self.eh.idle and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+
+class TestEventHandlerAsync(EventHandlerTestCase):
+    def test_async_events_keep_order(self):
+        results = []
+        self.eh.register_action(
+            "OnTest", lambda _, extra: results.append(extra["n"])
+        )
+
+        for i in range(20):
+            self.eh.fire_event("OnTest", SOURCE, extra={"n": i})
+        self.wait_idle()
+
+        self.assertEqual(results, list(range(20)))
+        self.assertEqual(self.eh.executor_stats["executed"], 20)
+
+    def test_async_events_use_worker_pool(self):
+        self.eh.register_action("OnTest", lambda *_: None)
+        for _ in range(20):
+            self.eh.fire_event("OnTest", SOURCE)
+        self.wait_idle()
+
+        config = self.instance.config
+        self.assertEqual(
+            len(self.eh.threads),
+            config["event_handler.workers"]
+            + config["event_handler.background_workers"],
+        )
+
+    def test_bursts_are_coalesced(self):
+        self.instance.config["event_handler.coalesce.OnTest"] = 60.0
+        eh = EventHandler()
+        self.addCleanup(eh.destroy)
+        eh.register_event("OnTest", SOURCE)
+        results = []
+        eh.register_action("OnTest", lambda _, extra: results.append(extra))
+
+        for _ in range(5):
+            eh.fire_event("OnTest", SOURCE, extra={"pin": "1"})
+        deadline = time.monotonic() + 5
+        while not eh.idle and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(len(results), 1)
+        self.assertNotIn("coalesced_count", results[0])
+        self.assertEqual(eh.coalesced, {"OnTest": 4})
+
+    def test_bursts_end_with_trailing_firing(self):
+        self.instance.config["event_handler.coalesce.OnTest"] = 0.05
+        eh = EventHandler()
+        self.addCleanup(eh.destroy)
+        eh.register_event("OnTest", SOURCE)
+        results = queue.Queue()
+        eh.register_action("OnTest", lambda _, extra: results.put(extra))
+
+        for pin in range(5):
+            eh.fire_event("OnTest", SOURCE, extra={"pin": pin})
+
+        self.assertEqual(results.get(timeout=5)["pin"], 0)
+        trailing = results.get(timeout=5)
+        self.assertEqual(trailing["pin"], 4)
+        self.assertEqual(trailing["coalesced_count"], 4)
+
+
+class TestEventHandlerDispatch(EventHandlerTestCase):
+    def test_prepended_actions_run_first(self):
+        results = []
+        self.eh.register_action("OnTest", lambda *_: results.append(1))
+        self.eh.register_action(
+            "OnTest", lambda *_: results.append(0), prepend=True
+        )
+
+        self.eh.fire_event_sync("OnTest", SOURCE)
+
+        self.assertEqual(results, [0, 1])
+
+    def test_registration_during_dispatch_is_deferred(self):
+        results = []
+
+        def register_more(*_):
+            results.append("first")
+            self.eh.register_action(
+                "OnTest", lambda *_: results.append("late")
+            )
+
+        self.eh.register_action("OnTest", register_more)
+        self.eh.fire_event_sync("OnTest", SOURCE)
+        self.assertEqual(results, ["first"])
+
+        self.eh.unregister_action("OnTest", register_more)
+        self.eh.fire_event_sync("OnTest", SOURCE)
+        self.assertEqual(results, ["first", "late"])
+
+    def test_actions_registered_before_event(self):
+        results = []
+        self.eh.register_action("OnLater", lambda *_: results.append(1))
+        self.eh.register_event("OnLater", SOURCE)
+
+        self.eh.fire_event_sync("OnLater", SOURCE)
+
+        self.assertEqual(results, [1])
+
+    def test_undeliverable_events_are_skipped(self):
+        results = []
+        self.eh.register_action("OnTest", lambda *_: results.append(1))
+        self.eh.register_source("other")
+
+        for event, source in (
+            ("OnTest", "unknown"),
+            ("OnUnknown", SOURCE),
+            ("OnTest", "other"),
+        ):
+            with self.subTest(event=event, source=source):
+                with self.assertLogs("doorpi.event.handler", "WARNING"):
+                    self.eh.fire_event_sync(event, source)
+        self.assertEqual(results, [])
+
+    def test_actions_are_logged(self):
+        def fail(*_):
+            raise ValueError("test")
+
+        self.eh.register_action("OnTest", lambda *_: None)
+        self.eh.register_action("OnTest", fail)
+        with self.assertLogs("doorpi.event.handler", "ERROR"):
+            self.eh.fire_event_sync("OnTest", SOURCE)
+
+        actions = self.eh.log.get_action_log()
+        self.assertEqual(
+            [(a["action_result"], a["exception"]) for a in actions],
+            [("error", "ValueError"), ("ok", None)],
+        )
+        self.assertEqual(len({a["event_id"] for a in actions}), 1)
+
+    def test_unregistered_source_is_not_dispatched(self):
+        results = []
+        self.eh.register_action("OnTest", lambda *_: results.append(1))
+        self.eh.unregister_source(SOURCE, force=True)
+
+        with self.assertLogs("doorpi.event.handler", "WARNING"):
+            self.eh.fire_event_sync("OnTest", SOURCE)
+        self.assertEqual(results, [])
+
+
+class TestEventHandlerLanes(EventHandlerTestCase):
+    def test_realtime_context_defers_other_lanes(self):
+        caller = threading.current_thread()
+        threads = {}
+
+        def record(lane):
+            return lambda *_: threads.setdefault(
+                lane, threading.current_thread()
+            )
+
+        for lane in Lane:
+            self.eh.register_action("OnTest", record(lane), lane=lane)
+
+        self.eh.fire_event_sync("OnTest", SOURCE, lane=Lane.REALTIME)
+        self.wait_idle()
+
+        self.assertIs(threads[Lane.REALTIME], caller)
+        self.assertIsNot(threads[Lane.NORMAL], caller)
+        self.assertIsNot(threads[Lane.BACKGROUND], caller)
+
+    def test_all_lanes_read_config_of_fired_event(self):
+        config = self.instance.config
+        key = "event_handler.coalesce.OnTest"
+        before = config[key]
+        results = {}
+
+        def record(lane):
+            return lambda *_: results.setdefault(lane, config[key])
+
+        self.eh.register_action(
+            "OnTest",
+            lambda *_: config.__setitem__(key, before + 1),
+            lane=Lane.REALTIME,
+        )
+        self.eh.register_action("OnTest", record(Lane.NORMAL))
+        self.eh.register_action(
+            "OnTest", record(Lane.BACKGROUND), lane=Lane.BACKGROUND
+        )
+
+        self.eh.fire_event_sync("OnTest", SOURCE, lane=Lane.REALTIME)
+        self.wait_idle()
+
+        self.assertEqual(
+            results, {Lane.NORMAL: before, Lane.BACKGROUND: before}
+        )
+        self.assertEqual(config[key], before + 1)
+
+    def test_normal_context_runs_realtime_first(self):
+        results = []
+        self.eh.register_action("OnTest", lambda *_: results.append("n"))
+        self.eh.register_action(
+            "OnTest", lambda *_: results.append("r"), lane=Lane.REALTIME
+        )
+
+        self.eh.fire_event_sync("OnTest", SOURCE)
+
+        self.assertEqual(results, ["r", "n"])
+
+    def test_abort_only_affects_own_lane(self):
+        results = []
+
+        def abort(*_):
+            raise AbortEventExecution()
+
+        self.eh.register_action("OnTest", abort, lane=Lane.REALTIME)
+        self.eh.register_action(
+            "OnTest", lambda *_: results.append("r"), lane=Lane.REALTIME
+        )
+        self.eh.register_action("OnTest", lambda *_: results.append("n"))
+
+        self.eh.fire_event_sync("OnTest", SOURCE)
+
+        self.assertEqual(results, ["n"])
+
+    def test_deadline_overruns_are_counted(self):
+        self.eh.register_action(
+            "OnTest", lambda *_: time.sleep(0.05), lane=Lane.REALTIME
+        )
+
+        with self.assertLogs("doorpi.event.handler", "WARNING"):
+            self.eh.fire_event_sync("OnTest", SOURCE, lane=Lane.REALTIME)
+
+        stats = self.eh.lane_stats["realtime"]
+        self.assertEqual(stats["executed"], 1)
+        self.assertEqual(stats["overruns"], 1)
+        self.assertGreaterEqual(stats["max_latency"], 0.05)
+
+
+class TestEventHandlerAsyncio(EventHandlerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.instance.config["event_handler.asyncio.enabled"] = True
+        self.eh = EventHandler()
+        self.addCleanup(self.eh.destroy)
+        self.eh.register_event("OnTest", SOURCE)
+
+    def test_async_actions_are_awaited_on_loop(self):
+        threads = []
+
+        class Action(doorpi.actions.AsyncAction):
+            def __init__(self):
+                super().__init__()
+
+            def __call__(self, event_id, extra):
+                raise AssertionError("blocking call in asyncio mode")
+
+            async def call_async(self, event_id, extra):
+                await asyncio.sleep(0)
+                threads.append(threading.current_thread())
+
+            __str__ = __repr__ = lambda self: "test"
+
+        self.eh.register_action("OnTest", Action())
+        self.eh.fire_event("OnTest", SOURCE)
+        self.wait_idle()
+
+        self.assertEqual(len(threads), 1)
+        self.assertIn(threads[0], self.eh.threads)
+
+    def test_blocking_actions_keep_order(self):
+        results = []
+        self.eh.register_action(
+            "OnTest", lambda _, extra: results.append(extra["n"])
+        )
+        self.eh.register_action(
+            "OnTest", lambda _, extra: results.append(-extra["n"])
+        )
+
+        for i in range(1, 11):
+            self.eh.fire_event("OnTest", SOURCE, extra={"n": i})
+        self.wait_idle()
+
+        expected = [n for i in range(1, 11) for n in (i, -i)]
+        self.assertEqual(results, expected)
+        self.assertEqual(self.eh.executor_stats["executed"], 10)
+
+    def test_abort_stops_chain(self):
+        results = []
+
+        def abort(*_):
+            raise AbortEventExecution()
+
+        self.eh.register_action("OnTest", abort)
+        self.eh.register_action("OnTest", lambda *_: results.append(1))
+        self.eh.fire_event("OnTest", SOURCE)
+        self.wait_idle()
+
+        self.assertEqual(results, [])
+
+
+class TestEventHandlerTimeouts(EventHandlerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.instance.config["event_handler.action_timeout"] = 0.05
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+    def hang(self, *_):
+        self.release.wait(5)
+
+    def test_hung_action_is_abandoned(self):
+        eh = EventHandler()
+        self.addCleanup(eh.destroy)
+        eh.register_event("OnTest", SOURCE)
+        results = []
+        eh.register_action("OnTest", self.hang)
+        eh.register_action("OnTest", lambda *_: results.append(1))
+
+        with self.assertLogs("doorpi.event.handler", "WARNING"):
+            eh.fire_event_sync("OnTest", SOURCE)
+
+        self.assertEqual(results, [1])
+        stats = eh.timeouts
+        self.assertEqual(stats["overruns"], 1)
+        self.assertEqual(stats["abandoned"], 1)
+        self.assertEqual(stats["actions"], {repr(self.hang): 1})
+
+    def test_hung_actions_do_not_starve_later_ones(self):
+        workers = self.instance.config["event_handler.workers"]
+        eh = EventHandler()
+        self.addCleanup(eh.destroy)
+        eh.register_event("OnTest", SOURCE)
+        results = []
+        for _ in range(workers + 2):
+            eh.register_action("OnTest", self.hang)
+            eh.register_action("OnTest", lambda *_: results.append(1))
+
+        with self.assertLogs("doorpi.event", "WARNING"):
+            eh.fire_event_sync("OnTest", SOURCE)
+
+        self.assertEqual(len(results), workers + 2)
+        stats = eh.timeouts
+        self.assertEqual(stats["abandoned"], workers + 2)
+        self.assertEqual(stats["cancelled"], 0)
+        self.assertEqual(stats["replaced_pools"], 1)
+
+    def test_per_action_timeout_overrides_default(self):
+        self.instance.config["event_handler.action_timeout"] = 0.01
+        self.instance.config["event_handler.action_timeouts.sleep:*"] = 0
+        eh = EventHandler()
+        self.addCleanup(eh.destroy)
+        eh.register_event("OnTest", SOURCE)
+        eh.register_action("OnTest", "sleep:0.05")
+
+        eh.fire_event_sync("OnTest", SOURCE)
+
+        self.assertEqual(eh.timeouts["overruns"], 0)
+
+    def test_realtime_actions_have_no_timeout(self):
+        eh = EventHandler()
+        self.addCleanup(eh.destroy)
+        eh.register_event("OnTest", SOURCE)
+        caller = threading.current_thread()
+        threads = []
+        eh.register_action(
+            "OnTest",
+            lambda *_: threads.append(threading.current_thread()),
+            lane=Lane.REALTIME,
+        )
+
+        eh.fire_event_sync("OnTest", SOURCE, lane=Lane.REALTIME)
+
+        self.assertEqual(threads, [caller])
+
+    def test_async_actions_are_cancelled(self):
+        self.instance.config["event_handler.asyncio.enabled"] = True
+        eh = EventHandler()
+        self.addCleanup(eh.destroy)
+        eh.register_event("OnTest", SOURCE)
+        cancelled = []
+        results = []
+
+        class Action(doorpi.actions.AsyncAction):
+            def __init__(self):
+                super().__init__()
+
+            def __call__(self, event_id, extra):
+                raise AssertionError("blocking call in asyncio mode")
+
+            async def call_async(self, event_id, extra):
+                try:
+                    await asyncio.sleep(5)
+                except asyncio.CancelledError:
+                    cancelled.append(True)
+                    raise
+
+            __str__ = __repr__ = lambda self: "test"
+
+        eh.register_action("OnTest", Action())
+        eh.register_action("OnTest", lambda *_: results.append(1))
+        with self.assertLogs("doorpi.event.handler", "WARNING"):
+            eh.fire_event("OnTest", SOURCE)
+            deadline = time.monotonic() + 5
+            while not eh.idle and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        self.assertEqual(cancelled, [True])
+        self.assertEqual(results, [1])
+        self.assertEqual(eh.timeouts["cancelled"], 1)
+
+
+class TestEventHandlerLatency(EventHandlerTestCase):
+    def test_latency_is_recorded_per_event_and_action(self):
+        def fail(*_):
+            raise RuntimeError("test")
+
+        def abort(*_):
+            raise AbortEventExecution()
+
+        self.eh.register_action("OnTest", fail)
+        self.eh.register_action("OnTest", abort)
+
+        for _ in range(3):
+            with self.assertLogs("doorpi.event.handler"):
+                self.eh.fire_event_sync("OnTest", SOURCE)
+
+        latency = self.eh.latency
+        self.assertEqual(latency["events"]["OnTest"]["count"], 3)
+        self.assertEqual(latency["events"]["OnTest"]["errors"], 3)
+        self.assertEqual(latency["actions"][repr(fail)]["errors"], 3)
+        self.assertEqual(latency["actions"][repr(abort)]["count"], 3)
+        self.assertEqual(latency["actions"][repr(abort)]["errors"], 0)
+
+
+class TestEventHandlerTrace(EventHandlerTestCase):
+    def test_events_fired_by_actions_are_traced_as_children(self):
+        self.instance.config["trace.enabled"] = True
+        self.instance.base_path = pathlib.Path.cwd()
+        eh = EventHandler()
+        eh.register_event("OnTest", SOURCE)
+        eh.register_event("OnChild", SOURCE)
+        eh.register_action(
+            "OnTest", lambda *_: eh.fire_event("OnChild", SOURCE)
+        )
+        eh.register_action("OnChild", lambda *_: None)
+
+        eh.fire_event("OnTest", SOURCE)
+        deadline = time.monotonic() + 5
+        while not eh.idle and time.monotonic() < deadline:
+            time.sleep(0.01)
+        eh.destroy()
+
+        with open("trace.jsonl", encoding="utf-8") as file:
+            spans = [json.loads(line) for line in file]
+        events = {s["name"]: s for s in spans if s["kind"] == "event"}
+        by_id = {s["span"]: s for s in spans}
+        child_parent = by_id[events["OnChild"]["parent"]]
+        self.assertEqual(child_parent["kind"], "action")
+        self.assertEqual(child_parent["parent"], events["OnTest"]["span"])
+        self.assertEqual(events["OnChild"]["trace"], events["OnTest"]["span"])
+
+
+class TestEventHandlerPatterns(EventHandlerTestCase):
+    def test_pattern_subscriptions(self):
+        results = []
+        for event in ("OnTimeMinute10", "OnTimeMinute11", "OnKeyPressed_1"):
+            self.eh.register_event(event, SOURCE)
+        self.eh.register_action(
+            "pattern:OnTimeMinute[0-5]0", lambda *_: results.append("minute")
+        )
+        self.eh.register_action(
+            "pattern:OnKeyPressed_*", lambda *_: results.append("pattern")
+        )
+        self.eh.register_action(
+            "OnKeyPressed_1", lambda *_: results.append("exact")
+        )
+
+        for event in ("OnTimeMinute10", "OnTimeMinute11", "OnKeyPressed_1"):
+            self.eh.fire_event_sync(event, SOURCE)
+
+        self.assertEqual(results, ["minute", "exact", "pattern"])
+        self.assertFalse(self.eh.is_subscribed("OnTimeMinute11", SOURCE))
+
+    def test_patterns_apply_to_later_events(self):
+        results = []
+        self.eh.register_action(
+            "pattern:OnLater*", lambda *_: results.append(1)
+        )
+        self.eh.register_event("OnLaterEvent", SOURCE)
+
+        self.eh.fire_event_sync("OnLaterEvent", SOURCE)
+
+        self.assertEqual(results, [1])
+
+    def test_unregister_pattern_action(self):
+        results = []
+
+        def action(*_):
+            results.append(1)
+
+        self.eh.register_action("pattern:OnTe?t", action)
+        self.eh.unregister_action("OnTest", action)
+        self.eh.fire_event_sync("OnTest", SOURCE)
+
+        self.assertEqual(results, [])
+        self.assertNotIn("pattern:OnTe?t", self.eh.actions)
+
+    def test_wildcards_in_event_names_are_literal(self):
+        results = []
+        for event in ("OnDTMF_*1", "OnDTMF_#1", "OnDTMF_*"):
+            self.eh.register_event(event, SOURCE)
+            self.eh.register_action(
+                event, lambda *_, event=event: results.append(event)
+            )
+
+        for event in ("OnDTMF_*1", "OnDTMF_#1", "OnDTMF_*"):
+            self.eh.fire_event_sync(event, SOURCE)
+
+        self.assertEqual(results, ["OnDTMF_*1", "OnDTMF_#1", "OnDTMF_*"])
+        with self.assertRaises(ValueError):
+            self.eh.register_event("pattern:OnDTMF_*", SOURCE)
+
+
+class TestEventHandlerGroups(EventHandlerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.eh.register_event("OnTest_1", SOURCE)
+        self.eh.register_event("OnTest_kb.1", SOURCE)
+
+    def test_group_executes_union_of_actions_once(self):
+        results = []
+        self.eh.register_action(
+            "OnTest", lambda _, extra: results.append(("generic", extra))
+        )
+        self.eh.register_action(
+            "OnTest_1", lambda _, extra: results.append(("pin", extra))
+        )
+        self.eh.register_action(
+            "pattern:OnTest_*",
+            lambda _, extra: results.append(("pattern", extra)),
+        )
+
+        with patch.object(self.eh.log, "log_event") as log_event:
+            self.eh.fire_event_group_sync(
+                ("OnTest", "OnTest_1", "OnTest_kb.1"), SOURCE
+            )
+
+        self.assertEqual(
+            [name for name, _ in results], ["generic", "pin", "pattern"]
+        )
+        self.assertEqual(len({extra["event_id"] for _, extra in results}), 1)
+        log_event.assert_called_once()
+        self.assertEqual(log_event.call_args[0][2], "OnTest")
+        self.assertIs(
+            self.eh.extra_info["OnTest_kb.1"], self.eh.extra_info["OnTest"]
+        )
+
+    def test_oneshot_actions_are_removed_from_alias(self):
+        results = []
+        self.eh.register_action(
+            "OnTest_1", lambda *_: results.append(1), oneshot=True
+        )
+
+        for _ in range(3):
+            self.eh.fire_event_group_sync(("OnTest", "OnTest_1"), SOURCE)
+
+        self.assertEqual(results, [1])
+        self.assertNotIn("OnTest_1", self.eh.actions)
+
+    def test_abort_and_skip_are_confined_to_alias(self):
+        results = []
+
+        def raise_(err):
+            def action(*_):
+                raise err
+
+            return action
+
+        for event, error in (
+            ("OnTest", AbortEventExecution()),
+            ("OnTest_1", SkipEventExecution(5)),
+            ("OnTest_kb.1", None),
+        ):
+            if error is not None:
+                self.eh.register_action(event, raise_(error))
+            self.eh.register_action(
+                event, lambda *_, e=event: results.append(e)
+            )
+
+        self.eh.fire_event_group_sync(
+            ("OnTest", "OnTest_1", "OnTest_kb.1"), SOURCE
+        )
+
+        self.assertEqual(results, ["OnTest_kb.1"])
+
+    def test_pins_are_ordered_and_coalesced_separately(self):
+        self.instance.config["event_handler.coalesce.OnTest"] = 60.0
+        eh = EventHandler()
+        self.addCleanup(eh.destroy)
+        for event in ("OnTest_1", "OnTest_2"):
+            eh.register_event(event, SOURCE)
+        release = threading.Event()
+        self.addCleanup(release.set)
+        results = queue.Queue()
+        eh.register_action("OnTest_1", lambda *_: release.wait(5))
+        for event in ("OnTest_1", "OnTest_2"):
+            eh.register_action(
+                event, lambda _, extra, e=event: results.put(e)
+            )
+
+        eh.fire_event_group(("OnTest", "OnTest_1"), SOURCE)
+        eh.fire_event_group(("OnTest", "OnTest_2"), SOURCE)
+
+        # The second pin is neither blocked by nor merged into the first
+        self.assertEqual(results.get(timeout=5), "OnTest_2")
+        release.set()
+        self.assertEqual(results.get(timeout=5), "OnTest_1")
+        self.assertEqual(eh.coalesced, {})
+
+    def test_group_ignores_unregistered_aliases(self):
+        results = []
+        self.eh.register_action("OnTest", lambda *_: results.append(1))
+
+        self.eh.fire_event_group_sync(("OnTest", "OnTest_2"), SOURCE)
+
+        self.assertEqual(results, [1])
+
+    def test_group_without_registered_names_is_skipped(self):
+        with self.assertLogs("doorpi.event.handler", "WARNING"):
+            self.eh.fire_event_group_sync(
+                ("OnUnknown", "OnUnknown_1"), SOURCE
+            )
+
+    def test_async_group(self):
+        results = []
+        self.eh.register_action(
+            "OnTest_1", lambda _, extra: results.append(extra["n"])
+        )
+
+        for i in range(10):
+            self.eh.fire_event_group(
+                ("OnTest", "OnTest_1"), SOURCE, extra={"n": i}
+            )
+        self.wait_idle()
+
+        self.assertEqual(results, list(range(10)))
+
+
+class TestEventHandlerReload(EventHandlerTestCase):
+    def test_configured_actions_are_registered(self):
+        config = self.instance.config
+        config["events.OnTest"] = ["sleep:0", ""]
+        config["sipphone.dtmf.#1"] = ["sleep:0"]
+        config["keyboard.kb.input.1"] = ["sleep:0", "sleep:0"]
+
+        changed = self.eh.reload_actions(config)
+
+        self.assertEqual(
+            changed, ["OnDTMF_#1", "OnKeyPressed_kb.1", "OnTest"]
+        )
+        self.assertEqual(len(self.eh.actions["OnTest"]), 1)
+        self.assertEqual(len(self.eh.actions["OnKeyPressed_kb.1"]), 2)
+        self.assertEqual(self.eh.reload_actions(config), [])
+
+    def test_replaced_actions_are_closed(self):
+        self.instance.event_handler = self.eh
+        config = self.instance.config
+        for waittime in (1, 2, 3):
+            config["events.OnTest"] = [f"waitevent:OnOther,{waittime},abort"]
+            self.eh.reload_actions(config)
+            self.assertEqual(len(self.eh.actions["OnOther"]), 1)
+
+        del config["events.OnTest"]
+        self.eh.reload_actions(config)
+        self.assertNotIn("OnOther", self.eh.actions)
+
+    def test_failed_reload_closes_new_actions(self):
+        self.instance.event_handler = self.eh
+        config = self.instance.config
+        config["events.OnTest"] = ["sleep:0"]
+        self.eh.reload_actions(config)
+        actions = self.eh.actions
+
+        config["events.OnTest"] = ["waitevent:OnOther,1,abort", "invalid:"]
+        with self.assertRaises(ValueError):
+            self.eh.reload_actions(config)
+
+        self.assertEqual(self.eh.actions, actions)
+        self.assertNotIn("OnOther", self.eh.actions)
+
+    def test_prepared_actions_are_applied_once(self):
+        config = self.instance.config
+        config["events.OnTest"] = ["sleep:0"]
+        first = self.eh.prepare_actions(config)
+        second = self.eh.prepare_actions(config)
+        self.assertNotIn("OnTest", self.eh.actions)
+
+        self.assertEqual(self.eh.apply_actions(first), ["OnTest"])
+        with self.assertRaises(ValueError):
+            self.eh.apply_actions(second)
+        self.assertEqual(self.eh.actions["OnTest"], first.actions["OnTest"])
+
+    def test_only_changed_actions_are_replaced(self):
+        config = self.instance.config
+        config["events.OnTest"] = ["sleep:0"]
+        config["events.OnOther"] = ["sleep:0"]
+        self.eh.reload_actions(config)
+        other = self.eh.actions["OnOther"]
+        before = lambda *_: None
+        after = lambda *_: None
+        self.eh.register_action("OnTest", before, prepend=True)
+        self.eh.register_action("OnTest", after)
+
+        config["events.OnTest"] = ["sleep:1", "sleep:2"]
+        self.assertEqual(self.eh.reload_actions(config), ["OnTest"])
+
+        self.assertIs(self.eh.actions["OnOther"], other)
+        self.assertEqual(
+            [str(a) for a in self.eh.actions["OnTest"]],
+            [
+                str(before),
+                "Wait for 1.0 seconds",
+                "Wait for 2.0 seconds",
+                str(after),
+            ],
+        )
+
+    def test_removed_actions_are_unregistered(self):
+        results = []
+        config = self.instance.config
+        config["events.OnTest"] = ["sleep:0"]
+        self.eh.reload_actions(config)
+        self.eh.register_action("OnTest", lambda *_: results.append(1))
+
+        del config["events.OnTest"]
+        self.assertEqual(self.eh.reload_actions(config), ["OnTest"])
+        self.eh.fire_event_sync("OnTest", SOURCE)
+
+        self.assertEqual(len(self.eh.actions["OnTest"]), 1)
+        self.assertEqual(results, [1])
+
+    def test_invalid_actions_change_nothing(self):
+        config = self.instance.config
+        config["events.OnTest"] = ["sleep:0"]
+        self.eh.reload_actions(config)
+        actions = self.eh.actions
+
+        config["events.OnTest"] = ["sleep:1"]
+        config["events.OnOther"] = ["no_such_action"]
+        with self.assertRaises(ValueError):
+            self.eh.reload_actions(config)
+
+        self.assertIs(self.eh.actions, actions)
+        del config["events.OnOther"]
+        self.assertEqual(self.eh.reload_actions(config), ["OnTest"])
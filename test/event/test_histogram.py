@@ -0,0 +1,51 @@
+from doorpi.event.histogram import LatencyHistogram, LatencyRecorder
+
+from ..mocks import DoorPiTestCase
+
+
+class TestLatencyHistogram(DoorPiTestCase):
+    def test_empty_histogram(self):
+        snapshot = LatencyHistogram().snapshot()
+        self.assertEqual(snapshot["count"], 0)
+        self.assertEqual(snapshot["p99"], 0.0)
+
+    def test_percentiles_are_within_bucket_width(self):
+        histogram = LatencyHistogram()
+        for i in range(1, 1001):
+            histogram.record(i / 1000)
+
+        for percent in (50, 95, 99):
+            with self.subTest(percent=percent):
+                expected = percent / 100
+                self.assertGreaterEqual(
+                    histogram.percentile(percent), expected
+                )
+                self.assertLessEqual(
+                    histogram.percentile(percent), expected * 1.1
+                )
+        self.assertEqual(histogram.percentile(100), 1.0)
+
+    def test_extreme_values_are_clamped(self):
+        histogram = LatencyHistogram()
+        histogram.record(0.0)
+        histogram.record(1e6)
+        self.assertEqual(histogram.count, 2)
+        self.assertEqual(histogram.percentile(100), 1e6)
+
+    def test_errors_are_counted(self):
+        histogram = LatencyHistogram()
+        histogram.record(0.1)
+        histogram.record(0.2, error=True)
+        self.assertEqual(histogram.snapshot()["errors"], 1)
+
+
+class TestLatencyRecorder(DoorPiTestCase):
+    def test_histograms_are_kept_per_name(self):
+        recorder = LatencyRecorder()
+        recorder.record("a", 0.1)
+        recorder.record("a", 0.2)
+        recorder.record("b", 0.3, error=True)
+
+        snapshot = recorder.snapshot()
+        self.assertEqual(snapshot["a"]["count"], 2)
+        self.assertEqual(snapshot["b"]["errors"], 1)
@@ -1,6 +1,9 @@
 import json
+import os
 import sqlite3
+import time
 
+from doorpi.event import migrations
 from doorpi.event.log import EventLog
 
 from ..mocks import DoorPiTestCase
@@ -11,7 +14,7 @@ class TestEventLog(DoorPiTestCase):
         el = EventLog("./events.db")
         db = sqlite3.connect("events.db")
         self.assertEqual(
-            "1",
+            str(migrations.LATEST_VERSION),
             db.execute(
                 "SELECT value FROM metadata WHERE key = 'db_version'"
             ).fetchone()[0],
@@ -19,6 +22,17 @@ class TestEventLog(DoorPiTestCase):
         db.close()
         el.destroy()
 
+    def test_storage_settings(self):
+        el = EventLog("./events.db")
+        db = sqlite3.connect("events.db")
+        self.assertEqual(
+            db.execute("PRAGMA journal_mode").fetchone()[0], "wal"
+        )
+        self.assertEqual(db.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+        db.close()
+        el.clean()
+        el.destroy()
+
     def test_count(self):
         el = EventLog("./events.db")
         db = sqlite3.connect("events.db")
@@ -124,3 +138,326 @@ class TestEventLog(DoorPiTestCase):
         self.assertEqual(
             (("00TEST", "-", 0.0),), tuple((r[0], r[1], r[2]) for r in cur)
         )
+
+    def test_log_event_batched(self):
+        el = EventLog("./events.db", batch_size=10, flush_interval=60)
+        for eid in range(25):
+            el.log_event(str(eid), "test", "OnTest", eid, None)
+        el.destroy()
+
+        db = sqlite3.connect("events.db")
+        self.assertEqual(
+            db.execute("SELECT COUNT(*) FROM event_log").fetchone()[0], 25
+        )
+        db.close()
+        self.assertEqual(el.stats["batches"], 3)
+        self.assertEqual(el.stats["written"], 25)
+
+    def test_failed_batch_counts_dropped_events(self):
+        el = EventLog("./events.db", batch_size=10, flush_interval=60)
+        db = sqlite3.connect("events.db")
+        db.execute("DROP TABLE event_log")
+        db.close()
+        with self.assertLogs("doorpi.event.log", "ERROR"):
+            for eid in range(2):
+                el.log_event(str(eid), "test", "OnTest", eid, None)
+                el.log_event_finished("OnTest", eid, 1.0)
+            self.assertTrue(el.flush(5))
+        self.assertEqual(el.stats["dropped"], 2)
+        el.destroy()
+
+    def test_log_event_caps_size(self):
+        el = EventLog("./events.db", max_entries=20, batch_size=7)
+        for eid in range(50):
+            el.log_event(str(eid), "test", "OnTest", eid, None)
+
+        log = el.get_event_log()
+        self.assertEqual(
+            [e["event_id"] for e in log], [str(i) for i in range(49, 29, -1)]
+        )
+        el.destroy()
+
+    def test_log_event_full_queue(self):
+        el = EventLog(
+            "./events.db", batch_size=10, flush_interval=60, queue_size=2
+        )
+        with self.assertLogs("doorpi.event.log", "WARNING"):
+            for eid in range(5):
+                el.log_event(str(eid), "test", "OnTest", eid, None)
+        self.assertEqual(el.stats["dropped"], 3)
+
+        self.assertTrue(el.flush(5))
+        self.assertEqual(el.stats["queued"], 0)
+        self.assertEqual(el.count_event_log_entries(), 2)
+        el.destroy()
+
+    def test_search(self):
+        el = EventLog("./events.db")
+        el.log_event("A", "keyboard", "OnKeyPressed", 10, {"tag": "4711"})
+        el.log_event(
+            "B", "sipphone", "OnCallIncoming", 20, {"remote_uri": "sip:4711@x"}
+        )
+        el.log_event("C", "keyboard", "OnKeyPressed", 30, {"tag": "0815"})
+
+        for query, kw, expected in (
+            ("4711", {}, ["B", "A"]),
+            ("event_name:OnKey 4711", {}, ["A"]),
+            ("fired_by:keyboard", {"since": 15}, ["C"]),
+            ("Key", {"until": 30}, ["A"]),
+            ('"sip:4711@"', {}, ["B"]),
+            ("event_id:C", {}, ["C"]),
+            ("", {"since": 20, "until": 30}, ["B"]),
+        ):
+            with self.subTest(query=query, **kw):
+                self.assertEqual(
+                    [e["event_id"] for e in el.search_event_log(query, **kw)],
+                    expected,
+                )
+        el.destroy()
+
+    def test_infos_are_packed(self):
+        el = EventLog("./events.db", max_entries=2)
+        el.log_event("A", "test", "OnTest", 0, {"user": "alice", "pin": 1})
+        el.log_event("B", "test", "OnTest", 1, {"user": "bob"})
+        el.log_event("C", "test", "OnTest", 2, None)
+        self.assertEqual(
+            [e["additional_infos"] for e in el.get_event_log()],
+            ["", '{"user": "bob"}'],
+        )
+        self.assertEqual(
+            el.page_event_log(fields=("additional_infos",))[0][1],
+            {"additional_infos": '{"user": "bob"}'},
+        )
+        # Removed events are also removed from the search index
+        self.assertEqual(el.search_event_log("alice"), ())
+        self.assertEqual(len(el.search_event_log("bob")), 1)
+        self.assertEqual(len(el.search_event_log("additional_infos:ob")), 1)
+        el.destroy()
+
+        db = sqlite3.connect("events.db")
+        self.assertEqual(
+            db.execute(
+                "SELECT typeof(additional_infos) FROM event_log"
+                " WHERE event_id = 'B'"
+            ).fetchone()[0],
+            "blob",
+        )
+        db.execute("DROP TABLE event_log_fts")
+        db.commit()
+        db.close()
+
+        el = EventLog("./events.db")
+        self.assertEqual(len(el.search_event_log("bob")), 1)
+        el.destroy()
+
+    def test_archive(self):
+        yesterday = time.time() - 86400
+        db = sqlite3.connect("events.db")
+        db.execute(
+            "CREATE TABLE event_log (event_id TEXT, fired_by TEXT,"
+            " event_name TEXT, start_time REAL, additional_infos TEXT)"
+        )
+        with db:
+            db.execute(
+                "INSERT INTO event_log VALUES (?, ?, ?, ?, ?)",
+                ("OLD", "test", "OnTest", yesterday, '{"user": "alice"}'),
+            )
+        db.close()
+
+        el = EventLog("./events.db", max_entries=2, archive="archive")
+        now = time.time()
+        for eid in range(4):
+            el.log_event(str(eid), "test", "OnTest", now + eid, {"n": eid})
+        el.flush()
+        self.assertEqual(
+            [e["event_id"] for e in el.get_event_log()], ["3", "2"]
+        )
+        # Past days are archived at startup, but kept in the database
+        # until the ring buffer deletes them
+        self.assertEqual(el.stats["archived"], 3)
+        self.assertEqual(len(os.listdir("archive")), 2)
+
+        self.assertEqual(
+            [e["event_id"] for e in el.search_event_log()],
+            ["3", "2", "1", "0", "OLD"],
+        )
+        self.assertEqual(
+            el.search_event_log("event_id:1"),
+            (
+                {
+                    "event_id": "1",
+                    "fired_by": "test",
+                    "event_name": "OnTest",
+                    "start_time": now + 1,
+                    "additional_infos": '{"n": 1}',
+                },
+            ),
+        )
+        self.assertEqual(
+            [e["event_id"] for e in el.search_event_log(until=now + 1)],
+            ["0", "OLD"],
+        )
+        self.assertEqual(
+            [e["event_id"] for e in el.search_event_log("ALICE")], ["OLD"]
+        )
+        self.assertEqual(len(el.search_event_log(since=now, max_count=3)), 3)
+        el.destroy()
+
+    def test_search_index_is_built_for_existing_events(self):
+        db = sqlite3.connect("events.db")
+        db.execute(
+            "CREATE TABLE event_log (event_id TEXT, fired_by TEXT,"
+            " event_name TEXT, start_time REAL, additional_infos TEXT)"
+        )
+        with db:
+            db.execute(
+                "INSERT INTO event_log VALUES (?, ?, ?, ?, ?)",
+                ("OLD", "test", "OnTest", 0, '{"user": "alice"}'),
+            )
+        db.close()
+
+        el = EventLog("./events.db", max_entries=1)
+        self.assertEqual(len(el.search_event_log("alice")), 1)
+        el.log_event("NEW", "test", "OnTest", 1, None)
+        self.assertEqual(el.search_event_log("alice"), ())
+        self.assertEqual(el.count_event_log_entries("NEW"), 1)
+        el.destroy()
+
+    def test_page(self):
+        el = EventLog("./events.db")
+        for eid in range(25):
+            name = "OnKeyPressed" if eid % 2 else "OnKeyUp"
+            el.log_event(str(eid), "test", name, eid // 2, None)
+
+        seen = []
+        cursor = None
+        while True:
+            page, cursor = el.page_event_log(
+                "OnKeyPressed",
+                limit=5,
+                cursor=cursor,
+                fields=["event_id", "start_time"],
+            )
+            for event in page:
+                self.assertEqual(event.keys(), {"event_id", "start_time"})
+            seen.extend(e["event_id"] for e in page)
+            if cursor is None:
+                break
+            # Events logged in between do not affect later pages
+            el.log_event("new", "test", "OnKeyPressed", 100, None)
+
+        self.assertEqual(seen, [str(i) for i in range(23, 0, -2)])
+
+        page, cursor = el.page_event_log(
+            sort="event_name", descending=False, limit=13
+        )
+        self.assertEqual({e["event_name"] for e in page}, {"OnKeyPressed"})
+        page, _ = el.page_event_log(
+            sort="event_name", descending=False, cursor=cursor
+        )
+        self.assertEqual(page[0]["event_name"], "OnKeyPressed")
+        self.assertEqual(page[-1]["event_name"], "OnKeyUp")
+        el.destroy()
+
+    def test_page_invalid_arguments(self):
+        el = EventLog("./events.db")
+        for kw in (
+            {"sort": "additional_infos"},
+            {"fields": ["rowid"]},
+            {"cursor": "garbage"},
+            {"limit": 0},
+        ):
+            with self.subTest(**kw), self.assertRaises(ValueError):
+                el.page_event_log(**kw)
+        el.destroy()
+
+    def test_rollup(self):
+        el = EventLog("./events.db", max_entries=2, batch_size=3)
+        hour = 1700000000 // 3600 * 3600
+        for i, offset in enumerate((0, 10, 3599, 3600, 7300)):
+            el.log_event(str(i), "test", "OnKeyPressed", hour + offset, None)
+            el.log_event_finished("OnKeyPressed", hour + offset, i)
+        el.log_event("x", "test", "OnCallIncoming", hour + 20, None)
+
+        rollup = el.get_event_rollup(["OnKey*"])
+        self.assertEqual(list(rollup), ["OnKeyPressed"])
+        self.assertEqual(
+            rollup["OnKeyPressed"],
+            [
+                {
+                    "bucket": hour,
+                    "count": 3,
+                    "first_time": hour + 0.0,
+                    "last_time": hour + 3599.0,
+                    "mean_duration": 1.0,
+                },
+                {
+                    "bucket": hour + 3600,
+                    "count": 1,
+                    "first_time": hour + 3600.0,
+                    "last_time": hour + 3600.0,
+                    "mean_duration": 3.0,
+                },
+                {
+                    "bucket": hour + 7200,
+                    "count": 1,
+                    "first_time": hour + 7300.0,
+                    "last_time": hour + 7300.0,
+                    "mean_duration": 4.0,
+                },
+            ],
+        )
+        self.assertEqual(el.count_event_log_entries(), 2)
+
+        rollup = el.get_event_rollup(since=hour + 3600, until=hour + 7200)
+        self.assertEqual([e["count"] for e in rollup["OnKeyPressed"]], [1])
+        self.assertNotIn("OnCallIncoming", rollup)
+
+        rollup = el.get_event_rollup(since=hour + 3700, until=hour + 7201)
+        self.assertEqual([e["count"] for e in rollup["OnKeyPressed"]], [1, 1])
+        rollup = el.get_event_rollup(since=hour + 10, until=hour + 3601)
+        self.assertEqual([e["count"] for e in rollup["OnKeyPressed"]], [3, 1])
+
+        rollup = el.get_event_rollup(["OnCallIncoming"], resolution="weekday")
+        entry = rollup["OnCallIncoming"][0]
+        self.assertEqual(entry["bucket"], time.localtime(hour).tm_wday)
+        self.assertIsNone(entry["mean_duration"])
+
+        with self.assertRaises(ValueError):
+            el.get_event_rollup(resolution="minute")
+        el.destroy()
+
+    def test_log_action_details(self):
+        el = EventLog("./events.db")
+        el.log_action(
+            "00TEST", "sleep:1", 10.0, 1.5, "timeout", "TimeoutError"
+        )
+        el.log_action("00TEST", "out:1,1", 12.0)
+        self.assertEqual(
+            el.get_action_log(filter_="sleep"),
+            (
+                {
+                    "event_id": "00TEST",
+                    "action_name": "sleep:1",
+                    "start_time": 10.0,
+                    "duration": 1.5,
+                    "action_result": "timeout",
+                    "exception": "TimeoutError",
+                },
+            ),
+        )
+        self.assertEqual(len(el.get_action_log()), 2)
+        self.assertEqual(el.stats["actions_written"], 2)
+        el.destroy()
+
+    def test_log_action_is_dropped_first(self):
+        el = EventLog(
+            "./events.db", batch_size=10, flush_interval=60, queue_size=4
+        )
+        for i in range(3):
+            el.log_action("00TEST", str(i), 0.0)
+        for i in range(2):
+            el.log_event(str(i), "test", "OnTest", 0, None)
+        self.assertEqual(el.stats["actions_dropped"], 1)
+        self.assertEqual(el.stats["dropped"], 0)
+        el.destroy()
@@ -0,0 +1,96 @@
+import sqlite3
+import time
+
+from doorpi.event import migrations
+from doorpi.event.log import EventLog
+
+from ..mocks import DoorPiTestCase
+
+
+class TestMigrations(DoorPiTestCase):
+    def create_v1(self, events):
+        db = sqlite3.connect("events.db")
+        db.executescript(
+            """
+            CREATE TABLE event_log (event_id TEXT, fired_by TEXT,
+                event_name TEXT, start_time REAL, additional_infos TEXT);
+            CREATE TABLE action_log (event_id TEXT, action_name TEXT,
+                start_time REAL, action_result TEXT);
+            CREATE TABLE metadata (
+                key TEXT PRIMARY KEY ON CONFLICT REPLACE, value TEXT);
+            INSERT INTO metadata VALUES ('db_version', '1');
+            """
+        )
+        with db:
+            db.executemany(
+                "INSERT INTO event_log VALUES (?, 'test', ?, ?, '')",
+                ((str(i), name, 3600 * i) for i, name in enumerate(events)),
+            )
+        return db
+
+    @staticmethod
+    def get_index(db, name):
+        return db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?",
+            (name,),
+        ).fetchone()
+
+    def test_migrate(self):
+        db = self.create_v1(["OnTest"] * 1200)
+        db.isolation_level = None
+        migrations.migrate(db)
+        self.assertEqual(migrations.get_version(db), migrations.LATEST_VERSION)
+        columns = [
+            row[1] for row in db.execute("PRAGMA table_info(action_log)")
+        ]
+        self.assertIn("duration", columns)
+        self.assertIn("exception", columns)
+        self.assertIsNone(self.get_index(db, "event_log_start_time"))
+
+        # Indexes are built one per step, existing events are counted
+        # in chunks
+        steps = 0
+        while migrations.backfill_step(db):
+            steps += 1
+        self.assertEqual(steps, 6)
+        self.assertIsNotNone(self.get_index(db, "event_log_start_time"))
+        self.assertIsNotNone(self.get_index(db, "action_log_event_id"))
+        self.assertEqual(
+            db.execute("SELECT SUM(count) FROM event_rollup").fetchone()[0],
+            1200,
+        )
+        self.assertFalse(migrations.backfill_step(db))
+        db.close()
+
+    def test_failed_migration_is_rolled_back(self):
+        db = self.create_v1([])
+        # Blocks creating the rollup table of migration 4
+        db.execute("CREATE INDEX event_rollup ON event_log (event_id)")
+        db.commit()
+        db.isolation_level = None
+        with self.assertRaises(sqlite3.Error):
+            migrations.migrate(db)
+        self.assertEqual(migrations.get_version(db), 3)
+        self.assertIsNone(
+            db.execute(
+                "SELECT 1 FROM metadata WHERE key = 'rollup_backfill_until'"
+            ).fetchone()
+        )
+        db.close()
+
+    def test_backfill_in_background(self):
+        self.create_v1(["OnOld", "OnOld", "OnOlder"]).close()
+        el = EventLog("./events.db")
+        el.log_event("new", "test", "OnNew", 7200, None)
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            rollup = el.get_event_rollup(resolution="day")
+            if "OnOlder" in rollup:
+                break
+            time.sleep(0.01)
+        counts = {
+            name: sum(e["count"] for e in entries)
+            for name, entries in rollup.items()
+        }
+        self.assertEqual(counts, {"OnOld": 2, "OnOlder": 1, "OnNew": 1})
+        el.destroy()
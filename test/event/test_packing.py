@@ -0,0 +1,61 @@
+import json
+import sqlite3
+import unittest
+
+from doorpi.event.packing import SCHEMA_ID, InfoCodec
+
+
+class TestInfoCodec(unittest.TestCase):
+    def setUp(self):
+        self.db = sqlite3.connect(":memory:")
+        self.db.execute(
+            "CREATE TABLE info_keys"
+            " (id INTEGER PRIMARY KEY, key TEXT UNIQUE NOT NULL)"
+        )
+        self.codec = InfoCodec(self.db)
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_roundtrip(self):
+        for value in (
+            {},
+            {"key": "value", "pin": 3, "active": True, "off": False},
+            {"nested": {"list": [1, -5, -200, 2 ** 40, None, 1.5]}},
+            {"unicode": "Türöffner ✓", "long": "x" * 70000},
+            {"big": 2 ** 64 - 1, "small": -(2 ** 63)},
+            {"many": {str(i): i for i in range(20)}},
+            {"items": list(range(20)), "tuple": (1, "a")},
+        ):
+            with self.subTest(value=value):
+                data = self.codec.pack(value, self.db)
+                self.assertIsInstance(data, bytes)
+                self.assertEqual(data[0], SCHEMA_ID)
+                self.assertEqual(
+                    self.codec.text(data, self.db),
+                    json.dumps(value, sort_keys=True),
+                )
+
+    def test_keys_are_stored_once(self):
+        first = self.codec.pack({"remote_uri": "a"}, self.db)
+        second = self.codec.pack({"remote_uri": "b"}, self.db)
+        self.assertEqual(len(first), len(second))
+        self.assertNotIn(b"remote_uri", first)
+        self.assertEqual(
+            self.db.execute("SELECT key FROM info_keys").fetchall(),
+            [("remote_uri",)],
+        )
+
+    def test_unpackable_values_fall_back_to_json(self):
+        for value in ({1: "a"}, {"obj": object}, {"huge": 2 ** 70}):
+            with self.subTest(value=value):
+                self.assertIsInstance(self.codec.pack(value, self.db), str)
+
+    def test_keys_from_other_codecs(self):
+        other = InfoCodec(self.db)
+        data = other.pack({"new": 1}, self.db)
+        self.assertEqual(self.codec.unpack(data, self.db), {"new": 1})
+
+    def test_text_passes_through_json(self):
+        self.assertEqual(self.codec.text('{"a": 1}', self.db), '{"a": 1}')
+        self.assertEqual(self.codec.text(None, self.db), "")
@@ -0,0 +1,45 @@
+from doorpi.event.pattern import PatternIndex, is_pattern, literal_prefix
+
+from ..mocks import DoorPiTestCase
+
+
+class TestPatternIndex(DoorPiTestCase):
+    def test_is_pattern(self):
+        self.assertTrue(is_pattern("pattern:OnKeyPressed_*"))
+        self.assertTrue(is_pattern("pattern:OnTimeMinute[0-5]0"))
+        self.assertFalse(is_pattern("OnKeyPressed_1"))
+        self.assertFalse(is_pattern("OnDTMF_*1"))
+
+    def test_literal_prefix(self):
+        self.assertEqual(literal_prefix("OnTime?inute"), "OnTime")
+        self.assertEqual(literal_prefix("*"), "")
+
+    def test_match_in_insertion_order(self):
+        index = PatternIndex()
+        for pattern in ("OnKey*", "*", "OnKeyPressed_?", "OnTime*"):
+            index.add(pattern)
+
+        self.assertEqual(
+            index.match("OnKeyPressed_1"), ["OnKey*", "*", "OnKeyPressed_?"]
+        )
+        self.assertEqual(index.match("OnTimeSecond"), ["*", "OnTime*"])
+        self.assertEqual(index.match(""), ["*"])
+
+    def test_character_classes(self):
+        index = PatternIndex()
+        index.add("OnTimeMinute[0-5]0")
+
+        self.assertEqual(index.match("OnTimeMinute30"), ["OnTimeMinute[0-5]0"])
+        self.assertEqual(index.match("OnTimeMinute31"), [])
+
+    def test_remove(self):
+        index = PatternIndex()
+        index.add("OnKey*")
+        index.add("OnKeyPressed_*")
+        index.remove("OnKeyPressed_*")
+        index.remove("OnUnknown*")
+
+        self.assertEqual(len(index), 1)
+        self.assertNotIn("OnKeyPressed_*", index)
+        self.assertEqual(list(index), ["OnKey*"])
+        self.assertEqual(index.match("OnKeyPressed_1"), ["OnKey*"])
@@ -0,0 +1,89 @@
+from unittest.mock import Mock
+
+from doorpi.event.timer import TimerWheel
+
+from ..mocks import DoorPiTestCase
+
+
+class TestTimerWheel(DoorPiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.now = 1000.0
+        self.wheel = TimerWheel(
+            0.05, slots=8, levels=2, clock=lambda: self.now
+        )
+
+    def run_until(self, until, step=0.05):
+        while self.now < until:
+            self.now = min(self.now + step, until)
+            self.wheel.advance()
+
+    def test_schedule_at(self):
+        callback = Mock()
+        self.wheel.schedule_at(1001.0, callback, "arg")
+
+        self.run_until(1000.95)
+        callback.assert_not_called()
+        self.run_until(1001.0)
+        callback.assert_called_once_with("arg")
+        self.assertEqual(len(self.wheel), 0)
+
+    def test_timers_beyond_wheel_range(self):
+        fired = []
+        for when in (1002.0, 1010.0, 1100.0):
+            self.wheel.schedule_at(when, lambda: fired.append(self.now))
+
+        self.run_until(1200.0, step=0.2)
+
+        self.assertEqual(len(fired), 3)
+        for when, at in zip((1002.0, 1010.0, 1100.0), fired):
+            self.assertGreaterEqual(at, when)
+            self.assertLess(at - when, 0.25)
+
+    def test_schedule_every(self):
+        callback = Mock()
+        self.wheel.schedule_every(1.0, callback, start=1001.0)
+
+        self.run_until(1005.5)
+
+        self.assertEqual(callback.call_count, 5)
+
+    def test_missed_periods_are_skipped(self):
+        callback = Mock()
+        timer = self.wheel.schedule_every(1.0, callback, start=1001.0)
+
+        self.now = 1004.5
+        self.wheel.advance()
+
+        callback.assert_called_once_with()
+        self.assertEqual(timer.when, 1005.0)
+
+    def test_cancel(self):
+        callback = Mock()
+        timer = self.wheel.schedule_every(1.0, callback)
+        timer.cancel()
+
+        self.run_until(1003.0)
+
+        callback.assert_not_called()
+
+    def test_clock_jumps(self):
+        callback = Mock()
+        timer = self.wheel.schedule_every(1.0, callback, start=1001.0)
+
+        self.now = 100000.2
+        self.wheel.advance()
+        callback.assert_called_once_with()
+
+        self.now = 500.2
+        self.wheel.advance()
+        self.assertEqual(timer.when, 501.0)
+        self.run_until(501.0)
+        self.assertEqual(callback.call_count, 2)
+
+    def test_exceptions_are_logged(self):
+        callback = Mock(side_effect=RuntimeError("test"))
+        self.wheel.schedule_at(1000.1, callback)
+
+        with self.assertLogs("doorpi.event.timer", "ERROR"):
+            self.run_until(1000.1)
@@ -0,0 +1,75 @@
+import json
+import pathlib
+import threading
+
+from doorpi.event import trace
+
+from ..mocks import DoorPiTestCase
+
+
+class TestTrace(DoorPiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.path = pathlib.Path("trace.jsonl")
+        trace.configure(self.path, exclude=["OnTime*"])
+        self.addCleanup(trace.configure, None)
+
+    def spans(self):
+        trace.configure(None)
+        with open(self.path, encoding="utf-8") as file:
+            return [json.loads(line) for line in file]
+
+    def test_nested_spans_are_linked(self):
+        with trace.span("event", "OnTest", span_id="EVENT1"):
+            with trace.span("action", "test", lane="normal"):
+                pass
+
+        action, event = self.spans()
+        self.assertEqual(event["span"], "EVENT1")
+        self.assertIsNone(event["parent"])
+        self.assertEqual(action["parent"], "EVENT1")
+        self.assertEqual(action["trace"], "EVENT1")
+        self.assertEqual(action["attrs"], {"lane": "normal"})
+
+    def test_errors_are_recorded(self):
+        with self.assertRaises(RuntimeError):
+            with trace.span("action", "test"):
+                raise RuntimeError("test")
+
+        (span,) = self.spans()
+        self.assertEqual(span["error"], "RuntimeError")
+
+    def test_bound_functions_keep_parent(self):
+        def child():
+            with trace.span("action", "child"):
+                pass
+
+        with trace.span("event", "OnTest", span_id="EVENT1"):
+            thread = threading.Thread(target=trace.bind(child))
+        thread.start()
+        thread.join()
+
+        spans = {s["name"]: s for s in self.spans()}
+        self.assertEqual(spans["child"]["parent"], "EVENT1")
+
+    def test_excluded_traces_are_not_recorded(self):
+        with trace.span("event", "OnTimeSecond"):
+            with trace.span("action", "test"):
+                pass
+        with trace.span("event", "OnTest"):
+            pass
+
+        self.assertEqual([s["name"] for s in self.spans()], ["OnTest"])
+
+    def test_sample_rate_zero_records_nothing(self):
+        trace.configure(self.path, sample_rate=0.0)
+        with trace.span("event", "OnTest"):
+            pass
+
+        self.assertFalse(self.path.exists())
+
+    def test_disabled_tracing(self):
+        trace.configure(None)
+        with trace.span("event", "OnTest") as context:
+            self.assertIsNone(context)
+            self.assertIsNone(trace.current())
@@ -0,0 +1,94 @@
+import pathlib
+import threading
+import time
+from unittest.mock import MagicMock
+
+from doorpi import config
+from doorpi.doorpi import DoorPi
+from doorpi.event import Lane
+
+from .mocks import DoorPiTestCase
+
+
+class TestDoorPiReload(DoorPiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.configfile = pathlib.Path(self.tmpdir.name, "doorpi.toml")
+        self.configfile.write_text("[events]\nOnTest = ['sleep:0']\n")
+        self.doorpi = object.__new__(DoorPi)
+        self.doorpi.configfile = self.configfile
+        self.doorpi.config = config.Configuration()
+        self.doorpi.config.load_builtin_definitions()
+        self.doorpi.config.load(self.configfile)
+        self.doorpi.dpsd = MagicMock()
+        self.doorpi.event_handler = MagicMock()
+        # pylint: disable=protected-access
+        self.doorpi._DoorPi__pending_reload = None
+        self.doorpi._DoorPi__prepared = False
+        self.doorpi._DoorPi__reload_lock = threading.Lock()
+        self.doorpi._DoorPi__shutdown = False
+        self.doorpi.event_handler.apply_actions.return_value = ["OnTest"]
+
+    def test_actions_are_created_with_new_config(self):
+        seen = []
+
+        def prepare_actions(conf):
+            # Actions read the global configuration in their constructor
+            seen.append(self.doorpi.config["events.OnTest"])
+
+        self.doorpi.event_handler.prepare_actions.side_effect = (
+            prepare_actions
+        )
+        self.configfile.write_text("[events]\nOnTest = ['sleep:1']\n")
+
+        with self.doorpi.config.pinned():
+            changed = self.doorpi.reload()
+
+        self.assertEqual(changed, ["OnTest"])
+        self.assertEqual(seen, [("sleep:1",)])
+        self.assertEqual(self.doorpi.config["events.OnTest"], ("sleep:1",))
+        self.doorpi.event_handler.fire_event_sync.assert_called_once_with(
+            "OnConfigReload",
+            "doorpi.doorpi",
+            extra={"changed_events": ["OnTest"]},
+            lane=Lane.REALTIME,
+        )
+        self.doorpi.dpsd.ready.assert_called_once_with()
+
+    def test_failed_reload_restores_config(self):
+        self.doorpi.event_handler.prepare_actions.side_effect = ValueError
+        self.configfile.write_text("[events]\nOnTest = ['sleep:1']\n")
+
+        with self.assertRaises(ValueError):
+            self.doorpi.reload()
+
+        self.assertEqual(self.doorpi.config["events.OnTest"], ("sleep:0",))
+        self.doorpi.event_handler.fire_event_sync.assert_not_called()
+        self.doorpi.dpsd.ready.assert_called_once_with()
+        self.doorpi.event_handler.apply_actions.assert_not_called()
+
+    def test_background_reload_is_applied_by_main_loop(self):
+        # pylint: disable=protected-access
+        self.configfile.write_text("[events]\nOnTest = ['sleep:1']\n")
+        thread = threading.Thread(
+            target=self.doorpi._DoorPi__reload_in_background
+        )
+        thread.start()
+        self.addCleanup(thread.join)
+        deadline = time.monotonic() + 5
+        while (
+            self.doorpi._DoorPi__pending_reload is None
+            and time.monotonic() < deadline
+        ):
+            time.sleep(0.01)
+
+        self.doorpi.event_handler.prepare_actions.assert_called_once()
+        self.doorpi.event_handler.apply_actions.assert_not_called()
+        self.assertEqual(self.doorpi.config["events.OnTest"], ("sleep:0",))
+
+        self.doorpi._DoorPi__apply_pending_reload()
+        thread.join(5)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(self.doorpi.config["events.OnTest"], ("sleep:1",))
+        self.doorpi.event_handler.fire_event_sync.assert_called_once()